@@ -0,0 +1,137 @@
+"""
+Comprobación de planes de consulta sobre datos sintéticos.
+
+Siembra la BBDD (bench/seed.py), ejecuta los escenarios de bench/suite.py
+capturando cada sentencia SQL con sus parámetros y el endpoint que la lanzó,
+y pide el plan de cada sentencia distinta:
+
+- SQLite: EXPLAIN QUERY PLAN; es escaneo completo un paso `SCAN <tabla>`
+  sin índice.
+- MySQL: EXPLAIN; es escaneo completo una fila con type=ALL.
+
+Sale con código 1 si alguna sentencia recorre una tabla entera, salvo las
+tablas de ALLOWED_SCANS (catálogos pequeños que se leen completos a
+propósito). tests/test_explain.py hace la misma comprobación con pytest.
+
+    python bench/explain.py
+    DATABASE_URL=mysql+pymysql://... python bench/explain.py --users 500
+"""
+import argparse
+import os
+import random
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.seed import add_seed_arguments, seed_kwargs, prepare_app, seed  # noqa: E402
+from bench.suite import Runner, read_scenarios, write_flow  # noqa: E402
+
+# Se leen enteras a propósito (CardCatalog carga todas las cartas)
+ALLOWED_SCANS = {'cards'}
+
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE')
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+
+class Capture:
+    """Sentencias distintas lanzadas durante las peticiones: texto -> (params, endpoints)."""
+
+    def __init__(self):
+        self.statements = {}
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        from flask import has_request_context, request
+        if executemany or not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return
+        endpoint = request.endpoint if has_request_context() else None
+        entry = self.statements.setdefault(statement, [parameters, set()])
+        entry[1].add(endpoint)
+
+
+def full_scans(connection, dialect, statement, parameters):
+    """Tablas que el plan de la sentencia recorre enteras."""
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+        tables = []
+        for row in rows:
+            match = _SQLITE_SCAN.match(row[-1])
+            if match:
+                tables.append(match.group(1))
+        return tables
+    result = connection.exec_driver_sql(f'EXPLAIN {statement}', parameters)
+    columns = list(result.keys())
+    return [row[columns.index('table')] for row in result.fetchall()
+            if row[columns.index('type')] == 'ALL']
+
+
+def analyze(app, data, rng, iterations=5, write_flows=3):
+    """
+    Ejecuta los escenarios sobre los datos sembrados y analiza los planes.
+    Devuelve (sentencias analizadas, escaneos, errores por escenario); cada
+    escaneo es (sentencia, tablas, endpoints).
+    """
+    from sqlalchemy import event
+    from src.models import db
+
+    with app.app_context():
+        engine = db.engine
+        dialect = engine.dialect.name
+
+    capture = Capture()
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        runner = Runner(app, data, rng)
+        for _, fn in read_scenarios():
+            for _ in range(iterations):
+                fn(runner, record=True)
+        for _ in range(write_flows):
+            write_flow(runner, record=True)
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+    errors = {name: s['errors'] for name, s in runner.samples.items() if s['errors']}
+    failures = []
+    with engine.connect() as connection:
+        for statement, (parameters, endpoints) in capture.statements.items():
+            scanned = [t for t in full_scans(connection, dialect, statement, parameters)
+                       if t not in ALLOWED_SCANS]
+            if scanned:
+                failures.append((statement, scanned, endpoints))
+    return len(capture.statements), failures, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_seed_arguments(parser)
+    parser.add_argument('--iterations', type=int, default=5, help='Peticiones por escenario de lectura')
+    parser.add_argument('--write-flows', type=int, default=3)
+    args = parser.parse_args()
+
+    from src.models import db
+
+    app = prepare_app()
+    with app.app_context():
+        data = seed(**seed_kwargs(args))
+        dialect = db.engine.dialect.name
+
+    analyzed, failures, errors = analyze(
+        app, data, random.Random(args.seed), args.iterations, args.write_flows
+    )
+    if errors:
+        print(f'Aviso: escenarios con respuestas de error: {errors}')
+
+    print(f'{analyzed} sentencias distintas analizadas ({dialect})')
+    for statement, scanned, endpoints in failures:
+        print(f"\nESCANEO COMPLETO de {', '.join(sorted(set(scanned)))} "
+              f"en {', '.join(sorted(str(e) for e in endpoints))}:")
+        print('    ' + ' '.join(statement.split()))
+    if failures:
+        print(f'\n{len(failures)} sentencias con escaneo completo')
+        sys.exit(1)
+    print('Ningún escaneo completo')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+"""
+App de benchmark con latencia artificial por consulta SQL.
+
+Simula el round trip al MySQL remoto sobre una BBDD local: cada sentencia
+duerme BENCH_DB_LATENCY_MS milisegundos antes de ejecutarse.
+"""
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.asgi import FlaskASGI, ASGI_THREADS
+from src.main import app
+
+_LATENCY = float(os.getenv('BENCH_DB_LATENCY_MS', 0)) / 1000
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _sleep(conn, cursor, statement, parameters, context, executemany):
+    if _LATENCY:
+        time.sleep(_LATENCY)
+
+
+asgi_app = FlaskASGI(app, ASGI_THREADS)
@@ -0,0 +1,211 @@
+"""
+Datos sintéticos reproducibles para benchmarks.
+
+Siembra usuarios, ligas con sus miembros y, por liga, partidos completados
+(4 jugadores, resultado, cartas asignadas y valoraciones) más algunos
+partidos abiertos. Con la misma --seed genera siempre los mismos datos.
+Todo se inserta por lotes, sin pasar por la API; después se reconstruye el
+ranking Elo. Las estadísticas por usuario se construyen en la primera lectura.
+
+    python bench/seed.py --users 200 --leagues 20 --matches 200
+    DATABASE_URL=mysql+pymysql://... python bench/seed.py
+
+Sin DATABASE_URL usa una BBDD SQLite temporal (útil solo para comprobar).
+bench/suite.py lo usa para preparar su BBDD.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'bench'
+BATCH = 5000
+
+
+def _insert(model, rows):
+    from sqlalchemy import insert
+    from src.models import db
+    for i in range(0, len(rows), BATCH):
+        db.session.execute(insert(model), rows[i:i + BATCH])
+
+
+def seed(users=200, leagues=20, members=12, matches=200, open_ratio=0.1,
+         rating_ratio=0.5, seed=1):
+    """
+    Siembra la BBDD de la app activa. Devuelve un dict con lo necesario para
+    generar peticiones: ids y emails de usuario, jugadores de cada partido
+    completado y, por liga, sus miembros, código de invitación y partidos
+    completados.
+    """
+    from werkzeug.security import generate_password_hash
+    from src.models import db
+    from src.models.card import card_catalog
+    from src.models.league import League, LeagueMembership
+    from src.models.match import Match, MatchParticipation, CardAssignment
+    from src.models.rating import PlayerRating
+    from src.models.skill import replay_ratings
+    from src.models.user import User
+
+    if members < 4:
+        raise ValueError('Cada liga necesita al menos 4 miembros')
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    tag = f'{seed}_{int(time.time())}'
+    password_hash = generate_password_hash(PASSWORD)   # uno para todos: hashear es caro
+
+    _insert(User, [{
+        'username': f'bench_{tag}_{i}', 'email': f'bench_{tag}_{i}@example.com',
+        'password_hash': password_hash, 'created_at': now, 'updated_at': now
+    } for i in range(users)])
+    user_rows = db.session.query(User.id, User.email)\
+        .filter(User.username.like(f'bench\\_{tag}\\_%', escape='\\')).order_by(User.id).all()
+    user_ids = [uid for uid, _ in user_rows]
+    emails = dict(user_rows)
+
+    league_specs = []
+    for i in range(leagues):
+        league_members = rng.sample(user_ids, min(members, len(user_ids)))
+        league_specs.append({
+            'name': f'Bench {i}', 'invite_code': f'BN{tag}_{i}'[-50:],
+            'created_by_id': league_members[0], 'members': league_members
+        })
+    _insert(League, [{
+        'name': s['name'], 'invite_code': s['invite_code'], 'created_by_id': s['created_by_id'],
+        'created_at': now, 'updated_at': now
+    } for s in league_specs])
+    codes = {s['invite_code']: s for s in league_specs}
+    for league_id, code in db.session.query(League.id, League.invite_code)\
+            .filter(League.invite_code.in_(codes)).all():
+        codes[code]['id'] = league_id
+    _insert(LeagueMembership, [
+        {'league_id': s['id'], 'user_id': uid, 'joined_at': now}
+        for s in league_specs for uid in s['members']
+    ])
+
+    # Partidos: completados en el pasado y unos pocos abiertos en el futuro
+    match_rows, lineups = [], []
+    for s in league_specs:
+        for _ in range(matches):
+            is_open = rng.random() < open_ratio
+            players = rng.sample(s['members'], 4)
+            date = now + timedelta(hours=rng.randint(1, 24 * 30)) if is_open \
+                else now - timedelta(hours=rng.randint(1, 24 * 365))
+            match_rows.append({
+                'league_id': s['id'], 'date': date, 'created_at': now,
+                'status': 'open' if is_open else 'completed',
+                'winner_team': None if is_open else rng.choice((1, 2)),
+                'created_by_id': players[0]
+            })
+            lineups.append(players[:rng.randint(0, 3)] if is_open else players)
+    first_id = (db.session.query(db.func.max(Match.id)).scalar() or 0) + 1
+    _insert(Match, match_rows)
+    match_ids = [mid for (mid,) in db.session.query(Match.id)
+                 .filter(Match.id >= first_id).order_by(Match.id).all()]
+
+    _insert(MatchParticipation, [
+        {'match_id': mid, 'user_id': uid, 'team': 1 + j // 2, 'joined_at': now}
+        for mid, players in zip(match_ids, lineups) for j, uid in enumerate(players)
+    ])
+    participation_ids = {
+        (mid, uid): pid for pid, mid, uid in db.session.query(
+            MatchParticipation.id, MatchParticipation.match_id, MatchParticipation.user_id
+        ).filter(MatchParticipation.match_id >= first_id).all()
+    }
+
+    card_ids = [c['id'] for c in card_catalog.active()]
+    completed = [(mid, players) for mid, players, row in zip(match_ids, lineups, match_rows)
+                 if row['status'] == 'completed']
+    if card_ids:
+        _insert(CardAssignment, [
+            {'match_id': mid, 'participation_id': participation_ids[(mid, uid)],
+             'card_id': rng.choice(card_ids), 'assigned_at': now, 'used': False}
+            for mid, players in completed for uid in players
+        ])
+    _insert(PlayerRating, [
+        {'match_id': mid, 'rater_id': rater, 'rated_id': rated,
+         'rating': rng.randint(1, 10), 'comment': '', 'created_at': now}
+        for mid, players in completed for rater in players
+        if rng.random() < rating_ratio
+        for rated in players if rated != rater
+    ])
+    db.session.commit()
+    replay_ratings()
+    db.session.commit()
+
+    completed_by_league = {}
+    for mid, row in zip(match_ids, match_rows):
+        if row['status'] == 'completed':
+            completed_by_league.setdefault(row['league_id'], []).append(mid)
+    return {
+        'users': user_ids,
+        'emails': emails,
+        'players': dict(completed),
+        'password': PASSWORD,
+        'leagues': [{
+            'id': s['id'], 'invite_code': s['invite_code'], 'members': s['members'],
+            'completed': completed_by_league.get(s['id'], [])
+        } for s in league_specs],
+        'counts': {
+            'users': len(user_ids), 'leagues': len(league_specs), 'matches': len(match_ids),
+            'participations': len(participation_ids),
+        },
+    }
+
+
+def add_seed_arguments(parser):
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--leagues', type=int, default=20)
+    parser.add_argument('--members', type=int, default=12, help='Miembros por liga')
+    parser.add_argument('--matches', type=int, default=200, help='Partidos por liga')
+    parser.add_argument('--open-ratio', type=float, default=0.1, help='Fracción de partidos abiertos')
+    parser.add_argument('--rating-ratio', type=float, default=0.5,
+                        help='Fracción de jugadores que valoran a sus compañeros')
+    parser.add_argument('--seed', type=int, default=1)
+
+
+def seed_kwargs(args):
+    return {
+        'users': args.users, 'leagues': args.leagues, 'members': args.members,
+        'matches': args.matches, 'open_ratio': args.open_ratio,
+        'rating_ratio': args.rating_ratio, 'seed': args.seed,
+    }
+
+
+def prepare_app():
+    """App con el esquema al día; BBDD SQLite temporal si no hay DATABASE_URL."""
+    if not os.getenv('DATABASE_URL'):
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='bench-'), 'bench.db')
+    os.environ.setdefault('SECRET_KEY', 'bench')
+    # Todas las peticiones llegan desde la misma IP: sin límite de intentos
+    os.environ.setdefault('AUTH_IP_LIMIT', '0')
+    os.environ.setdefault('AUTH_EMAIL_LIMIT', '0')
+    from flask_migrate import upgrade
+    from src.main import app
+    from src.models.card import initialize_cards
+    with app.app_context():
+        upgrade()
+        initialize_cards()
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_seed_arguments(parser)
+    args = parser.parse_args()
+
+    app = prepare_app()
+    start = time.perf_counter()
+    with app.app_context():
+        data = seed(**seed_kwargs(args))
+    counts = ', '.join(f'{v} {k}' for k, v in data['counts'].items())
+    print(f'Sembrado en {time.perf_counter() - start:.1f}s: {counts}')
+
+
+if __name__ == '__main__':
+    main()
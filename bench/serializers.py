@@ -0,0 +1,167 @@
+"""
+Micro-benchmark de serialización: to_dict() sobre objetos ORM frente a la
+proyección de columnas de src/models/serializers.py.
+
+Siembra una liga con --rows partidos (4 participaciones, valoraciones y
+alguna foto por partido), comprueba que ambas rutas producen exactamente el
+mismo JSON (mismas claves, mismo orden) y mide el mejor de --repeat
+ejecuciones de cada una. Sale con código 1 si la salida difiere.
+
+    python bench/serializers.py --rows 10000 --repeat 5
+    DATABASE_URL=mysql+pymysql://... python bench/serializers.py
+
+Sin DATABASE_URL usa una BBDD SQLite temporal.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def seed(rows):
+    from sqlalchemy import insert
+    from src.models import db
+    from src.models.league import League, LeagueMembership
+    from src.models.match import Match, MatchParticipation
+    from src.models.rating import PlayerRating, MatchPhoto
+    from src.models.user import User
+
+    suffix = int(time.time() * 1000)
+    now = datetime.utcnow()
+    users = []
+    for i in range(4):
+        user = User(username=f'bench{suffix}_{i}', email=f'bench{suffix}_{i}@example.com')
+        user.set_password('bench')
+        users.append(user)
+    db.session.add_all(users)
+    db.session.flush()
+    league = League(name='bench', invite_code=f'B{suffix}'[-10:], created_by_id=users[0].id)
+    db.session.add(league)
+    db.session.flush()
+    db.session.add_all(LeagueMembership(user_id=u.id, league_id=league.id) for u in users)
+
+    db.session.execute(insert(Match), [{
+        'league_id': league.id, 'date': now - timedelta(hours=i), 'status': 'completed',
+        'winner_team': 1 + i % 2, 'created_at': now, 'created_by_id': users[0].id
+    } for i in range(rows)])
+    match_ids = [mid for (mid,) in db.session.query(Match.id).filter_by(league_id=league.id)]
+
+    db.session.execute(insert(MatchParticipation), [{
+        'match_id': mid, 'user_id': u.id, 'team': 1 + j // 2, 'joined_at': now
+    } for mid in match_ids for j, u in enumerate(users)])
+    db.session.execute(insert(PlayerRating), [{
+        'match_id': mid, 'rater_id': users[0].id, 'rated_id': u.id, 'rating': 7,
+        'comment': '' if n % 2 else None, 'created_at': now
+    } for n, mid in enumerate(match_ids) for u in users[1:]])
+    db.session.execute(insert(MatchPhoto), [{
+        'match_id': mid, 'user_id': users[0].id, 'uploaded_at': now, 'status': 'ready',
+        'file_path': f'ab/cd/{mid:064x}.jpg',
+        'thumb_path': f'ab/cd/{mid:064x}_thumb.jpg',
+        'web_path': None, 'width': 1280, 'height': 960
+    } for mid in match_ids[::10]])
+    db.session.commit()
+    return league.id, users[0].id
+
+
+def orm_matches(league_id):
+    from src.models.loaders import match_detail_options
+    from src.models.match import Match
+    matches = Match.query.options(*match_detail_options())\
+        .filter_by(league_id=league_id).order_by(Match.id).all()
+    return [m.to_dict() for m in matches]
+
+
+def projection_matches(league_id):
+    from src.models.serializers import league_matches
+    return league_matches(league_id)
+
+
+def orm_history(user_id):
+    # Implementación anterior de GET /api/profile/history, como referencia
+    from sqlalchemy.orm import contains_eager
+    from src.models.match import Match, MatchParticipation
+    participations = MatchParticipation.query\
+        .join(Match, Match.id == MatchParticipation.match_id)\
+        .options(contains_eager(MatchParticipation.match))\
+        .filter(MatchParticipation.user_id == user_id)\
+        .order_by(Match.date.desc(), Match.id.desc()).all()
+    return [{
+        'match_id': p.match.id,
+        'league_id': p.match.league_id,
+        'date': p.match.date.isoformat(),
+        'team': p.team,
+        'your_result': 'win' if p.match.winner_team == p.team else 'loss',
+        'status': p.match.status
+    } for p in participations]
+
+
+def projection_history(user_id):
+    from src.models.match import Match
+    from src.models.serializers import user_history_query, serialize_history
+    rows = user_history_query(user_id).order_by(Match.date.desc(), Match.id.desc()).all()
+    return serialize_history(rows)
+
+
+def best_of(fn, arg, repeat):
+    from src.models import db
+    timings = []
+    for _ in range(repeat):
+        db.session.remove()     # identity map vacío en cada ejecución
+        start = time.perf_counter()
+        result = fn(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Guardar resultados en JSON')
+    args = parser.parse_args()
+
+    if not os.getenv('DATABASE_URL'):
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    from flask_migrate import upgrade
+    from src.main import app
+
+    results = {}
+    identical = True
+    with app.app_context():
+        upgrade()
+        league_id, user_id = seed(args.rows)
+        for name, orm_fn, projection_fn, arg in (
+            ('league_matches', orm_matches, projection_matches, league_id),
+            ('user_history', orm_history, projection_history, user_id),
+        ):
+            orm_time, orm_out = best_of(orm_fn, arg, args.repeat)
+            proj_time, proj_out = best_of(projection_fn, arg, args.repeat)
+            same = json.dumps(orm_out) == json.dumps(proj_out)
+            identical &= same
+            results[name] = {
+                'rows': len(orm_out),
+                'to_dict_ms': round(orm_time * 1000, 1),
+                'projection_ms': round(proj_time * 1000, 1),
+                'speedup': round(orm_time / proj_time, 2) if proj_time else None,
+                'identical': same,
+            }
+            print(f"{name:15} {len(orm_out):6} filas  to_dict {orm_time * 1000:8.1f} ms  "
+                  f"proyección {proj_time * 1000:8.1f} ms  x{orm_time / proj_time:.2f}  "
+                  f"{'OK' if same else 'DIFERENTE'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
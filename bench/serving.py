@@ -0,0 +1,192 @@
+"""
+Benchmark de modos de servicio: sync, gthread y ASGI (uvicorn).
+
+Levanta la app en cada modo sobre la misma BBDD, lanza N clientes
+concurrentes contra las rutas de lectura y mide peticiones/s y latencias.
+
+    python bench/serving.py --modes sync,gthread,asgi --concurrency 32 --duration 10
+    DATABASE_URL=mysql+pymysql://... python bench/serving.py
+
+Sin DATABASE_URL usa una BBDD SQLite temporal. Con --db-latency-ms se añade
+un retardo artificial por consulta para simular el round trip al MySQL remoto
+(BENCH_DB_LATENCY_MS).
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    'sync': ['gunicorn', '-c', 'gunicorn.conf.py', 'src.main:app'],
+    'gthread': ['gunicorn', '-c', 'gunicorn.conf.py', 'src.main:app'],
+    'asgi': ['gunicorn', '-c', 'gunicorn.conf.py', 'src.asgi:app'],
+}
+WORKER_CLASS = {'sync': 'sync', 'gthread': 'gthread', 'asgi': 'uvicorn'}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def request(port, method, path, body=None, token=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    res = conn.getresponse()
+    data = res.read()
+    conn.close()
+    return res.status, (json.loads(data) if data else None)
+
+
+def start_server(mode, port, env, workers):
+    env = dict(env, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               GUNICORN_WORKER_CLASS=WORKER_CLASS[mode])
+    command = list(COMMANDS[mode])
+    if env.get('BENCH_DB_LATENCY_MS'):
+        command[-1] = 'bench.latency_app:asgi_app' if mode == 'asgi' else 'bench.latency_app:app'
+    proc = subprocess.Popen(command, cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            request(port, 'GET', '/api/auth/validate-token')
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f'el servidor {mode} no arrancó')
+
+
+def seed(port):
+    """Usuario, liga y unos partidos vía API. Devuelve (token, rutas de lectura)."""
+    suffix = int(time.time() * 1000)
+    status, data = request(port, 'POST', '/api/auth/register', {
+        'username': f'bench{suffix}', 'email': f'bench{suffix}@example.com', 'password': 'bench'
+    })
+    token = data['data']['token']
+    _, data = request(port, 'POST', '/api/leagues/', {'name': 'Bench'}, token)
+    league_id = data['data']['league']['id']
+    match_ids = []
+    for i in range(20):
+        date = (datetime.utcnow() + timedelta(days=i)).isoformat()
+        _, data = request(port, 'POST', f'/api/matches/leagues/{league_id}/matches', {'date': date}, token)
+        match_ids.append(data['data']['id'])
+        request(port, 'POST', f'/api/matches/matches/{match_ids[-1]}/join', {'team': 1}, token)
+    paths = [
+        f'/api/leagues/{league_id}',
+        f'/api/matches/leagues/{league_id}/matches',
+        f'/api/matches/matches/{match_ids[0]}',
+        '/api/profile/stats',
+        '/api/profile/history',
+    ]
+    return token, paths
+
+
+def load(port, token, paths, concurrency, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(idx):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        headers = {'Authorization': f'Bearer {token}'}
+        i = idx
+        local = []
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                res = conn.getresponse()
+                res.read()
+                ok = res.status < 400
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - start)
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0]
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return round(values[k] * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default='sync,gthread,asgi')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--db-latency-ms', type=float, default=0)
+    parser.add_argument('--output', default=None, help='Fichero JSON de resultados')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    tmpdir = None
+    if 'DATABASE_URL' not in env:
+        tmpdir = tempfile.mkdtemp(prefix='bench-')
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    env.setdefault('SECRET_KEY', 'bench')
+    if args.db_latency_ms:
+        env['BENCH_DB_LATENCY_MS'] = str(args.db_latency_ms)
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'src.main', 'init-db'],
+                   cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+
+    results = {}
+    for mode in args.modes.split(','):
+        port = free_port()
+        proc = start_server(mode, port, env, args.workers)
+        try:
+            token, paths = seed(port)
+            latencies, errors = load(port, token, paths, args.concurrency, args.duration)
+        finally:
+            proc.terminate()
+            proc.wait()
+        results[mode] = {
+            'requests': len(latencies),
+            'errors': errors,
+            'rps': round(len(latencies) / args.duration, 1),
+            'p50_ms': percentile(latencies, 50),
+            'p99_ms': percentile(latencies, 99),
+        }
+        print(f"{mode:8s} {results[mode]['rps']:8.1f} req/s  p50 {results[mode]['p50_ms']} ms  "
+              f"p99 {results[mode]['p99_ms']} ms  errores {errors}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+Suite de benchmark de la API sobre datos sintéticos.
+
+Siembra la BBDD (bench/seed.py) y recorre todos los blueprints (auth,
+league, match, result, profile) con el cliente de pruebas de Flask, en
+proceso y sin red. Cada petición se mide y se cuentan sus consultas SQL.
+Por escenario se informa de peticiones, errores, peticiones/s, p50/p95/p99
+y consultas por petición (media y máximo).
+
+- Lecturas: --iterations peticiones por escenario con usuario, liga y
+  partido elegidos al azar (reproducible con --seed).
+- Escrituras: --write-flows ciclos completos crear partido, apuntar a 4
+  jugadores, asignar cartas, registrar resultado y valorar.
+
+    python bench/suite.py --output bench-results.json
+    python bench/suite.py --baseline bench-results.json    # comparar con otra ejecución
+    DATABASE_URL=mysql+pymysql://... python bench/suite.py --users 1000 --matches 500
+
+Para concurrencia real y modos de servidor ver bench/serving.py.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.seed import add_seed_arguments, seed_kwargs, prepare_app, seed  # noqa: E402
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return round(values[k] * 1000, 2)
+
+
+class Runner:
+    """Lanza peticiones con el cliente de pruebas y acumula muestras por escenario."""
+
+    def __init__(self, app, data, rng):
+        from sqlalchemy import event
+        from src.models import db
+
+        self.app = app
+        self.client = app.test_client()
+        self.data = data
+        self.rng = rng
+        self.samples = {}
+        self.queries = 0
+        self.tokens = {}
+        self.etags = {}
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.queries += 1
+
+    def token(self, user_id):
+        """Token de acceso como el de login: identidad y ligas embebidas."""
+        from src.models import db
+        from src.models.user import User
+        from src.services.tokens import issue_tokens
+        if user_id not in self.tokens:
+            leagues = [lg['id'] for lg in self.data['leagues'] if user_id in lg['members']]
+            with self.app.app_context():
+                username = db.session.query(User.username).filter(User.id == user_id).scalar()
+                self.tokens[user_id] = issue_tokens(user_id, username, leagues)['token']
+        return self.tokens[user_id]
+
+    def call(self, name, method, path, user_id=None, record=True, **kwargs):
+        headers = kwargs.pop('headers', {})
+        if user_id is not None:
+            headers['Authorization'] = f'Bearer {self.token(user_id)}'
+        self.queries = 0
+        start = time.perf_counter()
+        response = self.client.open(path, method=method, headers=headers, **kwargs)
+        elapsed = time.perf_counter() - start
+        if record:
+            sample = self.samples.setdefault(name, {'latencies': [], 'queries': [], 'errors': 0})
+            sample['latencies'].append(elapsed)
+            sample['queries'].append(self.queries)
+            sample['errors'] += int(response.status_code >= 400)
+        return response
+
+    # Elecciones aleatorias reproducibles
+
+    def league(self):
+        return self.rng.choice(self.data['leagues'])
+
+    def member(self, league):
+        return self.rng.choice(league['members'])
+
+    def completed_match(self):
+        league = self.rng.choice([lg for lg in self.data['leagues'] if lg['completed']])
+        return league, self.rng.choice(league['completed'])
+
+
+def read_scenarios():
+    """(nombre, función(runner, record)) de los escenarios de lectura."""
+
+    def auth_login(r, record):
+        uid = r.rng.choice(r.data['users'])
+        r.call('auth.login', 'POST', '/api/auth/login', record=record,
+               json={'email': r.data['emails'][uid], 'password': r.data['password']})
+
+    def auth_validate(r, record):
+        r.call('auth.validate_token', 'GET', '/api/auth/validate-token',
+               user_id=r.rng.choice(r.data['users']), record=record)
+
+    def auth_profile(r, record):
+        r.call('auth.profile', 'GET', '/api/auth/profile',
+               user_id=r.rng.choice(r.data['users']), record=record)
+
+    def league_list(r, record):
+        league = r.league()
+        r.call('league.list', 'GET', '/api/leagues/', user_id=r.member(league), record=record)
+
+    def league_detail(r, record):
+        league = r.league()
+        r.call('league.detail', 'GET', f"/api/leagues/{league['id']}",
+               user_id=r.member(league), record=record)
+
+    def league_detail_conditional(r, record):
+        league = r.league()
+        path = f"/api/leagues/{league['id']}"
+        uid = r.member(league)
+        if path not in r.etags:
+            r.etags[path] = r.call(None, 'GET', path, user_id=uid, record=False).headers.get('ETag')
+        r.call('league.detail_304', 'GET', path, user_id=uid, record=record,
+               headers={'If-None-Match': r.etags[path]})
+
+    def league_standings(r, record):
+        league = r.league()
+        r.call('league.standings', 'GET', f"/api/leagues/{league['id']}/standings",
+               user_id=r.member(league), record=record)
+
+    def league_analytics(r, record):
+        league = r.league()
+        r.call('league.analytics', 'GET', f"/api/leagues/{league['id']}/analytics",
+               user_id=r.member(league), record=record)
+
+    def match_list(r, record):
+        league = r.league()
+        r.call('match.list', 'GET', f"/api/matches/leagues/{league['id']}/matches?limit=50",
+               user_id=r.member(league), record=record)
+
+    def match_detail(r, record):
+        league, match_id = r.completed_match()
+        r.call('match.detail', 'GET', f'/api/matches/matches/{match_id}',
+               user_id=r.member(league), record=record)
+
+    def match_card(r, record):
+        _, match_id = r.completed_match()
+        r.call('match.card', 'GET', f'/api/matches/matches/{match_id}/card',
+               user_id=r.rng.choice(r.data['players'][match_id]), record=record)
+
+    def profile_stats(r, record):
+        r.call('profile.stats', 'GET', '/api/profile/stats',
+               user_id=r.rng.choice(r.data['users']), record=record)
+
+    def profile_history(r, record):
+        r.call('profile.history', 'GET', '/api/profile/history?limit=50',
+               user_id=r.rng.choice(r.data['users']), record=record)
+
+    return [
+        ('auth.login', auth_login),
+        ('auth.validate_token', auth_validate),
+        ('auth.profile', auth_profile),
+        ('league.list', league_list),
+        ('league.detail', league_detail),
+        ('league.detail_304', league_detail_conditional),
+        ('league.standings', league_standings),
+        ('league.analytics', league_analytics),
+        ('match.list', match_list),
+        ('match.detail', match_detail),
+        ('match.card', match_card),
+        ('profile.stats', profile_stats),
+        ('profile.history', profile_history),
+    ]
+
+
+def write_flow(r, record):
+    """Ciclo de vida completo de un partido, midiendo cada paso por separado."""
+    league = r.league()
+    players = r.rng.sample(league['members'], 4)
+    creator = players[0]
+    date = (datetime.utcnow() + timedelta(days=r.rng.randint(1, 30))).isoformat()
+    response = r.call('match.create', 'POST', f"/api/matches/leagues/{league['id']}/matches",
+                      user_id=creator, record=record, json={'date': date})
+    match_id = response.get_json()['data']['id']
+    for j, uid in enumerate(players):
+        r.call('match.join', 'POST', f'/api/matches/matches/{match_id}/join',
+               user_id=uid, record=record, json={'team': 1 + j // 2})
+    r.call('match.assign_cards', 'POST', f'/api/matches/matches/{match_id}/assign-cards',
+           user_id=creator, record=record)
+    r.call('result.submit', 'POST', f'/api/results/matches/{match_id}/result',
+           user_id=creator, record=record, json={'winner_team': r.rng.choice((1, 2))})
+    for uid in players:
+        r.call('result.ratings', 'POST', f'/api/results/matches/{match_id}/ratings',
+               user_id=uid, record=record, json={'ratings': [
+                   {'rated_id': other, 'rating': r.rng.randint(1, 10)}
+                   for other in players if other != uid
+               ]})
+    league['completed'].append(match_id)
+    r.data['players'][match_id] = players
+
+
+def summarize(samples):
+    results = {}
+    for name, sample in sorted(samples.items()):
+        latencies, queries = sample['latencies'], sample['queries']
+        total = sum(latencies)
+        results[name] = {
+            'requests': len(latencies),
+            'errors': sample['errors'],
+            'rps': round(len(latencies) / total, 1) if total else None,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'queries_avg': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+        }
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results, baseline=None):
+    header = f"{'escenario':22} {'n':>6} {'err':>4} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'q/req':>6}"
+    print(header)
+    print('-' * len(header))
+    for name, res in results.items():
+        line = (f"{name:22} {res['requests']:6} {res['errors']:4} {res['rps'] or 0:8.1f} "
+                f"{res['p50_ms']:8.2f} {res['p95_ms']:8.2f} {res['p99_ms']:8.2f} {res['queries_avg']:6.1f}")
+        base = (baseline or {}).get(name)
+        if base and base.get('p50_ms'):
+            change = (res['p50_ms'] - base['p50_ms']) / base['p50_ms'] * 100
+            line += f"   p50 {change:+.0f}%  q/req {res['queries_avg'] - base['queries_avg']:+.1f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_seed_arguments(parser)
+    parser.add_argument('--iterations', type=int, default=200, help='Peticiones por escenario de lectura')
+    parser.add_argument('--write-flows', type=int, default=50, help='Ciclos de escritura completos')
+    parser.add_argument('--warmup', type=int, default=10, help='Iteraciones sin medir (cachés en frío)')
+    parser.add_argument('--only', default=None, help='Prefijos de escenario separados por comas (p. ej. league,match)')
+    parser.add_argument('--output', default=None, help='Fichero JSON de resultados')
+    parser.add_argument('--baseline', default=None, help='JSON de una ejecución anterior para comparar')
+    args = parser.parse_args()
+
+    app = prepare_app()
+    with app.app_context():
+        start = time.perf_counter()
+        data = seed(**seed_kwargs(args))
+        seed_seconds = time.perf_counter() - start
+        dialect = app.extensions['sqlalchemy'].engines[None].dialect.name
+    print(f"Sembrado en {seed_seconds:.1f}s: " + ', '.join(f'{v} {k}' for k, v in data['counts'].items()))
+
+    prefixes = tuple(args.only.split(',')) if args.only else None
+    scenarios = [(n, fn) for n, fn in read_scenarios() if not prefixes or n.startswith(prefixes)]
+    run_writes = not prefixes or any(p in ('match', 'result') for p in prefixes)
+
+    runner = Runner(app, data, random.Random(args.seed))
+    wall_start = time.perf_counter()
+    for _, fn in scenarios:
+        for i in range(args.warmup + args.iterations):
+            fn(runner, record=i >= args.warmup)
+    if run_writes:
+        for i in range(args.warmup + args.write_flows):
+            write_flow(runner, record=i >= args.warmup)
+    wall = time.perf_counter() - wall_start
+
+    results = summarize(runner.samples)
+    total_requests = sum(r['requests'] for r in results.values())
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'dialect': dialect,
+            'args': vars(args),
+            'dataset': data['counts'],
+            'seed_seconds': round(seed_seconds, 2),
+        },
+        'totals': {
+            'requests': total_requests,
+            'errors': sum(r['errors'] for r in results.values()),
+            'wall_seconds': round(wall, 2),
+        },
+        'scenarios': results,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('scenarios')
+    print_table(results, baseline)
+    print(f"\n{total_requests} peticiones en {wall:.1f}s, {report['totals']['errors']} errores "
+          f"(commit {report['meta']['commit']}, {dialect})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
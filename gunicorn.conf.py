@@ -0,0 +1,33 @@
+"""
+Configuración de gunicorn leída del entorno.
+
+    GUNICORN_WORKER_CLASS  sync (por defecto), gthread o uvicorn
+    WEB_CONCURRENCY        número de procesos worker (2)
+    GUNICORN_THREADS       hilos por worker en modo gthread (8)
+    GUNICORN_TIMEOUT       segundos antes de reiniciar un worker bloqueado (30)
+
+En modo uvicorn la aplicación debe ser src.asgi:app en lugar de src.main:app.
+Los streams SSE de partido solo se sirven con gthread o uvicorn (ver
+src/services/events.py).
+Al arrancar el master se vacía METRICS_DIR (ver src/utils/metrics.py).
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+
+_worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+if _worker_class == 'uvicorn':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+elif _worker_class == 'gthread':
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', 8))
+else:
+    worker_class = 'sync'
+
+
+def on_starting(server):
+    # Métricas de una ejecución anterior: /metrics suma los ficheros de METRICS_DIR
+    from src.utils.metrics import clear_metrics_dir
+    clear_metrics_dir()
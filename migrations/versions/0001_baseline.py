@@ -0,0 +1,153 @@
+"""Esquema base (tablas existentes antes de usar migraciones)
+
+Revision ID: 0001_baseline
+Revises: 
+Create Date: 2026-10-18 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    # Las BBDD creadas con db.create_all() ya tienen parte de las tablas
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('users'):
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=80), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+        sa.UniqueConstraint('username')
+        )
+
+    if not _has_table('cards'):
+        op.create_table('cards',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+        )
+
+    if not _has_table('leagues'):
+        op.create_table('leagues',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('invite_code', sa.String(length=50), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['created_by_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('invite_code')
+        )
+
+    if not _has_table('league_memberships'):
+        op.create_table('league_memberships',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('league_id', sa.Integer(), nullable=False),
+        sa.Column('joined_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['league_id'], ['leagues.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _has_table('matches'):
+        op.create_table('matches',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('league_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('winner_team', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['created_by_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['league_id'], ['leagues.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _has_table('match_participations'):
+        op.create_table('match_participations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('match_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('team', sa.Integer(), nullable=False),
+        sa.Column('joined_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['match_id'], ['matches.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('match_id', 'user_id', name='unique_participation')
+        )
+
+    if not _has_table('card_assignments'):
+        op.create_table('card_assignments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('match_id', sa.Integer(), nullable=False),
+        sa.Column('participation_id', sa.Integer(), nullable=False),
+        sa.Column('card_id', sa.Integer(), nullable=False),
+        sa.Column('assigned_at', sa.DateTime(), nullable=True),
+        sa.Column('used', sa.Boolean(), nullable=True),
+        sa.Column('used_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['card_id'], ['cards.id'], ),
+        sa.ForeignKeyConstraint(['match_id'], ['matches.id'], ),
+        sa.ForeignKeyConstraint(['participation_id'], ['match_participations.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('match_id', 'participation_id', name='unique_card_assignment')
+        )
+
+    if not _has_table('player_ratings'):
+        op.create_table('player_ratings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('match_id', sa.Integer(), nullable=False),
+        sa.Column('rater_id', sa.Integer(), nullable=False),
+        sa.Column('rated_id', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('comment', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['match_id'], ['matches.id'], ),
+        sa.ForeignKeyConstraint(['rated_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['rater_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('match_id', 'rater_id', 'rated_id', name='unique_player_rating')
+        )
+
+    if not _has_table('match_photos'):
+        op.create_table('match_photos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('match_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('file_path', sa.String(length=255), nullable=False),
+        sa.Column('uploaded_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['match_id'], ['matches.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('match_photos')
+    op.drop_table('player_ratings')
+    op.drop_table('card_assignments')
+    op.drop_table('match_participations')
+    op.drop_table('matches')
+    op.drop_table('league_memberships')
+    op.drop_table('leagues')
+    op.drop_table('cards')
+    op.drop_table('users')
@@ -0,0 +1,106 @@
+"""Estadísticas desnormalizadas, versiones de liga y ranking Elo
+
+Revision ID: 0002_stats_versions_skills
+Revises: 0001_baseline
+Create Date: 2026-10-18 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_stats_versions_skills'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    # Las BBDD creadas con db.create_all() ya tienen parte de las tablas
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('user_stats'):
+        op.create_table('user_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_matches', sa.Integer(), nullable=False),
+        sa.Column('individual_wins', sa.Integer(), nullable=False),
+        sa.Column('rating_sum', sa.Integer(), nullable=False),
+        sa.Column('rating_count', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+        )
+
+    if not _has_table('user_partner_stats'):
+        op.create_table('user_partner_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('partner_id', sa.Integer(), nullable=False),
+        sa.Column('wins', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['partner_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'partner_id')
+        )
+
+    if not _has_table('user_card_stats'):
+        op.create_table('user_card_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('card_id', sa.Integer(), nullable=False),
+        sa.Column('uses', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['card_id'], ['cards.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'card_id')
+        )
+
+    if not _has_table('league_versions'):
+        op.create_table('league_versions',
+        sa.Column('league_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['league_id'], ['leagues.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('league_id')
+        )
+
+    if not _has_table('player_skills'):
+        op.create_table('player_skills',
+        sa.Column('league_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Float(), nullable=False),
+        sa.Column('matches_played', sa.Integer(), nullable=False),
+        sa.Column('wins', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['league_id'], ['leagues.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('league_id', 'user_id')
+        )
+        with op.batch_alter_table('player_skills', schema=None) as batch_op:
+            batch_op.create_index('ix_player_skills_standings', ['league_id', 'rating'], unique=False)
+
+    if not _has_table('skill_history'):
+        op.create_table('skill_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('match_id', sa.Integer(), nullable=False),
+        sa.Column('league_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('rating_before', sa.Float(), nullable=False),
+        sa.Column('rating_after', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['league_id'], ['leagues.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['match_id'], ['matches.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('skill_history', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_skill_history_match_id'), ['match_id'], unique=False)
+            batch_op.create_index('ix_skill_history_player', ['league_id', 'user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_table('skill_history')
+    op.drop_table('player_skills')
+    op.drop_table('league_versions')
+    op.drop_table('user_card_stats')
+    op.drop_table('user_partner_stats')
+    op.drop_table('user_stats')
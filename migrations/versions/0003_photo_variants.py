@@ -0,0 +1,35 @@
+"""Variantes de foto: estado, miniatura, versión web y dimensiones
+
+Revision ID: 0003_photo_variants
+Revises: 0002_stats_versions_skills
+Create Date: 2026-10-18 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_photo_variants'
+down_revision = '0002_stats_versions_skills'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Las fotos existentes quedan 'pending': `flask process-photos` genera sus variantes
+    with op.batch_alter_table('match_photos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'))
+        batch_op.add_column(sa.Column('thumb_path', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('web_path', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('width', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('height', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('match_photos', schema=None) as batch_op:
+        batch_op.drop_column('height')
+        batch_op.drop_column('width')
+        batch_op.drop_column('web_path')
+        batch_op.drop_column('thumb_path')
+        batch_op.drop_column('status')
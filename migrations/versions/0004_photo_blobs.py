@@ -0,0 +1,44 @@
+"""Almacén de fotos por contenido: photo_blobs y match_photos.blob_hash
+
+Revision ID: 0004_photo_blobs
+Revises: 0003_photo_variants
+Create Date: 2026-10-18 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_photo_blobs'
+down_revision = '0003_photo_variants'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'photo_blobs',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('ext', sa.String(length=10), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=True),
+        sa.Column('height', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('hash')
+    )
+    # Las fotos existentes conservan su ruta antigua (blob_hash nulo)
+    with op.batch_alter_table('match_photos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_match_photos_blob_hash'), ['blob_hash'], unique=False)
+        batch_op.create_foreign_key('fk_match_photos_blob_hash', 'photo_blobs', ['blob_hash'], ['hash'])
+
+
+def downgrade():
+    with op.batch_alter_table('match_photos', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_match_photos_blob_hash', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_match_photos_blob_hash'))
+        batch_op.drop_column('blob_hash')
+    op.drop_table('photo_blobs')
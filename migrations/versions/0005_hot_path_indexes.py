@@ -0,0 +1,68 @@
+"""Índices de las columnas de búsqueda habituales y membresía única
+
+Revision ID: 0005_hot_path_indexes
+Revises: 0004_photo_blobs
+Create Date: 2026-10-18 00:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_hot_path_indexes'
+down_revision = '0004_photo_blobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Membresías duplicadas (posibles hasta ahora): se conserva la más antigua.
+    # La subconsulta va envuelta en una tabla derivada porque MySQL no permite
+    # leer en un DELETE la misma tabla que se borra.
+    op.execute(
+        'DELETE FROM league_memberships WHERE id NOT IN ('
+        ' SELECT keep_id FROM ('
+        '  SELECT MIN(id) AS keep_id FROM league_memberships GROUP BY league_id, user_id'
+        ' ) AS keep)'
+    )
+    with op.batch_alter_table('league_memberships', schema=None) as batch_op:
+        batch_op.create_unique_constraint('unique_league_membership', ['league_id', 'user_id'])
+        batch_op.create_index('ix_league_memberships_user', ['user_id'], unique=False)
+
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.create_index('ix_matches_league_date', ['league_id', 'date', 'id'], unique=False)
+
+    with op.batch_alter_table('match_participations', schema=None) as batch_op:
+        batch_op.create_index('ix_match_participations_user', ['user_id', 'match_id'], unique=False)
+
+    with op.batch_alter_table('card_assignments', schema=None) as batch_op:
+        batch_op.create_index('ix_card_assignments_participation', ['participation_id'], unique=False)
+
+    with op.batch_alter_table('player_ratings', schema=None) as batch_op:
+        batch_op.create_index('ix_player_ratings_rated', ['rated_id'], unique=False)
+        batch_op.create_index('ix_player_ratings_rater', ['rater_id'], unique=False)
+
+    with op.batch_alter_table('match_photos', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_match_photos_match_id'), ['match_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('match_photos', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_match_photos_match_id'))
+
+    with op.batch_alter_table('player_ratings', schema=None) as batch_op:
+        batch_op.drop_index('ix_player_ratings_rater')
+        batch_op.drop_index('ix_player_ratings_rated')
+
+    with op.batch_alter_table('card_assignments', schema=None) as batch_op:
+        batch_op.drop_index('ix_card_assignments_participation')
+
+    with op.batch_alter_table('match_participations', schema=None) as batch_op:
+        batch_op.drop_index('ix_match_participations_user')
+
+    with op.batch_alter_table('matches', schema=None) as batch_op:
+        batch_op.drop_index('ix_matches_league_date')
+
+    with op.batch_alter_table('league_memberships', schema=None) as batch_op:
+        batch_op.drop_index('ix_league_memberships_user')
+        batch_op.drop_constraint('unique_league_membership', type_='unique')
@@ -0,0 +1,39 @@
+"""Eventos de partido para los streams SSE
+
+Revision ID: 0007_match_events
+Revises: 0006_revoked_tokens
+Create Date: 2026-10-18 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_match_events'
+down_revision = '0006_revoked_tokens'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'match_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('match_id', sa.Integer(), nullable=False),
+        sa.Column('league_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(length=30), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('match_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_match_events_created_at'), ['created_at'], unique=False)
+        batch_op.create_index('ix_match_events_match', ['match_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('match_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_match_events_match')
+        batch_op.drop_index(batch_op.f('ix_match_events_created_at'))
+    op.drop_table('match_events')
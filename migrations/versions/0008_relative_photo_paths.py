@@ -0,0 +1,54 @@
+"""Rutas de foto relativas a UPLOAD_FOLDER
+
+Revision ID: 0008_relative_photo_paths
+Revises: 0007_match_events
+Create Date: 2026-10-18 00:00:00
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.utils.uploads import stored_path, upload_path
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_relative_photo_paths'
+down_revision = '0007_match_events'
+branch_labels = None
+depends_on = None
+
+photos = sa.table(
+    'match_photos',
+    sa.column('id', sa.Integer),
+    sa.column('file_path', sa.String),
+    sa.column('thumb_path', sa.String),
+    sa.column('web_path', sa.String),
+)
+PATHS = ('file_path', 'thumb_path', 'web_path')
+
+
+def _rewrite(convert):
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(photos.c.id, *(photos.c[name] for name in PATHS))).fetchall()
+    for row in rows:
+        values = {name: convert(path) for name, path in zip(PATHS, row[1:]) if path}
+        values = {name: path for name, path in values.items() if path != getattr(row, name)}
+        if values:
+            connection.execute(photos.update().where(photos.c.id == row.id).values(**values))
+
+
+def _relative(path):
+    # Absolutas (almacén por contenido) o relativas al directorio de trabajo
+    # (subidas antiguas, 'static/uploads/...'); lo que quede fuera no se toca
+    relative = stored_path(path)
+    return path if relative.startswith('..') else relative
+
+
+def upgrade():
+    _rewrite(_relative)
+
+
+def downgrade():
+    _rewrite(lambda path: path if os.path.isabs(path) else upload_path(path))
@@ -0,0 +1,35 @@
+"""Copia limpia _full de las fotos del almacén por contenido
+
+Revision ID: 0009_photo_full_variant
+Revises: 0008_relative_photo_paths
+Create Date: 2026-10-18 00:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_photo_full_variant'
+down_revision = '0008_relative_photo_paths'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Los blobs ya procesados no tienen copia _full: vuelven a pendientes y
+    # `flask process-photos` la genera junto con las demás variantes
+    op.execute("UPDATE photo_blobs SET status = 'pending' WHERE status = 'ready'")
+    op.execute(
+        "UPDATE match_photos SET status = 'pending', thumb_path = NULL, web_path = NULL"
+        " WHERE blob_hash IS NOT NULL AND status = 'ready'"
+    )
+
+
+def downgrade():
+    # Las variantes siguen en disco: basta con volver a darlas por listas
+    op.execute("UPDATE photo_blobs SET status = 'ready' WHERE status = 'pending' AND width IS NOT NULL")
+    op.execute(
+        "UPDATE match_photos SET status = 'ready'"
+        " WHERE blob_hash IS NOT NULL AND status = 'pending'"
+        " AND blob_hash IN (SELECT hash FROM photo_blobs WHERE status = 'ready')"
+    )
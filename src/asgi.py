@@ -0,0 +1,45 @@
+"""
+Modo de servicio ASGI para lecturas con mucha concurrencia.
+
+Envuelve la app Flask (WSGI) para servirla con uvicorn: el bucle de eventos
+acepta y mantiene muchas conexiones por proceso y cada petición se ejecuta en
+un pool de hilos acotado, de modo que un round trip lento a MySQL bloquea un
+hilo y no el worker entero.
+
+    uvicorn src.asgi:app --host 0.0.0.0 --port $PORT --workers 2
+    # o bajo gunicorn:
+    GUNICORN_WORKER_CLASS=uvicorn gunicorn -c gunicorn.conf.py src.asgi:app
+
+ASGI_THREADS fija el número de peticiones en vuelo por proceso (32 por
+defecto). Conviene que DB_POOL_SIZE + DB_MAX_OVERFLOW sea al menos ese valor
+para que los hilos no esperen conexión.
+"""
+import os
+
+import anyio.to_thread
+from starlette.middleware.wsgi import WSGIMiddleware
+
+from src.main import app as flask_app
+
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 32))
+
+
+class FlaskASGI:
+    def __init__(self, wsgi_app, threads):
+        self.wsgi = WSGIMiddleware(wsgi_app)
+        self.threads = threads
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    anyio.to_thread.current_default_thread_limiter().total_tokens = self.threads
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        await self.wsgi(scope, receive, send)
+
+
+app = FlaskASGI(flask_app, ASGI_THREADS)
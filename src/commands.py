@@ -0,0 +1,129 @@
+"""
+Comandos de mantenimiento (`flask --app src.main <comando>`).
+"""
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask_migrate import upgrade
+
+from src.models import db
+from src.models.user import User
+from src.models.card import initialize_cards
+from src.models.skill import replay_ratings
+from src.models.stats import rebuild_user_stats, check_user_stats
+from src.services.photos import process_pending, collect_garbage, GC_GRACE_SECONDS
+from src.services.events import prune_events
+from src.services.tokens import prune_revoked
+
+
+@click.command('seed-cards')
+@with_appcontext
+def seed_cards_command():
+    """Siembra las cartas iniciales (idempotente)."""
+    changed = initialize_cards()
+    click.echo(f'{changed} cartas creadas o actualizadas')
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Aplica las migraciones pendientes y siembra las cartas. Una vez por despliegue."""
+    upgrade()
+    changed = initialize_cards()
+    click.echo(f'Esquema al día; {changed} cartas creadas o actualizadas')
+
+
+@click.command('rebuild-stats')
+@click.option('--check', is_flag=True, help='Solo comparar con los agregados vivos, sin reparar.')
+@click.option('--user-id', type=int, default=None, help='Limitar a un usuario.')
+@with_appcontext
+def rebuild_stats_command(check, user_id):
+    """Recalcula user_stats desde cero o detecta filas desviadas."""
+    if user_id is not None:
+        user_ids = [user_id]
+    else:
+        user_ids = [uid for (uid,) in db.session.query(User.id).order_by(User.id).all()]
+
+    drifted = 0
+    for uid in user_ids:
+        diff = check_user_stats(uid)
+        if diff is None:
+            continue
+        drifted += 1
+        live, stored = diff
+        click.echo(f'user {uid}: guardado={stored} vivo={live}')
+        if not check:
+            rebuild_user_stats(uid)
+            db.session.commit()
+
+    action = 'desviados' if check else 'reparados'
+    click.echo(f'{len(user_ids)} usuarios revisados, {drifted} {action}')
+    if check and drifted:
+        raise SystemExit(1)
+
+
+@click.command('replay-ratings')
+@click.option('--league-id', type=int, default=None, help='Limitar a una liga.')
+@with_appcontext
+def replay_ratings_command(league_id):
+    """Reconstruye el ranking Elo desde el historial de partidos."""
+    start = time.perf_counter()
+    processed = replay_ratings(league_id)
+    db.session.commit()
+    elapsed = time.perf_counter() - start
+    click.echo(f'{processed} partidos procesados en {elapsed:.2f}s')
+
+
+@click.command('process-photos')
+@with_appcontext
+def process_photos_command():
+    """Genera las variantes de las fotos pendientes (subidas antes o interrumpidas)."""
+    processed = process_pending(current_app._get_current_object())
+    click.echo(f'{processed} fotos procesadas')
+
+
+@click.command('gc-photos')
+@click.option('--dry-run', is_flag=True, help='Solo informar, sin borrar nada.')
+@click.option('--grace', type=int, default=GC_GRACE_SECONDS, show_default=True,
+              help='No tocar ficheros más recientes que estos segundos.')
+@with_appcontext
+def gc_photos_command(dry_run, grace):
+    """Borra blobs y ficheros de fotos sin referencias (tras borrar partidos o ligas)."""
+    result = collect_garbage(grace_seconds=grace, dry_run=dry_run)
+    prefix = '[dry-run] ' if dry_run else ''
+    click.echo(
+        f"{prefix}{result['refcounts_fixed']} contadores corregidos, "
+        f"{result['blobs_removed']} blobs y {result['files_removed']} ficheros eliminados "
+        f"({result['bytes_freed'] / 1024 / 1024:.1f} MB)"
+    )
+
+
+@click.command('prune-tokens')
+@with_appcontext
+def prune_tokens_command():
+    """Borra de revoked_tokens las revocaciones de tokens ya caducados."""
+    deleted = prune_revoked()
+    click.echo(f'{deleted} revocaciones caducadas eliminadas')
+
+
+@click.command('prune-events')
+@click.option('--hours', type=int, default=24, show_default=True,
+              help='Conservar los eventos más recientes que estas horas.')
+@with_appcontext
+def prune_events_command(hours):
+    """Borra los eventos de partido antiguos (solo sirven para reconectar streams)."""
+    deleted = prune_events(hours)
+    click.echo(f'{deleted} eventos eliminados')
+
+
+def register_commands(app):
+    app.cli.add_command(seed_cards_command)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(rebuild_stats_command)
+    app.cli.add_command(replay_ratings_command)
+    app.cli.add_command(process_photos_command)
+    app.cli.add_command(gc_photos_command)
+    app.cli.add_command(prune_tokens_command)
+    app.cli.add_command(prune_events_command)
@@ -1,44 +1,57 @@
 import os
 import sys
+import time
+
+_boot_start = time.perf_counter()
 
 # Permitir imports desde src/
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, render_template, request, redirect
+from flask import Flask, request, redirect
 from flask_cors import CORS
+from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from src.models import db
-from src.models.card import initialize_cards
-from src.routes.auth import auth_bp
+from src.commands import register_commands
+from src.routes.auth import auth_bp, AuthGlobals
 from src.routes.league import league_bp
 from src.routes.match import match_bp
 from src.routes.result import result_bp
 from src.routes.profile import profile_bp
+from src.routes.admin import admin_bp
+from src.routes.metrics import metrics_bp
+from src.utils.assets import AssetManifest
+from src.utils.db_config import database_uri, engine_options
+from src.utils.instrumentation import init_instrumentation
+from src.utils.metrics import init_metrics
 
 # Crear la aplicación
+STATIC_FOLDER = os.path.join(os.path.dirname(__file__), 'static')
+
+# Sin ruta estática de Flask: la SPA se sirve desde el manifiesto en memoria (serve)
 app = Flask(
     __name__,
-    static_folder=os.path.join(os.path.dirname(__file__), 'static'),
-    static_url_path='',
+    static_folder=None,
     template_folder=os.path.join(os.path.dirname(__file__), 'templates')
 )
 CORS(app)
+app.app_ctx_globals_class = AuthGlobals
 
 # Configuración básica
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'changeme')
+# Límite de subida: werkzeug corta con 413 antes de leer el cuerpo entero
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', 10)) * 1024 * 1024 + 64 * 1024
 
-DB_USER     = os.getenv('DB_USER', 'root')
-DB_PASSWORD = os.getenv('DB_PASSWORD', 'password')
-DB_HOST     = os.getenv('DB_HOST', 'localhost')
-DB_PORT     = os.getenv('DB_PORT', '3306')
-DB_NAME     = os.getenv('DB_NAME', 'mydb')
-
-app.config['SQLALCHEMY_DATABASE_URI'] = (
-    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@"
-    f"{DB_HOST}:{DB_PORT}/{DB_NAME}"
-)
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Detrás del proxy de Render: remote_addr es la IP del cliente (la que el
+# proxy añade al final de X-Forwarded-For), no la del proxy
+if os.getenv('RENDER', '').lower() == 'true':
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+
 # Forzar HTTPS en producción
 @app.before_request
 def force_https():
@@ -47,11 +60,17 @@ def force_https():
         url = request.url.replace('http://', 'https://', 1)
         return redirect(url, code=301)
 
-# Inicializar base de datos y cartas
+# Inicializar base de datos. El esquema y las cartas NO se crean aquí: se
+# aplican una sola vez por despliegue con `flask --app src.main init-db`.
 db.init_app(app)
-with app.app_context():
-    db.create_all()
-    initialize_cards()
+# Consultas y tiempo de BBDD por petición: Server-Timing y log estructurado
+init_instrumentation(app, db)
+# Contadores e histogramas por ruta para /metrics (agregados entre workers)
+init_metrics(app, db)
+Migrate(app, db, directory=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations'))
+
+# Comandos de mantenimiento
+register_commands(app)
 
 # Registrar blueprints
 app.register_blueprint(auth_bp,    url_prefix='/api/auth')
@@ -59,15 +78,25 @@ app.register_blueprint(league_bp,  url_prefix='/api/leagues')
 app.register_blueprint(match_bp,   url_prefix='/api/matches')
 app.register_blueprint(result_bp,  url_prefix='/api/results')
 app.register_blueprint(profile_bp, url_prefix='/api/profile')
+app.register_blueprint(admin_bp,   url_prefix='/api/admin')
+app.register_blueprint(metrics_bp)
+
+# Servir la SPA y sus assets: manifiesto con huellas y variantes gzip/br en memoria
+assets = AssetManifest(
+    STATIC_FOLDER,
+    render_index=lambda: app.jinja_env.get_template('index.html').render(),
+    auto_reload=os.getenv('STATIC_AUTO_RELOAD', '').lower() == 'true'
+                or os.getenv('FLASK_ENV', '').lower() == 'development'
+)
 
-# Servir la SPA y sus assets
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    full_path = os.path.join(app.static_folder, path)
-    if path and os.path.exists(full_path):
-        return send_from_directory(app.static_folder, path)
-    return render_template('index.html')
+    return assets.response(path)
+
+# Tiempo de arranque del worker (import de la app hasta aquí)
+app.config['BOOT_SECONDS'] = time.perf_counter() - _boot_start
+app.logger.info('Worker %s listo en %.0f ms', os.getpid(), app.config['BOOT_SECONDS'] * 1000)
 
 if __name__ == '__main__':
     port  = int(os.getenv('PORT', 5000))
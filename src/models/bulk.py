@@ -0,0 +1,54 @@
+"""
+Inserciones masivas dependientes del dialecto.
+
+Producción usa MySQL; SQLite se soporta para entornos locales y benchmarks.
+"""
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from src.models import db
+
+
+def _dialect_insert(table):
+    name = db.session.get_bind().dialect.name
+    if name == 'mysql':
+        return name, mysql.insert(table)
+    if name == 'sqlite':
+        return name, sqlite.insert(table)
+    return name, postgresql.insert(table)
+
+
+def insert_ignore(model, rows):
+    """
+    INSERT multi-fila en una sola sentencia, ignorando las filas que violen
+    una restricción única. Devuelve el número de filas insertadas.
+    """
+    if not rows:
+        return 0
+    name, stmt = _dialect_insert(model.__table__)
+    if name == 'mysql':
+        stmt = stmt.prefix_with('IGNORE')
+    else:
+        stmt = stmt.on_conflict_do_nothing()
+    return db.session.execute(stmt.values(rows)).rowcount
+
+
+def upsert_add(model, rows, keys, counters):
+    """
+    INSERT multi-fila que, si la clave ya existe, suma los valores de
+    `counters` a los existentes (INSERT ... ON DUPLICATE KEY UPDATE c = c + v).
+    """
+    if not rows:
+        return
+    table = model.__table__
+    name, stmt = _dialect_insert(table)
+    stmt = stmt.values(rows)
+    if name == 'mysql':
+        stmt = stmt.on_duplicate_key_update(
+            {c: table.c[c] + stmt.inserted[c] for c in counters}
+        )
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={c: table.c[c] + stmt.excluded[c] for c in counters}
+        )
+    db.session.execute(stmt)
@@ -1,4 +1,10 @@
+import os
+import threading
+import time
+
 from src.models import db
+from src.utils.cache import CACHES
+
 
 class Card(db.Model):
     __tablename__ = 'cards'
@@ -21,28 +27,101 @@ class Card(db.Model):
             'is_active': self.is_active
         }
 
-# Cartas iniciales disponibles
-INITIAL_CARDS = [
-    'Gano punto gano juego',
-    'Restan cambiados de lado',
-    'Robo carta',
-    'Anulo doble falta',
-    'Robo saque',
-    'Repetimos el punto',
-    'Bloqueo de carta rival'
-]
 
-def initialize_cards():
+class CardCatalog:
     """
-    Inserta en la BBDD las cartas definidas en INITIAL_CARDS
-    si no existen aún. Se deja description vacío y is_active=True.
+    Catálogo de cartas en memoria de proceso.
+
+    Se recarga cuando caduca (CARD_CATALOG_TTL), cuando se pide una carta que
+    no conoce o tras sembrar cartas; `version` solo cambia si el contenido
+    cambió. Las lecturas de carta no tocan la tabla `cards`.
     """
-    from src.models.card import Card
 
-    existing = {c.name for c in Card.query.all()}
-    for card_name in INITIAL_CARDS:
-        if card_name not in existing:
+    def __init__(self, ttl=600):
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._cards = {}
+        self._expires = 0
+        self._lock = threading.Lock()
+        CACHES['card_catalog'] = self
+
+    def _reload(self):
+        cards = {c.id: c.to_dict() for c in Card.query.all()}
+        with self._lock:
+            if cards != self._cards:
+                self._cards = cards
+                self.version += 1
+            self._expires = time.monotonic() + self.ttl
+
+    def _ensure(self):
+        if time.monotonic() >= self._expires:
+            self.misses += 1
+            self._reload()
+        else:
+            self.hits += 1
+
+    def get(self, card_id):
+        """Carta por id (to_dict), activa o no."""
+        self._ensure()
+        card = self._cards.get(card_id)
+        if card is None:
+            self._reload()
+            card = self._cards.get(card_id)
+        return card
+
+    def active(self):
+        """Cartas activas (to_dict)."""
+        self._ensure()
+        return [c for c in self._cards.values() if c['is_active']]
+
+    def invalidate(self):
+        self._expires = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._cards),
+            'version': self.version,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else None
+        }
+
+
+card_catalog = CardCatalog(ttl=int(os.getenv('CARD_CATALOG_TTL', 600)))
+
+# Cartas iniciales disponibles: nombre -> descripción
+INITIAL_CARDS = {
+    'Gano punto gano juego': 'Convierte un punto ganado en un juego completo',
+    'Restan cambiados de lado': 'Los jugadores del equipo contrario deben jugar cambiados de lado',
+    'Robo carta': 'Permite robar la carta de un jugador del equipo contrario',
+    'Anulo doble falta': 'Anula una doble falta del equipo propio',
+    'Robo saque': 'Permite robar el saque al equipo contrario',
+    'Repetimos el punto': 'Permite repetir el último punto jugado',
+    'Bloqueo de carta rival': 'Bloquea el uso de una carta del equipo contrario'
+}
+
+def initialize_cards():
+    """
+    Inserta en la BBDD las cartas definidas en INITIAL_CARDS si no existen
+    aún y completa la descripción de las que se crearon sin ella.
+    Devuelve el número de cartas creadas o actualizadas.
+    """
+    existing = {c.name: c for c in Card.query.all()}
+    changed = 0
+    for card_name, description in INITIAL_CARDS.items():
+        card = existing.get(card_name)
+        if card is None:
             db.session.add(
-                Card(name=card_name, description='', is_active=True)
+                Card(name=card_name, description=description, is_active=True)
             )
+            changed += 1
+        elif not card.description:
+            card.description = description
+            changed += 1
     db.session.commit()
+    card_catalog.invalidate()
+    return changed
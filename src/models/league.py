@@ -1,6 +1,7 @@
 from datetime import datetime
 import uuid
 from src.models import db
+from src.models.bulk import upsert_add
 from src.models.user import User
 
 class League(db.Model):
@@ -50,3 +51,36 @@ class LeagueMembership(db.Model):
     # Relaciones
     user = db.relationship('User', back_populates='league_memberships')
     league = db.relationship('League', back_populates='memberships')
+
+    __table_args__ = (
+        # Una fila por usuario y liga; también sirve las búsquedas por liga
+        db.UniqueConstraint('league_id', 'user_id', name='unique_league_membership'),
+        db.Index('ix_league_memberships_user', 'user_id'),
+    )
+
+
+class LeagueVersion(db.Model):
+    """
+    Contador de cambios por liga. Toda ruta que modifica la liga, sus miembros
+    o sus partidos lo incrementa; sirve de ETag barato para las lecturas.
+    """
+    __tablename__ = 'league_versions'
+
+    league_id = db.Column(db.Integer, db.ForeignKey('leagues.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+
+def bump_league_version(league_id):
+    """Incrementa la versión de la liga en la transacción en curso."""
+    upsert_add(
+        LeagueVersion,
+        [{'league_id': league_id, 'version': 1}],
+        keys=['league_id'],
+        counters=['version']
+    )
+
+
+def get_league_version(league_id):
+    version = db.session.query(LeagueVersion.version)\
+        .filter(LeagueVersion.league_id == league_id).scalar()
+    return version or 0
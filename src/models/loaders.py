@@ -0,0 +1,53 @@
+"""
+Estrategias de carga por endpoint.
+
+Cada función devuelve el grafo completo que necesita su endpoint en un número
+fijo de consultas (una por relación, vía selectin), independiente del número
+de partidos, miembros o valoraciones.
+"""
+from sqlalchemy.orm import selectinload, joinedload, load_only
+
+from src.models.league import League, LeagueMembership
+from src.models.match import Match
+
+
+def match_detail_options():
+    """Opciones para serializar partidos con Match.to_dict()."""
+    return (
+        selectinload(Match.participations),
+        selectinload(Match.ratings),
+        selectinload(Match.photos),
+    )
+
+
+def load_league_detail(league_id):
+    """
+    Liga con miembros (GET /api/leagues/<id>). Los partidos solo se cargan con
+    su id para match_count; su detalle se serializa por proyección
+    (serializers.league_matches).
+    """
+    return League.query.options(
+        selectinload(League.memberships),
+        selectinload(League.matches).options(load_only(Match.id)),
+    ).filter_by(id=league_id).first()
+
+
+def load_user_leagues(user_id):
+    """
+    Ligas del usuario para el listado (GET /api/leagues/).
+
+    Los partidos solo se cargan con su id, lo justo para match_count.
+    """
+    memberships = LeagueMembership.query.options(
+        joinedload(LeagueMembership.league).options(
+            selectinload(League.memberships),
+            selectinload(League.matches).options(load_only(Match.id)),
+        )
+    ).filter_by(user_id=user_id).all()
+    return [lm.league for lm in memberships]
+
+
+def load_match_detail(match_id):
+    """Partido con participaciones, valoraciones y fotos (GET /api/matches/<id>)."""
+    return Match.query.options(*match_detail_options()).filter_by(id=match_id).first()
+
@@ -28,6 +28,11 @@ class Match(db.Model):
         'MatchPhoto', back_populates='match', cascade='all, delete-orphan'
     )
 
+    __table_args__ = (
+        # Listados por liga ordenados por (fecha, id): filtro y keyset en el índice
+        db.Index('ix_matches_league_date', 'league_id', 'date', 'id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -59,6 +64,8 @@ class MatchParticipation(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('match_id', 'user_id', name='unique_participation'),
+        # Historial y estadísticas del jugador
+        db.Index('ix_match_participations_user', 'user_id', 'match_id'),
     )
 
     def to_dict(self):
@@ -89,6 +96,7 @@ class CardAssignment(db.Model):
 
     __table_args__ = (
         db.UniqueConstraint('match_id', 'participation_id', name='unique_card_assignment'),
+        db.Index('ix_card_assignments_participation', 'participation_id'),
     )
 
     def to_dict(self):
@@ -101,3 +109,24 @@ class CardAssignment(db.Model):
             'assigned_at': self.assigned_at.isoformat(),
             'used_at': self.used_at.isoformat() if self.used_at else None
         }
+
+
+class MatchEvent(db.Model):
+    """
+    Cambios de un partido para los streams SSE (src/services/events.py). Se
+    insertan en la misma transacción que el cambio; el id es el de evento SSE.
+    Sin clave foránea: el evento de borrado sobrevive al partido.
+    """
+    __tablename__ = 'match_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    match_id = db.Column(db.Integer, nullable=False)
+    league_id = db.Column(db.Integer, nullable=False)
+    type = db.Column(db.String(30), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        # Reenvío desde Last-Event-ID
+        db.Index('ix_match_events_match', 'match_id', 'id'),
+    )
@@ -1,5 +1,7 @@
 from datetime import datetime
+from sqlalchemy import event
 from src.models import db
+from src.utils.uploads import public_url, photo_url
 
 class PlayerRating(db.Model):
     __tablename__ = 'player_ratings'
@@ -30,6 +32,9 @@ class PlayerRating(db.Model):
             'match_id', 'rater_id', 'rated_id',
             name='unique_player_rating'
         ),
+        # Valoraciones recibidas / dadas por jugador (estadísticas, perfil)
+        db.Index('ix_player_ratings_rated', 'rated_id'),
+        db.Index('ix_player_ratings_rater', 'rater_id'),
     )
 
     def to_dict(self):
@@ -44,14 +49,39 @@ class PlayerRating(db.Model):
         }
 
 
+class PhotoBlob(db.Model):
+    """
+    Fichero de foto direccionado por contenido: la clave es el SHA-256 de los
+    bytes subidos y varias MatchPhoto pueden compartirlo (ref_count).
+    """
+    __tablename__ = 'photo_blobs'
+
+    hash = db.Column(db.String(64), primary_key=True)
+    ext = db.Column(db.String(10), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, ready, failed
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 class MatchPhoto(db.Model):
     __tablename__ = 'match_photos'
 
     id = db.Column(db.Integer, primary_key=True)
-    match_id = db.Column(db.Integer, db.ForeignKey('matches.id'), nullable=False)
+    match_id = db.Column(db.Integer, db.ForeignKey('matches.id'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     file_path = db.Column(db.String(255), nullable=False)
+    # Null en fotos anteriores al almacén por contenido
+    blob_hash = db.Column(db.String(64), db.ForeignKey('photo_blobs.hash'), nullable=True, index=True)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Variantes generadas en segundo plano (src/services/photos.py)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, ready, failed
+    thumb_path = db.Column(db.String(255), nullable=True)
+    web_path = db.Column(db.String(255), nullable=True)
+    width = db.Column(db.Integer, nullable=True)
+    height = db.Column(db.Integer, nullable=True)
 
     # Relaciones
     match = db.relationship('Match', back_populates='photos')
@@ -63,5 +93,24 @@ class MatchPhoto(db.Model):
             'match_id': self.match_id,
             'user_id': self.user_id,
             'file_path': self.file_path,
-            'uploaded_at': self.uploaded_at.isoformat() if self.uploaded_at else None
+            'uploaded_at': self.uploaded_at.isoformat() if self.uploaded_at else None,
+            'status': self.status,
+            'url': photo_url(self.file_path, self.blob_hash, self.status),
+            'thumbnail_url': public_url(self.thumb_path),
+            'web_url': public_url(self.web_path),
+            'width': self.width,
+            'height': self.height
         }
+
+
+@event.listens_for(MatchPhoto, 'after_delete')
+def _release_blob(mapper, connection, target):
+    # Cubre delete_match/delete_league (cascada del ORM); el GC de fotos
+    # recalcula los contadores por si alguna baja no pasa por aquí.
+    if target.blob_hash:
+        blobs = PhotoBlob.__table__
+        connection.execute(
+            blobs.update()
+            .where(blobs.c.hash == target.blob_hash)
+            .values(ref_count=blobs.c.ref_count - 1)
+        )
@@ -0,0 +1,151 @@
+"""
+Serialización por proyección de columnas para los endpoints de lectura.
+
+Los listados grandes no necesitan objetos ORM: se consultan tuplas de
+columnas y se construye el JSON directamente, sin identity map ni carga de
+relaciones. La salida es idéntica a la de los to_dict() de los modelos
+(Match, MatchParticipation, PlayerRating, MatchPhoto); si cambia uno de
+ellos hay que cambiar aquí el constructor equivalente.
+tests/test_serializers.py comprueba la igualdad y `python
+bench/serializers.py` mide la diferencia.
+
+Coste fijo: partidos + participaciones + valoraciones + fotos.
+"""
+from src.models import db
+from src.models.match import Match, MatchParticipation
+from src.models.rating import PlayerRating, MatchPhoto
+from src.utils.uploads import public_url, photo_url
+
+MATCH_COLUMNS = (Match.id, Match.league_id, Match.date, Match.status, Match.winner_team)
+
+PARTICIPATION_COLUMNS = (
+    MatchParticipation.id, MatchParticipation.match_id, MatchParticipation.user_id,
+    MatchParticipation.team, MatchParticipation.joined_at
+)
+
+RATING_COLUMNS = (
+    PlayerRating.id, PlayerRating.match_id, PlayerRating.rater_id, PlayerRating.rated_id,
+    PlayerRating.rating, PlayerRating.comment, PlayerRating.created_at
+)
+
+PHOTO_COLUMNS = (
+    MatchPhoto.id, MatchPhoto.match_id, MatchPhoto.user_id, MatchPhoto.file_path,
+    MatchPhoto.uploaded_at, MatchPhoto.status, MatchPhoto.thumb_path, MatchPhoto.web_path,
+    MatchPhoto.width, MatchPhoto.height, MatchPhoto.blob_hash
+)
+
+
+def _participation(row):
+    id_, match_id, user_id, team, joined_at = row
+    return {
+        'id': id_,
+        'match_id': match_id,
+        'user_id': user_id,
+        'team': team,
+        'joined_at': joined_at.isoformat()
+    }
+
+
+def _rating(row):
+    id_, match_id, rater_id, rated_id, rating, comment, created_at = row
+    return {
+        'id': id_,
+        'match_id': match_id,
+        'rater_id': rater_id,
+        'rated_id': rated_id,
+        'rating': rating,
+        'comment': comment,
+        'created_at': created_at.isoformat() if created_at else None
+    }
+
+
+def _photo(row):
+    (id_, match_id, user_id, file_path, uploaded_at, status, thumb_path, web_path,
+     width, height, blob_hash) = row
+    return {
+        'id': id_,
+        'match_id': match_id,
+        'user_id': user_id,
+        'file_path': file_path,
+        'uploaded_at': uploaded_at.isoformat() if uploaded_at else None,
+        'status': status,
+        'url': photo_url(file_path, blob_hash, status),
+        'thumbnail_url': public_url(thumb_path),
+        'web_url': public_url(web_path),
+        'width': width,
+        'height': height
+    }
+
+
+def _children(columns, build, match_ids, league_id=None):
+    """
+    Hijos de los partidos dados agrupados por match_id, en orden de id. Con
+    league_id (todos los partidos de la liga) se filtran con un join por liga
+    en vez de una lista IN con todos los ids.
+    """
+    grouped = {match_id: [] for match_id in match_ids}
+    if not match_ids:
+        return grouped
+    id_col, match_col = columns[0], columns[1]
+    query = db.session.query(*columns)
+    if league_id is None:
+        query = query.filter(match_col.in_(match_ids))
+    else:
+        query = query.join(Match, Match.id == match_col).filter(Match.league_id == league_id)
+    for row in query.order_by(id_col):
+        children = grouped.get(row[1])
+        if children is not None:    # partido creado después de leer la lista
+            children.append(build(row))
+    return grouped
+
+
+def match_query():
+    """Consulta de columnas de Match, lista para filtrar/paginar y pasar a serialize_matches."""
+    return db.session.query(*MATCH_COLUMNS)
+
+
+def serialize_matches(rows, league_id=None):
+    """
+    Equivalente a [m.to_dict() for m in matches] para filas de match_query().
+    league_id solo si rows son todos los partidos de esa liga.
+    """
+    match_ids = [row[0] for row in rows]
+    participants = _children(PARTICIPATION_COLUMNS, _participation, match_ids, league_id)
+    ratings = _children(RATING_COLUMNS, _rating, match_ids, league_id)
+    photos = _children(PHOTO_COLUMNS, _photo, match_ids, league_id)
+    return [{
+        'id': id_,
+        'league_id': league_id,
+        'date': date.isoformat(),
+        'status': status,
+        'winner_team': winner_team,
+        'participants': participants[id_],
+        'ratings': ratings[id_],
+        'photos': photos[id_]
+    } for id_, league_id, date, status, winner_team in rows]
+
+
+def league_matches(league_id):
+    """Partidos de una liga serializados, en el orden de League.matches."""
+    rows = match_query().filter(Match.league_id == league_id).order_by(Match.id).all()
+    return serialize_matches(rows, league_id)
+
+
+def user_history_query(user_id):
+    """Historial del usuario: una fila de columnas por partido jugado."""
+    return db.session.query(
+        Match.id, Match.league_id, Match.date, MatchParticipation.team,
+        Match.winner_team, Match.status
+    ).join(MatchParticipation, MatchParticipation.match_id == Match.id)\
+        .filter(MatchParticipation.user_id == user_id)
+
+
+def serialize_history(rows):
+    return [{
+        'match_id': match_id,
+        'league_id': league_id,
+        'date': date.isoformat(),
+        'team': team,
+        'your_result': 'win' if winner_team == team else 'loss',
+        'status': status
+    } for match_id, league_id, date, team, winner_team, status in rows]
@@ -0,0 +1,196 @@
+"""
+Ranking de habilidad (Elo por equipos) por liga.
+
+`player_skills` es la clasificación precalculada (una fila por jugador y
+liga, indexada por liga y rating) y `skill_history` el rastro de cada cambio.
+submit_result aplica cada partido de forma incremental; replay_ratings
+reconstruye todo desde el log de partidos en orden cronológico.
+"""
+import os
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from src.models import db
+from src.models.match import Match, MatchParticipation
+from src.models.user import User
+
+DEFAULT_RATING = 1500.0
+K_FACTOR = float(os.getenv('ELO_K_FACTOR', 32))
+REPLAY_CHUNK = 5000
+
+
+class PlayerSkill(db.Model):
+    __tablename__ = 'player_skills'
+
+    league_id = db.Column(db.Integer, db.ForeignKey('leagues.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    rating = db.Column(db.Float, default=DEFAULT_RATING, nullable=False)
+    matches_played = db.Column(db.Integer, default=0, nullable=False)
+    wins = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_player_skills_standings', 'league_id', 'rating'),
+    )
+
+    def to_dict(self):
+        return {
+            'league_id': self.league_id,
+            'user_id': self.user_id,
+            'rating': round(self.rating, 1),
+            'matches_played': self.matches_played,
+            'wins': self.wins
+        }
+
+
+class SkillHistory(db.Model):
+    __tablename__ = 'skill_history'
+
+    id = db.Column(db.Integer, primary_key=True)
+    match_id = db.Column(db.Integer, db.ForeignKey('matches.id', ondelete='CASCADE'), nullable=False, index=True)
+    league_id = db.Column(db.Integer, db.ForeignKey('leagues.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    rating_before = db.Column(db.Float, nullable=False)
+    rating_after = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_skill_history_player', 'league_id', 'user_id'),
+    )
+
+
+def team_deltas(team1, team2, winner_team, k=K_FACTOR):
+    """
+    Variación de rating para cada equipo. El rating de equipo es la media
+    de sus jugadores y todos los miembros reciben la misma variación.
+    """
+    r1 = sum(team1) / len(team1)
+    r2 = sum(team2) / len(team2)
+    expected1 = 1.0 / (1.0 + 10 ** ((r2 - r1) / 400.0))
+    score1 = 1.0 if winner_team == 1 else 0.0
+    delta1 = k * (score1 - expected1)
+    return delta1, -delta1
+
+
+def apply_match_result(league_id, match_id, participations, winner_team):
+    """Actualiza la clasificación con un partido recién completado. No hace commit."""
+    players = [(p.user_id, p.team) for p in participations]
+    if not any(team == 1 for _, team in players) or not any(team == 2 for _, team in players):
+        return
+
+    user_ids = [uid for uid, _ in players]
+    skills = {
+        s.user_id: s for s in PlayerSkill.query.filter(
+            PlayerSkill.league_id == league_id, PlayerSkill.user_id.in_(user_ids)
+        ).all()
+    }
+    for uid in user_ids:
+        if uid not in skills:
+            skills[uid] = PlayerSkill(
+                league_id=league_id, user_id=uid,
+                rating=DEFAULT_RATING, matches_played=0, wins=0
+            )
+            db.session.add(skills[uid])
+
+    team1 = [skills[uid].rating for uid, team in players if team == 1]
+    team2 = [skills[uid].rating for uid, team in players if team == 2]
+    deltas = dict(zip((1, 2), team_deltas(team1, team2, winner_team)))
+
+    for uid, team in players:
+        skill = skills[uid]
+        before = skill.rating
+        skill.rating = before + deltas[team]
+        skill.matches_played += 1
+        skill.wins += int(team == winner_team)
+        db.session.add(SkillHistory(
+            match_id=match_id, league_id=league_id, user_id=uid,
+            rating_before=before, rating_after=skill.rating
+        ))
+
+
+def replay_ratings(league_id=None):
+    """
+    Reconstruye player_skills y skill_history desde los partidos completados,
+    en orden cronológico. Una sola consulta de lectura, cálculo en memoria y
+    escritura por lotes en la transacción en curso (no hace commit: el
+    llamador confirma junto con el cambio que lo provoca). Devuelve el número
+    de partidos procesados.
+    """
+    query = db.session.query(
+        Match.id, Match.league_id, Match.winner_team,
+        MatchParticipation.user_id, MatchParticipation.team
+    ).join(MatchParticipation, MatchParticipation.match_id == Match.id)\
+        .filter(Match.status == 'completed', Match.winner_team.in_((1, 2)))
+    if league_id is not None:
+        query = query.filter(Match.league_id == league_id)
+    rows = query.order_by(Match.date, Match.id).all()
+
+    ratings = {}    # (league_id, user_id) -> [rating, played, wins]
+    history = []
+    now = datetime.utcnow()
+    processed = 0
+
+    def flush_match(match_id, match_league, winner, players):
+        nonlocal processed
+        teams = {1: [], 2: []}
+        for uid, team in players:
+            state = ratings.setdefault((match_league, uid), [DEFAULT_RATING, 0, 0])
+            teams.setdefault(team, []).append(state[0])
+        if not teams[1] or not teams[2]:
+            return
+        deltas = dict(zip((1, 2), team_deltas(teams[1], teams[2], winner)))
+        for uid, team in players:
+            state = ratings[(match_league, uid)]
+            before = state[0]
+            state[0] = before + deltas[team]
+            state[1] += 1
+            state[2] += int(team == winner)
+            history.append({
+                'match_id': match_id, 'league_id': match_league, 'user_id': uid,
+                'rating_before': before, 'rating_after': state[0], 'created_at': now
+            })
+        processed += 1
+
+    current = None
+    players = []
+    for match_id, match_league, winner, uid, team in rows:
+        if current is not None and current[0] != match_id:
+            flush_match(*current, players)
+            players = []
+        current = (match_id, match_league, winner)
+        players.append((uid, team))
+    if current is not None:
+        flush_match(*current, players)
+
+    for model in (SkillHistory, PlayerSkill):
+        q = model.query
+        if league_id is not None:
+            q = q.filter(model.league_id == league_id)
+        q.delete(synchronize_session=False)
+
+    skill_rows = [
+        {'league_id': lg, 'user_id': uid, 'rating': r, 'matches_played': n,
+         'wins': w, 'updated_at': now}
+        for (lg, uid), (r, n, w) in ratings.items()
+    ]
+    for model, batch in ((PlayerSkill, skill_rows), (SkillHistory, history)):
+        for i in range(0, len(batch), REPLAY_CHUNK):
+            db.session.execute(insert(model), batch[i:i + REPLAY_CHUNK])
+    db.session.flush()
+    return processed
+
+
+def league_standings(league_id):
+    """Clasificación de la liga servida desde player_skills (índice liga+rating)."""
+    rows = db.session.query(PlayerSkill, User.username)\
+        .join(User, User.id == PlayerSkill.user_id)\
+        .filter(PlayerSkill.league_id == league_id)\
+        .order_by(PlayerSkill.rating.desc(), PlayerSkill.user_id).all()
+    standings = []
+    for position, (skill, username) in enumerate(rows, start=1):
+        data = skill.to_dict()
+        data['position'] = position
+        data['username'] = username
+        standings.append(data)
+    return standings
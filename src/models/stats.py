@@ -0,0 +1,324 @@
+"""
+Estadísticas de jugador.
+
+`compute_user_stats` las calcula con agregados SQL sobre las tablas vivas
+(número de consultas constante). `user_stats`, `user_partner_stats` y
+`user_card_stats` guardan esos mismos números desnormalizados y se mantienen
+de forma incremental, en la misma transacción, desde las rutas de escritura.
+"""
+from datetime import datetime
+
+from sqlalchemy import func, case, and_
+from sqlalchemy.orm import aliased
+
+from src.models import db
+from src.models.bulk import insert_ignore, upsert_add
+from src.models.match import Match, MatchParticipation, CardAssignment
+from src.models.card import Card
+from src.models.rating import PlayerRating
+
+
+class UserStats(db.Model):
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total_matches = db.Column(db.Integer, default=0, nullable=False)
+    individual_wins = db.Column(db.Integer, default=0, nullable=False)
+    rating_sum = db.Column(db.Integer, default=0, nullable=False)
+    rating_count = db.Column(db.Integer, default=0, nullable=False)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class UserPartnerStats(db.Model):
+    __tablename__ = 'user_partner_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    partner_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    wins = db.Column(db.Integer, default=0, nullable=False)
+
+
+class UserCardStats(db.Model):
+    __tablename__ = 'user_card_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    card_id = db.Column(db.Integer, db.ForeignKey('cards.id'), primary_key=True)
+    uses = db.Column(db.Integer, default=0, nullable=False)
+
+
+# Agregados sobre las tablas vivas
+# --------------------------------
+
+def _live_counts(user_id):
+    """Contadores en bruto de un usuario, calculados desde las tablas vivas."""
+    # Partidos jugados y victorias individuales
+    total_matches, individual_wins = db.session.query(
+        func.count(MatchParticipation.id),
+        func.coalesce(func.sum(case((Match.winner_team == MatchParticipation.team, 1), else_=0)), 0)
+    ).join(Match, Match.id == MatchParticipation.match_id)\
+        .filter(MatchParticipation.user_id == user_id).one()
+
+    # Victorias por pareja: compañeros del mismo equipo en partidos ganados
+    mate = aliased(MatchParticipation)
+    partner_rows = db.session.query(
+        mate.user_id, func.count(MatchParticipation.id)
+    ).join(Match, Match.id == MatchParticipation.match_id)\
+        .join(mate, and_(
+            mate.match_id == MatchParticipation.match_id,
+            mate.team == MatchParticipation.team,
+            mate.user_id != MatchParticipation.user_id
+        ))\
+        .filter(
+            MatchParticipation.user_id == user_id,
+            Match.winner_team == MatchParticipation.team
+        ).group_by(mate.user_id).all()
+
+    # Cartas usadas
+    card_rows = db.session.query(CardAssignment.card_id, func.count(CardAssignment.id))\
+        .join(MatchParticipation, MatchParticipation.id == CardAssignment.participation_id)\
+        .filter(MatchParticipation.user_id == user_id)\
+        .group_by(CardAssignment.card_id).all()
+
+    # Valoraciones recibidas
+    rating_count, rating_sum = db.session.query(
+        func.count(PlayerRating.id), func.coalesce(func.sum(PlayerRating.rating), 0)
+    ).filter(PlayerRating.rated_id == user_id).one()
+
+    return {
+        'total_matches': int(total_matches),
+        'individual_wins': int(individual_wins),
+        'partners': {mate_id: int(wins) for mate_id, wins in partner_rows},
+        'cards': {card_id: int(uses) for card_id, uses in card_rows},
+        'rating_count': int(rating_count),
+        'rating_sum': int(rating_sum)
+    }
+
+
+def _stored_counts(user_id):
+    """Contadores guardados en las tablas desnormalizadas (None si no hay fila)."""
+    row = db.session.query(
+        UserStats.total_matches, UserStats.individual_wins,
+        UserStats.rating_count, UserStats.rating_sum
+    ).filter(UserStats.user_id == user_id).first()
+    if row is None:
+        return None
+    partners = db.session.query(UserPartnerStats.partner_id, UserPartnerStats.wins)\
+        .filter(UserPartnerStats.user_id == user_id, UserPartnerStats.wins > 0).all()
+    cards = db.session.query(UserCardStats.card_id, UserCardStats.uses)\
+        .filter(UserCardStats.user_id == user_id, UserCardStats.uses > 0).all()
+    return {
+        'total_matches': row.total_matches,
+        'individual_wins': row.individual_wins,
+        'partners': dict(partners),
+        'cards': dict(cards),
+        'rating_count': row.rating_count,
+        'rating_sum': row.rating_sum
+    }
+
+
+def _format_stats(user_id, counts):
+    """Convierte contadores en bruto al formato de /api/profile/stats."""
+    card_names = {}
+    if counts['cards']:
+        card_names = dict(
+            db.session.query(Card.id, Card.name).filter(Card.id.in_(counts['cards'])).all()
+        )
+    cards_used = {}
+    for card_id, uses in counts['cards'].items():
+        name = card_names.get(card_id)
+        cards_used[name] = cards_used.get(name, 0) + uses
+
+    rating_count = counts['rating_count']
+    avg_rating = (round(counts['rating_sum'] / rating_count, 2)
+                  if rating_count else None)
+
+    return {
+        'total_matches': counts['total_matches'],
+        'individual_wins': counts['individual_wins'],
+        'pair_wins': [
+            {'pair': sorted([user_id, mate_id]), 'wins': wins}
+            for mate_id, wins in sorted(counts['partners'].items())
+        ],
+        'cards_used': cards_used,
+        'total_ratings_received': rating_count,
+        'average_rating_received': avg_rating
+    }
+
+
+def compute_user_stats(user_id):
+    """Calcula las estadísticas de /api/profile/stats a partir de las tablas vivas."""
+    return _format_stats(user_id, _live_counts(user_id))
+
+
+# Tabla desnormalizada
+# --------------------
+
+def rebuild_user_stats(user_id):
+    """
+    Recalcula desde cero las filas de un usuario. No hace commit.
+
+    Dos peticiones pueden reconstruir a la vez el mismo usuario sin fila (tras
+    invalidate_user_stats): la fila se crea con insert_ignore y, si otra
+    transacción se adelanta, se queda la suya, calculada de las mismas tablas.
+    """
+    counts = _live_counts(user_id)
+    values = {
+        'total_matches': counts['total_matches'],
+        'individual_wins': counts['individual_wins'],
+        'rating_sum': counts['rating_sum'],
+        'rating_count': counts['rating_count'],
+    }
+    updated = UserStats.query.filter_by(user_id=user_id)\
+        .update({**values, 'version': UserStats.version + 1})
+    if not updated:
+        inserted = insert_ignore(UserStats, [{
+            'user_id': user_id, **values, 'version': 1, 'updated_at': datetime.utcnow()
+        }])
+        if not inserted:
+            return counts
+
+    UserPartnerStats.query.filter_by(user_id=user_id).delete()
+    UserCardStats.query.filter_by(user_id=user_id).delete()
+    insert_ignore(UserPartnerStats, [
+        {'user_id': user_id, 'partner_id': partner_id, 'wins': wins}
+        for partner_id, wins in counts['partners'].items()
+    ])
+    insert_ignore(UserCardStats, [
+        {'user_id': user_id, 'card_id': card_id, 'uses': uses}
+        for card_id, uses in counts['cards'].items()
+    ])
+    return counts
+
+
+def check_user_stats(user_id):
+    """Devuelve (vivo, guardado) si la fila del usuario no cuadra; None si cuadra."""
+    live = _live_counts(user_id)
+    stored = _stored_counts(user_id)
+    if stored != live:
+        return live, stored
+    return None
+
+
+def user_stats_etag(user_id):
+    """Sello de versión de las estadísticas del usuario (None si aún no hay fila)."""
+    row = db.session.query(UserStats.version, UserStats.updated_at)\
+        .filter(UserStats.user_id == user_id).first()
+    if row is None:
+        return None
+    stamp = row.updated_at.timestamp() if row.updated_at else 0
+    return f'stats-{user_id}-v{row.version}-{stamp:.0f}'
+
+
+def get_user_stats(user_id):
+    """Estadísticas servidas desde la tabla desnormalizada (la reconstruye si falta)."""
+    counts = _stored_counts(user_id)
+    if counts is None:
+        counts = rebuild_user_stats(user_id)
+        db.session.commit()
+    return _format_stats(user_id, counts)
+
+
+def invalidate_user_stats(user_ids):
+    """Borra las filas de estos usuarios; se reconstruirán en la próxima lectura."""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return
+    for model in (UserPartnerStats, UserCardStats, UserStats):
+        model.query.filter(model.user_id.in_(user_ids)).delete()
+
+
+# Actualizaciones incrementales
+# -----------------------------
+# Deben llamarse ANTES de añadir o modificar las filas que cambian los números:
+# ensure_user_stats reconstruye los usuarios sin fila a partir de las tablas
+# vivas, y el autoflush no debe incluir todavía el cambio en ese cálculo.
+
+def ensure_user_stats(user_ids):
+    """Garantiza que existe fila en user_stats para todos los usuarios."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    existing = {
+        uid for (uid,) in db.session.query(UserStats.user_id)
+        .filter(UserStats.user_id.in_(user_ids)).all()
+    }
+    for uid in user_ids - existing:
+        rebuild_user_stats(uid)
+
+
+def _increment(user_ids, **deltas):
+    """Suma los deltas indicados e incrementa la versión de las filas."""
+    if not user_ids:
+        return
+    deltas['version'] = 1
+    UserStats.query.filter(UserStats.user_id.in_(list(user_ids))).update(
+        {getattr(UserStats, col): getattr(UserStats, col) + delta for col, delta in deltas.items()},
+        synchronize_session=False
+    )
+
+
+def _increment_each(deltas_by_user):
+    """
+    Como _increment, con deltas distintos por usuario ({user_id: {col: delta}}),
+    en un único UPDATE con CASE por columna.
+    """
+    if not deltas_by_user:
+        return
+    columns = {col for deltas in deltas_by_user.values() for col in deltas}
+    values = {
+        getattr(UserStats, col): getattr(UserStats, col) + case(
+            {uid: deltas.get(col, 0) for uid, deltas in deltas_by_user.items()},
+            value=UserStats.user_id, else_=0
+        ) for col in columns
+    }
+    values[UserStats.version] = UserStats.version + 1
+    UserStats.query.filter(UserStats.user_id.in_(list(deltas_by_user)))\
+        .update(values, synchronize_session=False)
+
+
+def record_participation(user_id, delta):
+    """join_match (+1) / leave_match (-1)."""
+    ensure_user_stats([user_id])
+    _increment([user_id], total_matches=delta)
+
+
+def record_result(participations, winner_team):
+    """submit_result: victorias individuales y por pareja del equipo ganador."""
+    ensure_user_stats(p.user_id for p in participations)
+    winners = [p.user_id for p in participations if p.team == winner_team]
+    _increment(winners, individual_wins=1)
+    upsert_add(
+        UserPartnerStats,
+        [{'user_id': u, 'partner_id': m, 'wins': 1} for u in winners for m in winners if u != m],
+        keys=['user_id', 'partner_id'],
+        counters=['wins']
+    )
+
+
+def record_ratings(ratings):
+    """submit_ratings: lista de (rated_id, rating) efectivamente insertadas."""
+    totals = {}
+    for rated_id, score in ratings:
+        user_totals = totals.setdefault(rated_id, {'rating_sum': 0, 'rating_count': 0})
+        user_totals['rating_sum'] += score
+        user_totals['rating_count'] += 1
+    ensure_user_stats(totals)
+    _increment_each(totals)
+
+
+def record_cards(assignments, delta=1):
+    """
+    assign_random_cards (+1): lista de (user_id, card_id) asignadas.
+    leave_match (-1): la asignación que se borra en cascada con la participación.
+    """
+    ensure_user_stats(user_id for user_id, _ in assignments)
+    _increment({user_id for user_id, _ in assignments})
+    uses = {}
+    for key in assignments:
+        uses[key] = uses.get(key, 0) + delta
+    upsert_add(
+        UserCardStats,
+        [{'user_id': u, 'card_id': c, 'uses': n} for (u, c), n in uses.items()],
+        keys=['user_id', 'card_id'],
+        counters=['uses']
+    )
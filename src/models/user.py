@@ -1,8 +1,8 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from src.models import db
 from src.models.match import MatchParticipation
 from src.models.rating import PlayerRating  # <-- corregido
+from src.services.passwords import hash_password, verify_password
 
 
 class User(db.Model):
@@ -36,10 +36,14 @@ class User(db.Model):
     )
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        # Si el hash usa otro método o parámetros, se renueva (falta el commit)
+        valid, new_hash = verify_password(self.password_hash, password)
+        if new_hash:
+            self.password_hash = new_hash
+        return valid
     
     def to_dict(self):
         return {
@@ -54,3 +58,16 @@ class User(db.Model):
                 'ratings_received': len(self.ratings_received)
             }
         }
+
+
+class RevokedToken(db.Model):
+    """
+    Tokens JWT revocados antes de caducar (logout y refresh ya usados). Se
+    guardan hasta su expiración; `flask prune-tokens` borra los caducados.
+    """
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -0,0 +1,55 @@
+import hmac
+import os
+from functools import wraps
+
+from flask import Blueprint, request, jsonify, current_app
+
+from src.models import db
+from src.utils.cache import cache_stats
+from src.utils.db_config import pool_stats
+from src.utils.etag import etag_stats
+
+admin_bp = Blueprint('admin', __name__)
+
+
+# Decorador para endpoints internos: requieren la cabecera X-Admin-Token.
+# Si ADMIN_TOKEN no está configurado, los endpoints no existen (404).
+def admin_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        expected = os.getenv('ADMIN_TOKEN')
+        if not expected:
+            return jsonify({'success': False, 'message': 'Not found'}), 404
+        # Comparación en tiempo constante: no filtra cuántos caracteres coinciden
+        provided = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(provided.encode(), expected.encode()):
+            return jsonify({'success': False, 'message': 'Forbidden'}), 403
+        return f(*args, **kwargs)
+    return decorated
+
+@admin_bp.route('/pool', methods=['GET'])
+@admin_required
+def get_pool():
+    """Estadísticas del pool de conexiones de este worker."""
+    return jsonify({'success': True, 'data': pool_stats(db.engine)}), 200
+
+@admin_bp.route('/caches', methods=['GET'])
+@admin_required
+def get_caches():
+    """Aciertos y fallos de las cachés de proceso y tasa de 304 por endpoint."""
+    return jsonify({
+        'success': True,
+        'data': {'caches': cache_stats(), 'conditional_get': etag_stats()}
+    }), 200
+
+@admin_bp.route('/worker', methods=['GET'])
+@admin_required
+def get_worker():
+    """Identidad y tiempo de arranque de este worker."""
+    return jsonify({
+        'success': True,
+        'data': {
+            'pid': os.getpid(),
+            'boot_ms': round(current_app.config.get('BOOT_SECONDS', 0) * 1000, 1)
+        }
+    }), 200
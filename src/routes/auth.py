@@ -1,14 +1,103 @@
-from flask import Blueprint, request, jsonify, current_app, g
-from werkzeug.security import generate_password_hash, check_password_hash
+import os
+from flask import Blueprint, request, jsonify, g
+from flask.ctx import _AppCtxGlobals
 import jwt
-from datetime import datetime, timedelta
 from functools import wraps
 
 from src.models import db
+from src.models.league import bump_league_version
 from src.models.user import User
+from src.services.access import user_league_ids
+from src.services.passwords import HashingBusy
+from src.services.tokens import issue_tokens, decode_token, revoke
+from src.utils.cache import TTLCache
+from src.utils.throttle import RateLimiter
 
 auth_bp = Blueprint('auth', __name__)
 
+# Identidad (id -> {'id', 'username'}) de los tokens antiguos, que solo traen
+# user_id: confirma que la cuenta existe. Los de acceso actuales no la
+# necesitan (src/services/tokens.py).
+user_cache = TTLCache(
+    'auth_users',
+    maxsize=int(os.getenv('AUTH_CACHE_SIZE', 4096)),
+    ttl=int(os.getenv('AUTH_CACHE_TTL', 300))
+)
+
+# Intentos que cuestan un hash de contraseña, por ventana de 60 s y worker
+ip_limiter = RateLimiter(int(os.getenv('AUTH_IP_LIMIT', 20)), 60)
+email_limiter = RateLimiter(int(os.getenv('AUTH_EMAIL_LIMIT', 5)), 60)
+
+
+def _throttled(*checks):
+    """Respuesta 429 si algún (limitador, clave) supera su límite; None si no."""
+    retry_after = max(limiter.hit(key) for limiter, key in checks)
+    if not retry_after:
+        return None
+    response = jsonify({'success': False, 'message': 'Demasiados intentos, prueba más tarde'})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+
+@auth_bp.errorhandler(HashingBusy)
+def hashing_busy(error):
+    response = jsonify({'success': False, 'message': 'Servidor ocupado, prueba de nuevo'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+def invalidate_user(user_id):
+    """Olvidar la identidad cacheada (cambio de perfil o borrado de cuenta)."""
+    user_cache.invalidate(user_id)
+
+
+def _load_identity(user_id):
+    row = db.session.query(User.id, User.username).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    return {'id': row.id, 'username': row.username}
+
+
+class AuthGlobals(_AppCtxGlobals):
+    """
+    `g` de la aplicación: `g.current_user_id` lo fija token_required sin tocar la
+    BBDD; `g.current_user` carga el objeto User solo si un handler lo necesita.
+    """
+
+    @property
+    def current_user(self):
+        if '_current_user' not in self.__dict__:
+            user_id = self.__dict__.get('current_user_id')
+            self.__dict__['_current_user'] = (
+                db.session.get(User, user_id) if user_id is not None else None
+            )
+        return self.__dict__['_current_user']
+
+def _authenticate(token):
+    """Valida el token de acceso y fija la identidad en `g`. Devuelve la respuesta de error o None."""
+    try:
+        payload = decode_token(token)
+    except jwt.ExpiredSignatureError:
+        return jsonify({'success': False, 'message': 'Token expired'}), 401
+    except jwt.InvalidTokenError:
+        return jsonify({'success': False, 'message': 'Invalid token'}), 401
+
+    user_id = payload.get('user_id')
+    if 'username' in payload:
+        # Token de acceso actual: basta con que traiga la claim, sin consultar
+        # la BBDD. Su valor puede estar desfasado (ver issue_tokens)
+        if 'leagues' in payload:
+            g.token_leagues = frozenset(payload['leagues'])
+    else:
+        # Token antiguo (solo user_id)
+        identity = user_cache.get_or_load(user_id, lambda: _load_identity(user_id))
+        if not identity:
+            return jsonify({'success': False, 'message': 'User not found'}), 404
+
+    g.current_user_id = user_id
+    g.current_token = payload
+    return None
+
 # Decorador para verificar token JWT
 def token_required(f):
     @wraps(f)
@@ -17,23 +106,25 @@ def token_required(f):
         if not auth_header.startswith('Bearer '):
             return jsonify({'success': False, 'message': 'Token missing'}), 401
 
-        token = auth_header.split(' ', 1)[1]
-        try:
-            payload = jwt.decode(
-                token,
-                current_app.config['SECRET_KEY'],
-                algorithms=['HS256']
-            )
-        except jwt.ExpiredSignatureError:
-            return jsonify({'success': False, 'message': 'Token expired'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'success': False, 'message': 'Invalid token'}), 401
+        error = _authenticate(auth_header.split(' ', 1)[1])
+        if error:
+            return error
+        return f(*args, **kwargs)
+    return decorated
 
-        user = User.query.get(payload.get('user_id'))
-        if not user:
-            return jsonify({'success': False, 'message': 'User not found'}), 404
+# Variante para streams SSE y fotos: ni EventSource ni <img> permiten enviar
+# cabeceras, así que el token llega en ?token=. Solo en estas rutas: una URL
+# con token puede acabar en logs de proxies.
+def query_token_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = request.args.get('token')
+        if not token:
+            return jsonify({'success': False, 'message': 'Token missing'}), 401
 
-        g.current_user = user
+        error = _authenticate(token)
+        if error:
+            return error
         return f(*args, **kwargs)
     return decorated
 
@@ -43,6 +134,10 @@ def register():
     if not all(k in data for k in ('username', 'email', 'password')):
         return jsonify({'success': False, 'message': 'Datos incompletos'}), 400
 
+    throttled = _throttled((ip_limiter, request.remote_addr))
+    if throttled:
+        return throttled
+
     if User.query.filter_by(username=data['username']).first():
         return jsonify({'success': False, 'message': 'Username en uso'}), 409
     if User.query.filter_by(email=data['email']).first():
@@ -56,19 +151,10 @@ def register():
     db.session.add(user)
     db.session.commit()
 
-    # Leer expiración de JWT del config en tiempo de petición
-    exp_days = int(current_app.config.get('JWT_EXP_DELTA_DAYS', 7))
-    exp = datetime.utcnow() + timedelta(days=exp_days)
-    token = jwt.encode(
-        {'user_id': user.id, 'exp': exp},
-        current_app.config['SECRET_KEY'],
-        algorithm='HS256'
-    )
-
     return jsonify({
         'success': True,
         'data': {
-            'token': token,
+            **issue_tokens(user.id, user.username, []),
             'user': user.to_dict()
         }
     }), 201
@@ -76,26 +162,70 @@ def register():
 @auth_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json() or {}
-    user = User.query.filter_by(email=data.get('email', '').strip().lower()).first()
+    email = data.get('email', '').strip().lower()
+    throttled = _throttled((ip_limiter, request.remote_addr), (email_limiter, email))
+    if throttled:
+        return throttled
+
+    user = User.query.filter_by(email=email).first()
     if not user or not user.check_password(data.get('password', '')):
         return jsonify({'success': False, 'message': 'Credenciales inválidas'}), 401
+    email_limiter.reset(email)
+    if db.session.is_modified(user):
+        db.session.commit()    # rehash con los parámetros actuales
 
-    exp_days = int(current_app.config.get('JWT_EXP_DELTA_DAYS', 7))
-    exp = datetime.utcnow() + timedelta(days=exp_days)
-    token = jwt.encode(
-        {'user_id': user.id, 'exp': exp},
-        current_app.config['SECRET_KEY'],
-        algorithm='HS256'
-    )
-
+    user_data = user.to_dict()
     return jsonify({
         'success': True,
         'data': {
-            'token': token,
-            'user': user.to_dict()
+            **issue_tokens(user.id, user.username, user_data['leagues']),
+            'user': user_data
         }
     }), 200
 
+@auth_bp.route('/refresh', methods=['POST'])
+def refresh():
+    """Canjear un token de refresco (una sola vez) por un par nuevo."""
+    data = request.get_json(silent=True) or {}
+    try:
+        payload = decode_token(data.get('refresh_token', ''), token_type='refresh')
+    except jwt.ExpiredSignatureError:
+        return jsonify({'success': False, 'message': 'Token expired'}), 401
+    except jwt.InvalidTokenError:
+        return jsonify({'success': False, 'message': 'Invalid token'}), 401
+
+    user_id = payload['user_id']
+    identity = _load_identity(user_id)
+    if not identity:
+        return jsonify({'success': False, 'message': 'User not found'}), 404
+
+    # El INSERT en revoked_tokens decide entre dos canjes simultáneos
+    if not revoke(payload):
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Invalid token'}), 401
+    db.session.commit()
+
+    tokens = issue_tokens(user_id, identity['username'], user_league_ids(user_id, fresh=True))
+    return jsonify({'success': True, 'data': tokens}), 200
+
+@auth_bp.route('/logout', methods=['POST'])
+@token_required
+def logout():
+    """Revocar el token de acceso actual y, si se envía, el de refresco."""
+    revoked = [g.current_token] if 'jti' in g.current_token else []
+    data = request.get_json(silent=True) or {}
+    if data.get('refresh_token'):
+        try:
+            refresh_payload = decode_token(data['refresh_token'], token_type='refresh')
+        except jwt.InvalidTokenError:
+            refresh_payload = None
+        if refresh_payload and refresh_payload['user_id'] == g.current_user_id:
+            revoked.append(refresh_payload)
+    for payload in revoked:
+        revoke(payload)
+    db.session.commit()
+    return jsonify({'success': True, 'message': 'Sesión cerrada'}), 200
+
 @auth_bp.route('/validate-token', methods=['GET'])
 @token_required
 def validate_token():
@@ -105,12 +235,17 @@ def validate_token():
 @token_required
 def get_profile():
     user = g.current_user
+    if user is None:
+        # Token de acceso válido de una cuenta ya borrada
+        return jsonify({'success': False, 'message': 'User not found'}), 404
     return jsonify({'success': True, 'data': user.to_dict()}), 200
 
 @auth_bp.route('/profile', methods=['PUT'])
 @token_required
 def update_profile():
     user = g.current_user
+    if user is None:
+        return jsonify({'success': False, 'message': 'User not found'}), 404
     data = request.get_json() or {}
 
     if 'username' in data:
@@ -118,6 +253,11 @@ def update_profile():
         existing = User.query.filter_by(username=username).first()
         if existing and existing.id != user.id:
             return jsonify({'success': False, 'message': 'Username en uso'}), 409
+        if username != user.username:
+            # Clasificaciones y detalle de liga muestran el nombre: sus ETags
+            # dependen de la versión de cada liga del usuario
+            for league_id in user_league_ids(user.id, fresh=True):
+                bump_league_version(league_id)
         user.username = username
 
     if 'email' in data:
@@ -128,9 +268,13 @@ def update_profile():
         user.email = email
 
     if 'password' in data and data['password']:
+        throttled = _throttled((ip_limiter, request.remote_addr))
+        if throttled:
+            return throttled
         user.set_password(data['password'])
 
     db.session.commit()
+    invalidate_user(user.id)
     return jsonify({
         'success': True,
         'data': {
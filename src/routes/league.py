@@ -1,8 +1,17 @@
 import uuid
 from flask import Blueprint, request, jsonify, g
+from sqlalchemy.exc import IntegrityError
 from src.models import db
-from src.models.league import League, LeagueMembership
+from src.models.league import League, LeagueMembership, bump_league_version, get_league_version
+from src.models.loaders import load_league_detail, load_user_leagues
+from src.models.serializers import league_matches
+from src.models.match import Match, MatchParticipation
+from src.models.skill import league_standings, replay_ratings
+from src.models.stats import invalidate_user_stats
 from src.routes.auth import token_required
+from src.services.access import is_member, user_league_ids, invalidate_memberships
+from src.services.analytics import league_analytics, DEFAULT_FORM_MATCHES
+from src.utils.etag import not_modified, json_with_etag
 
 league_bp = Blueprint('league', __name__, url_prefix='/api/leagues')
 
@@ -10,31 +19,70 @@ league_bp = Blueprint('league', __name__, url_prefix='/api/leagues')
 @token_required
 def list_leagues():
     """Listar todas las ligas en las que participa el usuario."""
-    user = g.current_user
-    leagues = [lm.league.to_dict() for lm in user.league_memberships]
+    user_id = g.current_user_id
+    leagues = [league.to_dict() for league in load_user_leagues(user_id)]
     return jsonify({'success': True, 'data': leagues}), 200
 
 @league_bp.route('/<int:league_id>', methods=['GET'])
 @token_required
 def get_league(league_id):
     """Obtener detalles de una liga específica, incluyendo partidos."""
-    user = g.current_user
-    membership = LeagueMembership.query.filter_by(
-        league_id=league_id, user_id=user.id
-    ).first()
-    if not membership:
+    if not is_member(league_id):
         return jsonify({'success': False, 'message': 'No tienes acceso a esta liga'}), 403
 
-    league = membership.league
+    etag = f'league-{league_id}-v{get_league_version(league_id)}'
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    league = load_league_detail(league_id)
+    if not league:
+        # Membresía cacheada de una liga recién eliminada en otro worker
+        return jsonify({'success': False, 'message': 'Liga no encontrada'}), 404
     data = league.to_dict()
-    data['matches'] = [m.to_dict() for m in league.matches]
-    return jsonify({'success': True, 'data': data}), 200
+    data['matches'] = league_matches(league_id)
+    return json_with_etag({'success': True, 'data': data}, etag)
+
+@league_bp.route('/<int:league_id>/standings', methods=['GET'])
+@token_required
+def get_standings(league_id):
+    """Clasificación Elo de la liga (precalculada en player_skills)."""
+    if not is_member(league_id):
+        return jsonify({'success': False, 'message': 'No tienes acceso a esta liga'}), 403
+
+    etag = f'standings-{league_id}-v{get_league_version(league_id)}'
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    return json_with_etag({'success': True, 'data': league_standings(league_id)}, etag)
+
+@league_bp.route('/<int:league_id>/analytics', methods=['GET'])
+@token_required
+def get_analytics(league_id):
+    """Matrices de pareja y cara a cara, rachas y forma (?last=N partidos)."""
+    if not is_member(league_id):
+        return jsonify({'success': False, 'message': 'No tienes acceso a esta liga'}), 403
+
+    try:
+        last_n = max(1, min(int(request.args.get('last', DEFAULT_FORM_MATCHES)), 50))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'last inválido'}), 400
+
+    version = get_league_version(league_id)
+    etag = f'analytics-{league_id}-v{version}-n{last_n}'
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    data = league_analytics(league_id, version, last_n)
+    return json_with_etag({'success': True, 'data': data}, etag)
 
 @league_bp.route('/', methods=['POST'])
 @token_required
 def create_league():
     """Crear una nueva liga y generar enlace de invitación."""
-    user = g.current_user
+    user_id = g.current_user_id
     data = request.get_json() or {}
     name = data.get('name', '').strip()
     if not name:
@@ -43,14 +91,15 @@ def create_league():
     # Generar código y crear la liga (YA NO pasamos is_private)
     invite_code = League.generate_invite_code()
     league = League(name=name, invite_code=invite_code)
-    league.created_by_id = user.id
+    league.created_by_id = user_id
     db.session.add(league)
     db.session.commit()
 
     # Unir al creador
-    membership = LeagueMembership(user_id=user.id, league_id=league.id)
+    membership = LeagueMembership(user_id=user_id, league_id=league.id)
     db.session.add(membership)
     db.session.commit()
+    invalidate_memberships([user_id])
 
     invite_link = f"{request.host_url.rstrip('/api/')}/join/{invite_code}"
     return jsonify({
@@ -65,17 +114,18 @@ def create_league():
 @token_required
 def update_league(league_id):
     """Actualizar el nombre de la liga."""
-    user = g.current_user
+    user_id = g.current_user_id
     league = League.query.get(league_id)
     if not league:
         return jsonify({'success': False, 'message': 'Liga no encontrada'}), 404
-    if league.created_by_id != user.id:
+    if league.created_by_id != user_id:
         return jsonify({'success': False, 'message': 'No tienes permiso para editar esta liga'}), 403
 
     data = request.get_json() or {}
     name = data.get('name', '').strip()
     if name:
         league.name = name
+        bump_league_version(league.id)
         db.session.commit()
 
     return jsonify({'success': True, 'data': league.to_dict()}), 200
@@ -84,46 +134,64 @@ def update_league(league_id):
 @token_required
 def delete_league(league_id):
     """Eliminar una liga (solo si es creador)."""
-    user = g.current_user
+    user_id = g.current_user_id
     league = League.query.get(league_id)
     if not league:
         return jsonify({'success': False, 'message': 'Liga no encontrada'}), 404
-    if league.created_by_id != user.id:
+    if league.created_by_id != user_id:
         return jsonify({'success': False, 'message': 'No tienes permiso para eliminar esta liga'}), 403
 
+    participants = db.session.query(MatchParticipation.user_id)\
+        .join(Match, Match.id == MatchParticipation.match_id)\
+        .filter(Match.league_id == league_id).distinct().all()
+    invalidate_user_stats(uid for (uid,) in participants)
+    members = [uid for (uid,) in db.session.query(LeagueMembership.user_id)
+               .filter(LeagueMembership.league_id == league_id).all()]
     db.session.delete(league)
+    db.session.flush()
+    # Sin partidos en la liga, el recálculo vacía su ranking e historial
+    replay_ratings(league_id)
     db.session.commit()
+    invalidate_memberships(members)
     return jsonify({'success': True, 'message': 'Liga eliminada'}), 200
 
 @league_bp.route('/join/<string:invite_code>', methods=['POST'])
 @token_required
 def join_league(invite_code):
     """Unirse a una liga usando el código de invitación."""
-    user = g.current_user
+    user_id = g.current_user_id
     league = League.query.filter_by(invite_code=invite_code).first()
     if not league:
         return jsonify({'success': False, 'message': 'Liga no encontrada'}), 404
 
-    if LeagueMembership.query.filter_by(user_id=user.id, league_id=league.id).first():
+    if league.id in user_league_ids(user_id, fresh=True):
         return jsonify({'success': False, 'message': 'Ya estás en esta liga'}), 409
 
-    membership = LeagueMembership(user_id=user.id, league_id=league.id)
+    membership = LeagueMembership(user_id=user_id, league_id=league.id)
     db.session.add(membership)
-    db.session.commit()
+    bump_league_version(league.id)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Dos peticiones simultáneas del mismo usuario: unique_league_membership
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'Ya estás en esta liga'}), 409
+    invalidate_memberships([user_id])
     return jsonify({'success': True, 'data': league.to_dict()}), 200
 
 @league_bp.route('/<int:league_id>/regenerate-invite', methods=['POST'])
 @token_required
 def regenerate_invite(league_id):
     """Regenerar el código de invitación (solo creador)."""
-    user = g.current_user
+    user_id = g.current_user_id
     league = League.query.get(league_id)
     if not league:
         return jsonify({'success': False, 'message': 'Liga no encontrada'}), 404
-    if league.created_by_id != user.id:
+    if league.created_by_id != user_id:
         return jsonify({'success': False, 'message': 'No tienes permiso para regenerar el código'}), 403
 
     league.invite_code = League.generate_invite_code()
+    bump_league_version(league.id)
     db.session.commit()
     invite_link = f"{request.host_url.rstrip('/api/')}/join/{league.invite_code}"
     return jsonify({
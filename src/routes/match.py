@@ -1,11 +1,20 @@
 import random
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, Response, request, jsonify, g, current_app
 from datetime import datetime, timedelta
 from src.models import db
 from src.models.match import Match, MatchParticipation, CardAssignment
-from src.models.card import Card
-from src.models.league import LeagueMembership
-from src.routes.auth import token_required
+from src.models.bulk import insert_ignore
+from src.models.card import card_catalog
+from src.models.league import bump_league_version
+from src.models.loaders import load_match_detail
+from src.models.serializers import match_query, serialize_matches
+from src.models.stats import record_participation, record_cards, invalidate_user_stats
+from src.models.skill import replay_ratings
+from src.routes.auth import token_required, query_token_required
+from src.services.access import is_member, match_access
+from src.services import events
+from src.utils.etag import not_modified, json_with_etag
+from src.utils.pagination import parse_page_args, apply_keyset, split_page
 
 match_bp = Blueprint('match', __name__)
 
@@ -13,17 +22,14 @@ match_bp = Blueprint('match', __name__)
 @token_required
 def create_match(league_id):
     """Crear un nuevo partido 2v2 en una liga específica."""
-    user = g.current_user
+    user_id = g.current_user_id
     data = request.get_json() or {}
     date_str = data.get('date')
     if not date_str:
         return jsonify({'success': False, 'message': 'Fecha obligatoria'}), 400
 
     # Verificar membresía
-    membership = LeagueMembership.query.filter_by(
-        league_id=league_id, user_id=user.id
-    ).first()
-    if not membership:
+    if not is_member(league_id):
         return jsonify({'success': False, 'message': 'No perteneces a esta liga'}), 403
 
     try:
@@ -35,9 +41,10 @@ def create_match(league_id):
         league_id=league_id,
         date=match_date,
         status='open',
-        created_by_id=user.id
+        created_by_id=user_id
     )
     db.session.add(new_match)
+    bump_league_version(league_id)
     db.session.commit()
 
     return jsonify({
@@ -49,77 +56,97 @@ def create_match(league_id):
 @match_bp.route('/leagues/<int:league_id>/matches', methods=['GET'])
 @token_required
 def get_league_matches(league_id):
-    """Listar todos los partidos de una liga ordenados por fecha descendente."""
-    user = g.current_user
-    membership = LeagueMembership.query.filter_by(
-        league_id=league_id, user_id=user.id
-    ).first()
-    if not membership:
+    """
+    Listar los partidos de una liga por fecha descendente, paginados por cursor.
+
+    Query string: limit, cursor, status, from, to (fechas ISO). Sin limit
+    ni cursor devuelve todos los partidos.
+    """
+    if not is_member(league_id):
         return jsonify({'success': False, 'message': 'Acceso denegado a esta liga'}), 403
 
-    matches = Match.query.filter_by(league_id=league_id).order_by(Match.date.desc()).all()
+    try:
+        page = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    query = match_query().filter(Match.league_id == league_id)
+    rows = apply_keyset(query, page, Match.date, Match.id, Match.status).all()
+    rows, next_cursor = split_page(rows, page, lambda r: (r.date, r.id))
     return jsonify({
         'success': True,
-        'data': [m.to_dict() for m in matches]
+        'data': serialize_matches(rows),
+        'next_cursor': next_cursor
     }), 200
 
 @match_bp.route('/matches/<int:match_id>', methods=['GET'])
 @token_required
 def get_match(match_id):
     """Obtener los detalles de un partido y estado de carta para el usuario."""
-    user = g.current_user
-    match = Match.query.get(match_id)
-    if not match:
+    user_id = g.current_user_id
+    head = match_access(match_id)
+    if not head:
         return jsonify({'success': False, 'message': 'Partido no encontrado'}), 404
 
     # Verificar membresía en la liga del partido
-    membership = LeagueMembership.query.filter_by(
-        league_id=match.league_id, user_id=user.id
-    ).first()
-    if not membership:
+    if not is_member(head.league_id):
         return jsonify({'success': False, 'message': 'No perteneces a esta liga'}), 403
 
+    # Lógica de carta: disponible 1h antes
+    now = datetime.utcnow()
+    card_window = head.date - timedelta(hours=1) <= now <= head.date + timedelta(hours=1)
+
+    # La respuesta depende de la versión de la liga, del usuario (su carta)
+    # y de si estamos dentro de la ventana de la carta.
+    etag = f'match-{match_id}-v{head.version or 0}-u{user_id}-c{int(card_window)}'
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    match = load_match_detail(match_id)
     match_data = match.to_dict()
     match_data['can_view_card'] = False
     match_data['card'] = None
 
-    # Lógica de carta: disponible 1h antes
-    now = datetime.utcnow()
-    if now >= match.date - timedelta(hours=1) and now <= match.date + timedelta(hours=1):
-        participation = MatchParticipation.query.filter_by(
-            match_id=match_id, user_id=user.id
-        ).first()
-        if participation:
-            assignment = CardAssignment.query.filter_by(
-                participation_id=participation.id
-            ).first()
-            if assignment:
-                match_data['can_view_card'] = True
-                match_data['card'] = assignment.card.to_dict()
-
-    return jsonify({'success': True, 'data': match_data}), 200
+    if card_window and head.card_id is not None:
+        match_data['can_view_card'] = True
+        match_data['card'] = card_catalog.get(head.card_id)
+
+    return json_with_etag({'success': True, 'data': match_data}, etag)
 
 @match_bp.route('/matches/<int:match_id>', methods=['PUT'])
 @token_required
 def update_match(match_id):
     """Actualizar fecha o estado de un partido (solo creador)."""
-    user = g.current_user
+    user_id = g.current_user_id
     match = Match.query.get(match_id)
     if not match:
         return jsonify({'success': False, 'message': 'Partido no encontrado'}), 404
-    if match.created_by_id != user.id:
+    if match.created_by_id != user_id:
         return jsonify({'success': False, 'message': 'Solo el creador puede editar'}), 403
 
     data = request.get_json() or {}
     date_str = data.get('date')
     status = data.get('status')
+    old_date = match.date
     if date_str:
         try:
             match.date = datetime.fromisoformat(date_str)
         except ValueError:
             return jsonify({'success': False, 'message': 'Fecha inválida'}), 400
-    if status in ('open', 'in_progress', 'completed', 'cancelled'):
+    if status in ('open', 'in_progress', 'completed', 'cancelled') and status != match.status:
+        # El resultado ya está en las estadísticas y el ranking: reabrir el
+        # partido permitiría registrarlo otra vez y contarlo doble
+        if match.status == 'completed':
+            return jsonify({'success': False, 'message': 'Un partido completado no se puede reabrir'}), 400
         match.status = status
+    bump_league_version(match.league_id)
+    events.publish(match_id, match.league_id, 'match_updated',
+                   date=match.date.isoformat(), status=match.status)
+    if match.status == 'completed' and match.date != old_date:
+        # El Elo depende del orden cronológico de los partidos
+        db.session.flush()
+        replay_ratings(match.league_id)
     db.session.commit()
 
     return jsonify({'success': True, 'data': match.to_dict()}), 200
@@ -128,14 +155,22 @@ def update_match(match_id):
 @token_required
 def delete_match(match_id):
     """Eliminar un partido (solo creador)."""
-    user = g.current_user
+    user_id = g.current_user_id
     match = Match.query.get(match_id)
     if not match:
         return jsonify({'success': False, 'message': 'Partido no encontrado'}), 404
-    if match.created_by_id != user.id:
+    if match.created_by_id != user_id:
         return jsonify({'success': False, 'message': 'Solo el creador puede eliminar'}), 403
 
+    invalidate_user_stats(p.user_id for p in match.participations)
+    bump_league_version(match.league_id)
+    events.publish(match_id, match.league_id, 'match_deleted')
+    completed = match.status == 'completed'
     db.session.delete(match)
+    if completed:
+        # Sacar el resultado del ranking: se recalcula la liga sin el partido
+        db.session.flush()
+        replay_ratings(match.league_id)
     db.session.commit()
     return jsonify({'success': True, 'message': 'Partido eliminado'}), 200
 
@@ -143,25 +178,19 @@ def delete_match(match_id):
 @token_required
 def join_match(match_id):
     """Apuntarse a un partido en un equipo automático o especificado."""
-    user = g.current_user
-    match = Match.query.get(match_id)
+    user_id = g.current_user_id
+    match = match_access(match_id)
     if not match:
         return jsonify({'success': False, 'message': 'Partido no encontrado'}), 404
 
     # Verificar membresía en liga
-    membership = LeagueMembership.query.filter_by(
-        league_id=match.league_id, user_id=user.id
-    ).first()
-    if not membership:
+    if not is_member(match.league_id):
         return jsonify({'success': False, 'message': 'No perteneces a esta liga'}), 403
 
     # Evitar duplicados o partida cerrada
     if match.status != 'open':
         return jsonify({'success': False, 'message': 'No puedes unirte, partido cerrado'}), 400
-    existing = MatchParticipation.query.filter_by(
-        match_id=match_id, user_id=user.id
-    ).first()
-    if existing:
+    if match.participation_id is not None:
         return jsonify({'success': False, 'message': 'Ya estás inscrito'}), 409
 
     data = request.get_json() or {}
@@ -171,8 +200,11 @@ def join_match(match_id):
         count2 = MatchParticipation.query.filter_by(match_id=match_id, team=2).count()
         team = 1 if count1 <= count2 else 2
 
-    part = MatchParticipation(match_id=match_id, user_id=user.id, team=team)
+    record_participation(user_id, 1)
+    part = MatchParticipation(match_id=match_id, user_id=user_id, team=team)
     db.session.add(part)
+    bump_league_version(match.league_id)
+    events.publish(match_id, match.league_id, 'participant_joined', user_id=user_id, team=team)
     db.session.commit()
     return jsonify({'success': True, 'message': 'Inscripción correcta', 'data': part.to_dict()}), 200
 
@@ -180,18 +212,24 @@ def join_match(match_id):
 @token_required
 def leave_match(match_id):
     """Abandonar un partido (solo en estado open)."""
-    user = g.current_user
+    user_id = g.current_user_id
     match = Match.query.get(match_id)
     if not match:
         return jsonify({'success': False, 'message': 'Partido no encontrado'}), 404
     if match.status != 'open' or match.date <= datetime.utcnow():
         return jsonify({'success': False, 'message': 'No puedes abandonar'}), 400
 
-    participation = MatchParticipation.query.filter_by(match_id=match_id, user_id=user.id).first()
+    participation = MatchParticipation.query.filter_by(match_id=match_id, user_id=user_id).first()
     if not participation:
         return jsonify({'success': False, 'message': 'No estás inscrito'}), 404
 
+    record_participation(user_id, -1)
+    # La carta asignada se borra en cascada con la participación
+    if participation.card_assignment is not None:
+        record_cards([(user_id, participation.card_assignment.card_id)], delta=-1)
     db.session.delete(participation)
+    bump_league_version(match.league_id)
+    events.publish(match_id, match.league_id, 'participant_left', user_id=user_id)
     db.session.commit()
     return jsonify({'success': True, 'message': 'Has abandonado el partido'}), 200
 
@@ -199,24 +237,41 @@ def leave_match(match_id):
 @token_required
 def assign_random_cards(match_id):
     """Asignar carta aleatoria a todos los participantes de un partido."""
-    user = g.current_user
+    user_id = g.current_user_id
     match = Match.query.get(match_id)
     if not match:
         return jsonify({'success': False, 'message': 'Partido no encontrado'}), 404
-    if match.created_by_id != user.id:
+    if match.created_by_id != user_id:
         return jsonify({'success': False, 'message': 'Solo el creador puede asignar cartas'}), 403
 
-    participations = MatchParticipation.query.filter_by(match_id=match_id).all()
-    active_cards = Card.query.filter_by(is_active=True).all()
+    active_cards = card_catalog.active()
     if not active_cards:
         return jsonify({'success': False, 'message': 'No hay cartas activas'}), 400
 
-    for p in participations:
-        existing = CardAssignment.query.filter_by(participation_id=p.id).first()
-        if not existing:
-            chosen = random.choice(active_cards)
-            ca = CardAssignment(match_id=match_id, participation_id=p.id, card_id=chosen.id)
-            db.session.add(ca)
+    # Una consulta para participantes, otra para lo ya asignado y un INSERT multi-fila
+    participations = db.session.query(MatchParticipation.id, MatchParticipation.user_id)\
+        .filter(MatchParticipation.match_id == match_id).all()
+    assigned = {
+        pid for (pid,) in db.session.query(CardAssignment.participation_id)
+        .filter(CardAssignment.match_id == match_id).all()
+    }
+    new_assignments = [
+        (pid, uid, random.choice(active_cards)['id'])
+        for pid, uid in participations if pid not in assigned
+    ]
+    record_cards([(uid, card_id) for _, uid, card_id in new_assignments])
+    inserted = insert_ignore(CardAssignment, [
+        {'match_id': match_id, 'participation_id': pid, 'card_id': card_id}
+        for pid, _, card_id in new_assignments
+    ])
+    if inserted != len(new_assignments):
+        # Otra petición concurrente asignó parte de las cartas: los contadores
+        # incrementales ya no son fiables, se reconstruyen en la próxima lectura
+        invalidate_user_stats(uid for _, uid, _ in new_assignments)
+    if inserted:
+        bump_league_version(match.league_id)
+        # Sin la carta: cada jugador la consulta con su token
+        events.publish(match_id, match.league_id, 'cards_assigned', count=inserted)
     db.session.commit()
     return jsonify({'success': True, 'message': 'Cartas asignadas'}), 200
 
@@ -224,18 +279,51 @@ def assign_random_cards(match_id):
 @token_required
 def get_card(match_id):
     """Ver la carta asignada (disponible 1h antes del partido)."""
-    user = g.current_user
-    mp = MatchParticipation.query.filter_by(match_id=match_id, user_id=user.id).first()
-    if not mp:
+    match = match_access(match_id)
+    if not match or match.participation_id is None:
         return jsonify({'success': False, 'message': 'No estás en este partido'}), 403
 
-    match = mp.match
     now = datetime.utcnow()
     if now < match.date - timedelta(hours=1):
         return jsonify({'success': False, 'message': 'Demasiado pronto para ver la carta'}), 403
 
-    assignment = CardAssignment.query.filter_by(participation_id=mp.id).first()
-    if not assignment:
+    if match.card_id is None:
         return jsonify({'success': False, 'message': 'No hay carta asignada'}), 404
 
-    return jsonify({'success': True, 'data': assignment.card.to_dict()}), 200
+    return jsonify({'success': True, 'data': card_catalog.get(match.card_id)}), 200
+
+@match_bp.route('/matches/<int:match_id>/events', methods=['GET'])
+@query_token_required
+def match_events(match_id):
+    """
+    Stream SSE con los cambios del partido: altas y bajas, cartas asignadas,
+    resultado, fotos y edición o borrado. Con Last-Event-ID (o
+    ?last_event_id=) reenvía antes lo que el cliente se perdió.
+    """
+    match = match_access(match_id)
+    if not match:
+        return jsonify({'success': False, 'message': 'Partido no encontrado'}), 404
+    if not is_member(match.league_id):
+        return jsonify({'success': False, 'message': 'No perteneces a esta liga'}), 403
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or '0'
+    if not last_event_id.isdigit():
+        return jsonify({'success': False, 'message': 'Last-Event-ID inválido'}), 400
+
+    sub = events.broker.subscribe(current_app._get_current_object(), match_id)
+    if sub is None:
+        return jsonify({'success': False, 'message': 'Eventos en directo no disponibles'}), 503
+    try:
+        replayed = events.replay(match_id, int(last_event_id)) if int(last_event_id) else []
+        response = Response(events.stream(sub, replayed), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        })
+    except BaseException:
+        # Sin stream no hay finally que la libere: el hueco se perdería
+        events.broker.unsubscribe(sub)
+        raise
+    # Cliente que se va antes de leer el primer byte: el generador no llega a
+    # empezar y su finally no se ejecuta (unsubscribe es idempotente)
+    response.call_on_close(lambda: events.broker.unsubscribe(sub))
+    return response
@@ -0,0 +1,27 @@
+import hmac
+import os
+
+from flask import Blueprint, request, jsonify, Response, current_app
+
+from src.models import db
+from src.utils.metrics import flush, render
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas de todos los workers en formato Prometheus."""
+    expected = os.getenv('METRICS_TOKEN')
+    if not expected:
+        # Sin token solo en desarrollo: en producción no se exponen
+        if not current_app.debug:
+            return jsonify({'success': False, 'message': 'Not found'}), 404
+    else:
+        provided = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(provided.encode(), f'Bearer {expected}'.encode()):
+            return jsonify({'success': False, 'message': 'Forbidden'}), 403
+
+    # Lo de este worker, al día; el resto lleva como mucho METRICS_FLUSH_SECONDS de retraso
+    flush(db.engine, force=True)
+    return Response(render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -1,68 +1,40 @@
-from flask import Blueprint, jsonify, g
+from flask import Blueprint, request, jsonify, g
 from src.routes.auth import token_required
-from src.models.match import MatchParticipation, Match, CardAssignment
-from src.models.rating import PlayerRating
+from src.models.match import Match
+from src.models.serializers import user_history_query, serialize_history
+from src.models.stats import get_user_stats, user_stats_etag
+from src.utils.etag import not_modified, json_with_etag
+from src.utils.pagination import parse_page_args, apply_keyset, split_page
 
 profile_bp = Blueprint('profile', __name__)
 
 @profile_bp.route('/history', methods=['GET'])
 @token_required
 def get_history():
-    user = g.current_user
-    participations = MatchParticipation.query.filter_by(user_id=user.id).all()
-    history = []
-    for p in participations:
-        match = p.match
-        history.append({
-            'match_id': match.id,
-            'league_id': match.league_id,
-            'date': match.date.isoformat(),
-            'team': p.team,
-            'your_result': 'win' if match.winner_team == p.team else 'loss',
-            'status': match.status
-        })
-    return jsonify({'success': True, 'data': history}), 200
+    """
+    Historial del jugador paginado por cursor (limit, cursor, status, from,
+    to). Sin limit ni cursor devuelve el historial completo.
+    """
+    user_id = g.current_user_id
+    try:
+        page = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    query = user_history_query(user_id)
+    rows = apply_keyset(query, page, Match.date, Match.id, Match.status).all()
+    rows, next_cursor = split_page(rows, page, lambda r: (r.date, r.id))
+    return jsonify({'success': True, 'data': serialize_history(rows), 'next_cursor': next_cursor}), 200
 
 @profile_bp.route('/stats', methods=['GET'])
 @token_required
 def get_stats():
-    user = g.current_user
-    participations = MatchParticipation.query.filter_by(user_id=user.id).all()
-    total_matches = len(participations)
-    individual_wins = sum(1 for p in participations if p.match.winner_team == p.team)
-
-    # Victories by pair
-    pair_wins = {}
-    for p in participations:
-        if p.match.winner_team != p.team:
-            continue
-        teammates = [pp.user_id for pp in p.match.participations 
-                     if pp.team == p.team and pp.user_id != user.id]
-        if teammates:
-            key = tuple(sorted([user.id] + teammates))
-            pair_wins[key] = pair_wins.get(key, 0) + 1
-
-    pair_stats = [{'pair': list(k), 'wins': v} for k, v in pair_wins.items()]
-
-    # Cards used
-    assignments = CardAssignment.query.join(MatchParticipation)\
-        .filter(MatchParticipation.user_id == user.id).all()
-    cards_used = {}
-    for ca in assignments:
-        cards_used[ca.card.name] = cards_used.get(ca.card.name, 0) + 1
-
-    # Ratings received
-    ratings = PlayerRating.query.filter_by(rated_id=user.id).all()
-    total_ratings = len(ratings)
-    avg_rating = (round(sum(r.rating for r in ratings) / total_ratings, 2)
-                  if total_ratings else None)
-
-    stats = {
-        'total_matches': total_matches,
-        'individual_wins': individual_wins,
-        'pair_wins': pair_stats,
-        'cards_used': cards_used,
-        'total_ratings_received': total_ratings,
-        'average_rating_received': avg_rating
-    }
-    return jsonify({'success': True, 'data': stats}), 200
+    user_id = g.current_user_id
+    etag = user_stats_etag(user_id)
+    if etag is not None:
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+    stats = get_user_stats(user_id)
+    return json_with_etag({'success': True, 'data': stats}, etag or user_stats_etag(user_id))
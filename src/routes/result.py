@@ -1,38 +1,45 @@
-import os
-from flask import Blueprint, request, jsonify, g, current_app
-from werkzeug.utils import secure_filename
+from flask import Blueprint, request, jsonify, g, current_app, send_from_directory
 from datetime import datetime
 from src.models import db
+from src.models.bulk import insert_ignore
 from src.models.match import Match, MatchParticipation, CardAssignment
 from src.models.rating import PlayerRating, MatchPhoto
-from src.routes.auth import token_required
+from src.models.league import bump_league_version
+from src.models.skill import apply_match_result
+from src.models.stats import record_result, record_ratings, invalidate_user_stats
+from src.routes.auth import token_required, query_token_required
+from src.services.access import is_member, match_access
+from src.services import events
+from src.services.photos import (
+    store_upload, apply_blob, schedule_processing, photo_league_ids, UploadTooLarge
+)
+from src.utils.uploads import UPLOAD_FOLDER
 
 result_bp = Blueprint('result', __name__)
 
-# Carpeta para subir fotos
-UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'static/uploads')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
 @result_bp.route('/matches/<int:match_id>/result', methods=['POST'])
 @token_required
 def submit_result(match_id):
     """Registrar el resultado del partido y actualizar estado."""
-    user = g.current_user
+    user_id = g.current_user_id
     data = request.get_json() or {}
     winner_team = data.get('winner_team')  # 1 o 2
 
     match = Match.query.get(match_id)
     if not match:
         return jsonify({'success': False, 'message': 'Partido no encontrado'}), 404
-    if match.created_by_id != user.id:
+    if match.created_by_id != user_id:
         return jsonify({'success': False, 'message': 'Solo el creador puede registrar resultado'}), 403
     if match.status != 'open' and match.status != 'in_progress':
         return jsonify({'success': False, 'message': 'Resultado ya registrado o partido cancelado'}), 400
@@ -40,8 +47,12 @@ def submit_result(match_id):
     if winner_team not in (1, 2):
         return jsonify({'success': False, 'message': 'winner_team inválido'}), 400
 
+    record_result(match.participations, winner_team)
+    apply_match_result(match.league_id, match.id, match.participations, winner_team)
     match.winner_team = winner_team
     match.status = 'completed'
+    bump_league_version(match.league_id)
+    events.publish(match_id, match.league_id, 'result', winner_team=winner_team)
     db.session.commit()
 
     # Activar posibilidad de valoración y fotos
@@ -51,45 +62,58 @@ def submit_result(match_id):
 @token_required
 def submit_ratings(match_id):
     """Enviar valoraciones de este usuario a los otros jugadores del partido."""
-    user = g.current_user
+    user_id = g.current_user_id
     data = request.get_json() or {}
     ratings = data.get('ratings', [])  # lista dicts: {'rated_id', 'rating', 'comment'}
 
-    match = Match.query.get(match_id)
+    match = match_access(match_id)
     if not match or match.status != 'completed':
         return jsonify({'success': False, 'message': 'Partido no completado o no existe'}), 400
-
-    participation = MatchParticipation.query.filter_by(
-        match_id=match_id, user_id=user.id
-    ).first()
-    if not participation:
+    if match.participation_id is None:
         return jsonify({'success': False, 'message': 'No jugaste este partido'}), 403
 
-    # Check that ratings contains exactly 3 entries for other players
-    others = [p.user_id for p in match.participations if p.user_id != user.id]
+    # Validar el lote completo antes de escribir nada: exactamente una
+    # valoración por cada uno de los otros jugadores, con nota entera 1-10
+    others = {
+        uid for (uid,) in db.session.query(MatchParticipation.user_id).filter(
+            MatchParticipation.match_id == match_id, MatchParticipation.user_id != user_id
+        ).all()
+    }
+    if not isinstance(ratings, list) or not all(
+        isinstance(r, dict) and _is_int(r.get('rated_id')) and _is_int(r.get('rating'))
+        for r in ratings
+    ):
+        return jsonify({'success': False, 'message': 'Valoración inválida'}), 400
     if len(ratings) != len(others):
         return jsonify({'success': False, 'message': 'Debes valorar a los otros 3 jugadores'}), 400
-
-    # Guardar cada valoración
-    for r in ratings:
-        rated_id = r.get('rated_id')
-        score = r.get('rating')
-        comment = r.get('comment', '')
-        if rated_id not in others or not (1 <= score <= 10):
-            return jsonify({'success': False, 'message': 'Valoración inválida'}), 400
-        existing = PlayerRating.query.filter_by(
-            match_id=match_id, rater_id=user.id, rated_id=rated_id
-        ).first()
-        if existing:
-            continue
-        pr = PlayerRating(
-            match_id=match_id,
-            rater_id=user.id,
-            rated_id=rated_id,
-            rating=score,
-            comment=comment
-        )
-        db.session.add(pr)
+    if {r['rated_id'] for r in ratings} != others or not all(1 <= r['rating'] <= 10 for r in ratings):
+        return jsonify({'success': False, 'message': 'Valoración inválida'}), 400
+
+    # Una consulta para las ya enviadas (reenvío idempotente) y un único
+    # INSERT multi-fila que ignora duplicados por unique_player_rating
+    already = {
+        rated_id for (rated_id,) in db.session.query(PlayerRating.rated_id).filter(
+            PlayerRating.match_id == match_id, PlayerRating.rater_id == user_id
+        ).all()
+    }
+    now = datetime.utcnow()
+    rows = [{
+        'match_id': match_id,
+        'rater_id': user_id,
+        'rated_id': r['rated_id'],
+        'rating': r['rating'],
+        'comment': r.get('comment', ''),
+        'created_at': now
+    } for r in ratings if r['rated_id'] not in already]
+
+    record_ratings([(row['rated_id'], row['rating']) for row in rows])
+    inserted = insert_ignore(PlayerRating, rows)
+    if inserted != len(rows):
+        # Otra petición concurrente insertó parte del lote: los contadores
+        # incrementales ya no son fiables, se reconstruyen en la próxima lectura
+        invalidate_user_stats(row['rated_id'] for row in rows)
+    if inserted:
+        bump_league_version(match.league_id)
     db.session.commit()
 
     return jsonify({'success': True, 'message': 'Valoraciones guardadas'}), 200
@@ -98,15 +122,11 @@ def submit_ratings(match_id):
 @token_required
 def upload_photo(match_id):
     """Subir una foto del partido tras completarlo."""
-    user = g.current_user
-    match = Match.query.get(match_id)
+    user_id = g.current_user_id
+    match = match_access(match_id)
     if not match or match.status != 'completed':
         return jsonify({'success': False, 'message': 'Solo tras partido completado'}), 400
-
-    participation = MatchParticipation.query.filter_by(
-        match_id=match_id, user_id=user.id
-    ).first()
-    if not participation:
+    if match.participation_id is None:
         return jsonify({'success': False, 'message': 'No jugaste este partido'}), 403
 
     if 'photo' not in request.files:
@@ -115,12 +135,36 @@ def upload_photo(match_id):
     if file.filename == '' or not allowed_file(file.filename):
         return jsonify({'success': False, 'message': 'Fichero no permitido'}), 400
 
-    filename = secure_filename(f"match{match_id}_user{user.id}_{int(datetime.utcnow().timestamp())}.{file.filename.rsplit('.',1)[1]}")
-    filepath = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(filepath)
+    ext = file.filename.rsplit('.', 1)[1].lower()
+    try:
+        blob = store_upload(file, ext)
+    except UploadTooLarge:
+        return jsonify({'success': False, 'message': 'Fichero demasiado grande'}), 413
 
-    mp = MatchPhoto(match_id=match_id, user_id=user.id, file_path=filepath)
+    mp = MatchPhoto(match_id=match_id, user_id=user_id, blob_hash=blob.hash)
+    apply_blob(mp, blob)
     db.session.add(mp)
+    db.session.flush()
+    bump_league_version(match.league_id)
+    events.publish(match_id, match.league_id, 'photo_added', photo_id=mp.id, status=mp.status)
     db.session.commit()
 
-    return jsonify({'success': True, 'message': 'Foto subida', 'data': {'file_path': filepath}}), 201
+    # Miniatura, versión web y limpieza de EXIF en segundo plano (una vez por contenido)
+    if mp.status == 'pending':
+        schedule_processing(current_app._get_current_object(), mp.id)
+
+    return jsonify({'success': True, 'message': 'Foto subida', 'data': mp.to_dict()}), 201
+
+@result_bp.route('/uploads/<path:filename>', methods=['GET'])
+@query_token_required
+def get_upload(filename):
+    """
+    Servir fotos y sus variantes a los miembros de la liga del partido. El
+    token llega en ?token= (las etiquetas <img> no envían cabeceras).
+    """
+    if not any(is_member(league_id) for league_id in photo_league_ids(filename)):
+        return jsonify({'success': False, 'message': 'Foto no encontrada'}), 404
+    response = send_from_directory(UPLOAD_FOLDER, filename, max_age=31536000)
+    # Contenido inmutable, pero privado: ningún proxy o CDN lo guarda
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
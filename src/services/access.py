@@ -0,0 +1,100 @@
+"""
+Autorización por petición: ligas del usuario y su contexto en un partido.
+
+Las ligas del usuario de la petición llegan normalmente en el token de
+acceso (claim `leagues`). Si no están ahí, las de cada usuario se cachean
+como un frozenset en una TTLCache de proceso (MEMBERSHIP_CACHE_TTL, 30 s)
+y además se memorizan en `g`, así que una petición consulta la membresía
+como mucho una vez.
+
+- Un "sí" del token o de la caché se da por bueno: una baja (delete_league)
+  tarda como mucho la vida del token de acceso o el TTL en llegar a los
+  demás workers; la caché de este worker se invalida al momento.
+- Un "no" se vuelve a comprobar contra la BBDD: quien acaba de unirse en
+  otro worker no recibe un 403 falso.
+
+match_access(match_id) resuelve en una sola consulta lo que las rutas de
+partido necesitan para autorizar: liga, fecha, estado, creador, versión de
+la liga y la participación y carta del usuario en el partido.
+"""
+import os
+
+from flask import g
+
+from src.models import db
+from src.models.league import LeagueMembership, LeagueVersion
+from src.models.match import Match, MatchParticipation, CardAssignment
+from src.utils.cache import TTLCache
+
+membership_cache = TTLCache(
+    'league_memberships',
+    maxsize=int(os.getenv('MEMBERSHIP_CACHE_SIZE', 4096)),
+    ttl=int(os.getenv('MEMBERSHIP_CACHE_TTL', 30))
+)
+
+
+def _load_league_ids(user_id):
+    return frozenset(
+        league_id for (league_id,) in db.session.query(LeagueMembership.league_id)
+        .filter(LeagueMembership.user_id == user_id).all()
+    )
+
+
+def user_league_ids(user_id, fresh=False):
+    """Ligas del usuario (frozenset). fresh=True ignora la caché y la renueva."""
+    memo = g.setdefault('league_ids', {})
+    if not fresh and user_id in memo:
+        return memo[user_id]
+    league_ids = None if fresh else membership_cache.get(user_id)
+    if league_ids is None:
+        league_ids = _load_league_ids(user_id)
+        membership_cache.set(user_id, league_ids)
+    memo[user_id] = league_ids
+    return league_ids
+
+
+def is_member(league_id, user_id=None):
+    """¿Pertenece el usuario (por defecto el de la petición) a la liga?"""
+    if user_id is None:
+        user_id = g.current_user_id
+    # Ligas embebidas en el token de acceso (token_required): sin consultas
+    if user_id == g.get('current_user_id') and league_id in g.get('token_leagues', ()):
+        return True
+    if league_id in user_league_ids(user_id):
+        return True
+    # Puede haberse unido hace nada en otro worker: confirmar en la BBDD
+    return league_id in user_league_ids(user_id, fresh=True)
+
+
+def invalidate_memberships(user_ids):
+    """Olvidar las ligas cacheadas de estos usuarios (alta o baja en una liga)."""
+    memo = g.get('league_ids', {})
+    for user_id in set(user_ids):
+        membership_cache.invalidate(user_id)
+        memo.pop(user_id, None)
+
+
+def match_access(match_id, user_id=None):
+    """
+    Contexto del usuario en un partido, memorizado por petición. Devuelve una
+    fila con league_id, date, status, created_by_id, version,
+    participation_id, team y card_id (estos tres None si no juega), o None
+    si el partido no existe. No comprueba la membresía: ver is_member.
+    """
+    if user_id is None:
+        user_id = g.current_user_id
+    memo = g.setdefault('match_access', {})
+    key = (match_id, user_id)
+    if key not in memo:
+        memo[key] = db.session.query(
+            Match.league_id, Match.date, Match.status, Match.created_by_id,
+            LeagueVersion.version,
+            MatchParticipation.id.label('participation_id'), MatchParticipation.team,
+            CardAssignment.card_id
+        ).outerjoin(LeagueVersion, LeagueVersion.league_id == Match.league_id)\
+            .outerjoin(MatchParticipation, db.and_(
+                MatchParticipation.match_id == Match.id, MatchParticipation.user_id == user_id
+            ))\
+            .outerjoin(CardAssignment, CardAssignment.participation_id == MatchParticipation.id)\
+            .filter(Match.id == match_id).first()
+    return memo[key]
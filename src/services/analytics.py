@@ -0,0 +1,127 @@
+"""
+Analítica de liga: matrices de pareja y cara a cara, rachas y forma.
+
+Todas las participaciones de la liga se leen en una única consulta columnar y
+se procesan con pandas. El resultado se cachea por (liga, versión de liga,
+N), así que solo se recalcula cuando la liga cambia.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.models import db
+from src.models.match import Match, MatchParticipation
+from src.utils.cache import TTLCache
+
+DEFAULT_FORM_MATCHES = 5
+
+analytics_cache = TTLCache(
+    'league_analytics',
+    maxsize=int(os.getenv('ANALYTICS_CACHE_SIZE', 256)),
+    ttl=int(os.getenv('ANALYTICS_CACHE_TTL', 3600))
+)
+
+
+def _load_frame(league_id):
+    rows = db.session.query(
+        Match.id, Match.date, Match.winner_team,
+        MatchParticipation.user_id, MatchParticipation.team
+    ).join(MatchParticipation, MatchParticipation.match_id == Match.id)\
+        .filter(
+            Match.league_id == league_id,
+            Match.status == 'completed',
+            Match.winner_team.in_((1, 2))
+        ).all()
+    df = pd.DataFrame(rows, columns=['match_id', 'date', 'winner_team', 'user_id', 'team'])
+    df['win'] = (df['team'] == df['winner_team']).astype(np.int64)
+    return df.sort_values(['user_id', 'date', 'match_id'], kind='stable').reset_index(drop=True)
+
+
+def _pair_matrix(df, same_team):
+    """
+    Matriz dispersa jugador x jugador: partidos jugados juntos (same_team) o
+    enfrentados, y victorias del jugador de la fila.
+    """
+    left = df[['match_id', 'team', 'user_id', 'win']]
+    right = df[['match_id', 'team', 'user_id']]
+    pairs = left.merge(right, on='match_id', suffixes=('', '_other'))
+    mask = pairs['user_id'].to_numpy() != pairs['user_id_other'].to_numpy()
+    same = pairs['team'].to_numpy() == pairs['team_other'].to_numpy()
+    pairs = pairs[mask & (same if same_team else ~same)]
+
+    grouped = pairs.groupby(['user_id', 'user_id_other'], sort=True)['win'].agg(['size', 'sum'])
+    users = grouped.index.get_level_values(0).to_numpy()
+    others = grouped.index.get_level_values(1).to_numpy()
+    played = grouped['size'].to_numpy()
+    wins = grouped['sum'].to_numpy()
+    rates = np.round(wins / played, 3)
+
+    matrix = {}
+    for uid, other, n, w, rate in zip(users, others, played, wins, rates):
+        matrix.setdefault(str(uid), {})[str(other)] = {
+            'played': int(n), 'wins': int(w), 'win_rate': float(rate)
+        }
+    return matrix
+
+
+def _streaks(df):
+    """Racha actual (positiva si gana, negativa si pierde) y mejor racha de victorias."""
+    user = df['user_id']
+    run_id = ((df['win'] != df.groupby('user_id')['win'].shift()) | (user != user.shift())).cumsum()
+    runs = df.assign(run=run_id).groupby(['user_id', 'run'], sort=True)['win'].agg(['size', 'first'])
+
+    longest = runs[runs['first'] == 1].groupby(level=0)['size'].max()
+    last = runs.groupby(level=0).tail(1).reset_index()
+
+    result = {}
+    for uid, size, won in zip(last['user_id'], last['size'], last['first']):
+        result[str(uid)] = {
+            'current': int(size) if won else -int(size),
+            'longest_win': int(longest.get(uid, 0))
+        }
+    return result
+
+
+def _form(df, last_n):
+    """Resultados de los últimos N partidos de cada jugador (W/L) y su % de victorias."""
+    recent = df.groupby('user_id').tail(last_n)
+    result = {}
+    for uid, wins in recent.groupby('user_id')['win']:
+        values = wins.to_numpy()
+        result[str(uid)] = {
+            'last': ''.join('W' if v else 'L' for v in values),
+            'win_rate': round(float(values.mean()), 3)
+        }
+    return result
+
+
+def compute_league_analytics(league_id, last_n=DEFAULT_FORM_MATCHES):
+    df = _load_frame(league_id)
+    if df.empty:
+        return {
+            'league_id': league_id,
+            'matches_analyzed': 0,
+            'players': [],
+            'partner_win_rate': {},
+            'head_to_head': {},
+            'streaks': {},
+            'form': {}
+        }
+    return {
+        'league_id': league_id,
+        'matches_analyzed': int(df['match_id'].nunique()),
+        'players': sorted(int(u) for u in df['user_id'].unique()),
+        'partner_win_rate': _pair_matrix(df, same_team=True),
+        'head_to_head': _pair_matrix(df, same_team=False),
+        'streaks': _streaks(df),
+        'form': _form(df, last_n)
+    }
+
+
+def league_analytics(league_id, version, last_n=DEFAULT_FORM_MATCHES):
+    """Analítica cacheada por versión de liga."""
+    return analytics_cache.get_or_load(
+        (league_id, version, last_n),
+        lambda: compute_league_analytics(league_id, last_n)
+    )
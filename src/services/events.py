@@ -0,0 +1,236 @@
+"""
+Eventos en directo de los partidos (Server-Sent Events).
+
+Las rutas que cambian un partido llaman a publish(), que añade una fila a
+match_events en la misma transacción: si no hay commit, no hay evento. Cada
+worker tiene un hilo que lee los eventos nuevos (id > último visto) cada
+EVENTS_POLL_SECONDS y los reparte a los streams abiertos en ese proceso, así
+que un cambio hecho en cualquier worker llega a todos. Los commits hechos en
+el propio worker despiertan el hilo en el acto. Sin streams abiertos el hilo
+no consulta la BBDD.
+
+Los ids se asignan al insertar, no al hacer commit: una transacción lenta
+puede hacer visible el id 41 después del 42. Los huecos por debajo del último
+id visto se siguen consultando durante EVENTS_GAP_SECONDS; pasado ese tiempo
+se dan por ids perdidos (rollback).
+
+Cada stream ocupa un hilo mientras dura: solo se sirven con worker gthread o
+uvicorn, hasta EVENTS_MAX_STREAMS por worker (la mitad de sus hilos). Con
+worker sync el límite es 0 y la ruta responde 503; el cliente sigue
+consultando GET /api/matches/<id> como antes.
+
+Variables:
+    EVENTS_MAX_STREAMS        streams simultáneos por worker (según la clase de worker)
+    EVENTS_POLL_SECONDS       intervalo de lectura de match_events (1)
+    EVENTS_HEARTBEAT_SECONDS  comentario de latido si no hay eventos (15)
+    EVENTS_STREAM_SECONDS     duración máxima de un stream; el cliente reconecta (600)
+    EVENTS_GAP_SECONDS        tiempo que se espera un id que falta (30)
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.models import db
+from src.models.match import MatchEvent
+
+logger = logging.getLogger(__name__)
+
+
+def _default_max_streams():
+    worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+    if worker_class == 'gthread':
+        return int(os.getenv('GUNICORN_THREADS', 8)) // 2
+    if worker_class == 'uvicorn':
+        return int(os.getenv('ASGI_THREADS', 32)) // 2
+    return 0
+
+
+MAX_STREAMS = int(os.getenv('EVENTS_MAX_STREAMS', _default_max_streams()))
+POLL_SECONDS = float(os.getenv('EVENTS_POLL_SECONDS', 1))
+HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+STREAM_SECONDS = float(os.getenv('EVENTS_STREAM_SECONDS', 600))
+GAP_SECONDS = float(os.getenv('EVENTS_GAP_SECONDS', 30))
+MAX_GAPS = 1000
+RETRY_MS = 3000
+REPLAY_LIMIT = 100
+QUEUE_SIZE = 100
+POLL_BATCH = 500
+
+_COLUMNS = (MatchEvent.id, MatchEvent.match_id, MatchEvent.type, MatchEvent.payload)
+
+
+def publish(match_id, league_id, type, **data):
+    """Registra un evento del partido en la transacción en curso."""
+    db.session.add(MatchEvent(
+        match_id=match_id, league_id=league_id, type=type,
+        payload=json.dumps({'match_id': match_id, **data})
+    ))
+    db.session.info['match_events'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_after_commit(session):
+    if session.info.pop('match_events', False):
+        broker.wake()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('match_events', None)
+
+
+class Subscription:
+    def __init__(self, match_id):
+        self.match_id = match_id
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self.overflow = False
+
+
+class _Broker:
+    """Streams abiertos en este proceso y el hilo que les reparte los eventos."""
+
+    def __init__(self):
+        self._subscribers = {}      # match_id -> set(Subscription)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.last_id = 0
+        self._gaps = {}             # id que falta por debajo de last_id -> cuándo se detectó
+
+    def subscribe(self, app, match_id):
+        """Nueva suscripción, o None si este worker no admite más streams."""
+        with self._lock:
+            if self._count >= MAX_STREAMS:
+                return None
+            if not self._count:
+                # Sin streams no se leía match_events: empezar desde ahora
+                self.last_id = db.session.query(db.func.max(MatchEvent.id)).scalar() or 0
+                self._gaps.clear()
+            sub = Subscription(match_id)
+            self._subscribers.setdefault(match_id, set()).add(sub)
+            self._count += 1
+            if self._thread is None or self._pid != os.getpid():
+                self._thread = threading.Thread(
+                    target=self._run, args=(app,), name='match-events', daemon=True
+                )
+                self._pid = os.getpid()
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.match_id)
+            if subs and sub in subs:
+                subs.discard(sub)
+                self._count -= 1
+                if not subs:
+                    del self._subscribers[sub.match_id]
+
+    def wake(self):
+        self._wake.set()
+
+    def stream_count(self):
+        return self._count
+
+    def _run(self, app):
+        while True:
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+            if not self._count:
+                continue
+            try:
+                self._poll(app)
+            except Exception:
+                logger.exception('Error leyendo match_events')
+                time.sleep(POLL_SECONDS)
+
+    def _poll(self, app):
+        now = time.monotonic()
+        with self._lock:
+            for gap_id in [i for i, seen in self._gaps.items() if now - seen > GAP_SECONDS]:
+                del self._gaps[gap_id]
+            last_id, gaps = self.last_id, list(self._gaps)
+        with app.app_context():
+            try:
+                condition = MatchEvent.id > last_id
+                if gaps:
+                    condition = db.or_(condition, MatchEvent.id.in_(gaps))
+                rows = db.session.query(*_COLUMNS).filter(condition)\
+                    .order_by(MatchEvent.id).limit(POLL_BATCH).all()
+            finally:
+                db.session.remove()
+        with self._lock:
+            for row in rows:
+                if row.id <= self.last_id:
+                    if self._gaps.pop(row.id, None) is None:
+                        continue    # ya repartido
+                else:
+                    # Ids saltados: pueden ser transacciones que aún no han hecho commit
+                    for gap_id in range(max(self.last_id + 1, row.id - MAX_GAPS), row.id):
+                        self._gaps[gap_id] = now
+                    self.last_id = row.id
+                for sub in self._subscribers.get(row.match_id, ()):
+                    try:
+                        sub.queue.put_nowait(row)
+                    except queue.Full:
+                        # Cliente lento: se cierra su stream y reconecta con Last-Event-ID
+                        sub.overflow = True
+
+
+broker = _Broker()
+
+
+def replay(match_id, after_id):
+    """Eventos del partido posteriores a after_id (los REPLAY_LIMIT más recientes)."""
+    rows = db.session.query(*_COLUMNS)\
+        .filter(MatchEvent.match_id == match_id, MatchEvent.id > after_id)\
+        .order_by(MatchEvent.id.desc()).limit(REPLAY_LIMIT).all()
+    return rows[::-1]
+
+
+def _format(row):
+    return f'id: {row.id}\nevent: {row.type}\ndata: {row.payload}\n\n'
+
+
+def stream(sub, replayed):
+    """
+    Generador del cuerpo SSE: primero los eventos reenviados, después los
+    nuevos, con un comentario de latido cuando no hay nada que enviar. No usa
+    la BBDD, así que no retiene ninguna conexión del pool.
+    """
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        replayed_ids = set()
+        for row in replayed:
+            replayed_ids.add(row.id)
+            yield _format(row)
+        deadline = time.monotonic() + STREAM_SECONDS
+        while not sub.overflow and time.monotonic() < deadline:
+            try:
+                row = sub.queue.get(timeout=HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            if row.id in replayed_ids:
+                continue    # ya enviado en el reenvío
+            yield _format(row)
+    finally:
+        broker.unsubscribe(sub)
+
+
+def prune_events(max_age_hours):
+    """Borra los eventos más antiguos que max_age_hours. Devuelve cuántos."""
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    deleted = MatchEvent.query.filter(MatchEvent.created_at < cutoff)\
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
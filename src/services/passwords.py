@@ -0,0 +1,111 @@
+"""
+Hash y verificación de contraseñas fuera del hilo de la petición.
+
+El KDF de werkzeug (scrypt por defecto) es caro en CPU y memoria a propósito.
+Se ejecuta en un pool de procesos acotado por worker, de modo que una ráfaga
+de logins no ocupa más de PASSWORD_HASH_PROCESSES núcleos por worker. Con
+worker gthread o uvicorn los demás hilos siguen atendiendo mientras tanto. Si
+hay más de PASSWORD_HASH_QUEUE hashes en vuelo y no queda hueco en
+PASSWORD_HASH_WAIT segundos, se lanza HashingBusy y la ruta responde 503.
+
+PASSWORD_HASH_METHOD fija el método y sus parámetros en el formato de
+werkzeug (p. ej. `scrypt:32768:8:1` o `pbkdf2:sha256:600000`). Al hacer
+login con un hash de parámetros distintos, verify_password devuelve un hash
+nuevo para guardar (rehash transparente).
+
+Variables:
+    PASSWORD_HASH_METHOD     método de werkzeug (scrypt:32768:8:1)
+    PASSWORD_HASH_PROCESSES  procesos del pool por worker; 0 = en línea (2)
+    PASSWORD_HASH_QUEUE      hashes en vuelo por worker (2 x procesos)
+    PASSWORD_HASH_WAIT       segundos de espera por un hueco (5)
+
+Este módulo no importa la app: es lo único que cargan los procesos del pool.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PROCESSES = int(os.getenv('PASSWORD_HASH_PROCESSES', 2))
+QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 2 * max(PROCESSES, 1)))
+WAIT_SECONDS = float(os.getenv('PASSWORD_HASH_WAIT', 5))
+
+
+class HashingBusy(Exception):
+    """Demasiados hashes en vuelo en este worker."""
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+@lru_cache(maxsize=None)
+def _canonical(method):
+    """Prefijo que werkzeug guarda para el método ('scrypt' -> 'scrypt:32768:8:1')."""
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def _verify(pwhash, password, method):
+    """(válida, hash nuevo o None), en una sola tarea del pool."""
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if pwhash.split('$', 1)[0] != _canonical(method):
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+class _Pool:
+    """Pool de procesos perezoso: se crea en el worker, nunca en el master."""
+
+    def __init__(self, processes, queue):
+        self.processes = processes
+        self._slots = threading.BoundedSemaphore(queue)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # spawn: los hijos no heredan conexiones ni hilos del worker
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(timeout=WAIT_SECONDS):
+            raise HashingBusy()
+        try:
+            if not self.processes:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        except BrokenProcessPool:
+            # Un proceso del pool murió (p. ej. sin memoria): se recrea en la próxima
+            with self._lock:
+                self._executor = None
+            raise
+        finally:
+            self._slots.release()
+
+
+_pool = _Pool(PROCESSES, QUEUE)
+
+
+def hash_password(password):
+    return _pool.run(_hash, password, METHOD)
+
+
+def verify_password(pwhash, password):
+    """
+    Comprueba la contraseña. Devuelve (válida, hash nuevo): el hash nuevo
+    solo viene si es válida y el guardado usa otro método o parámetros.
+    """
+    return _pool.run(_verify, pwhash, password, METHOD)
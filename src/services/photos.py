@@ -0,0 +1,338 @@
+"""
+Almacenamiento y procesado de fotos de partido.
+
+La subida se copia a disco por bloques con un límite de tamaño y la petición
+responde en cuanto el original está guardado. Un pool de hilos genera después
+con Pillow una miniatura, una versión web y una copia a tamaño completo sin
+metadatos EXIF (`_full`), y registra las dimensiones en MatchPhoto.
+
+Los ficheros se guardan por contenido: la clave es el SHA-256 de los bytes
+subidos, repartidos en subdirectorios `ab/cd/<hash>.<ext>`, y el original no
+se modifica nunca para que el nombre siga siendo su hash. La misma imagen
+subida por los cuatro jugadores se escribe y procesa una sola vez y las
+MatchPhoto la referencian (PhotoBlob.ref_count). `flask gc-photos` borra
+los ficheros que ya no referencia nadie. GET /api/results/uploads/<ruta>
+los sirve solo a miembros de las ligas que los muestran (photo_league_ids).
+"""
+import hashlib
+import logging
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from PIL import Image, ImageOps
+from sqlalchemy import func
+
+from src.models import db
+from src.models.bulk import insert_ignore
+from src.models.league import bump_league_version
+from src.models.match import Match
+from src.models.rating import MatchPhoto, PhotoBlob
+from src.services import events
+from src.utils.uploads import UPLOAD_FOLDER, stored_path, upload_path, variant_path, full_path
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_MB', 10)) * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# Los ficheros sin referencias más recientes que esto no se borran: pueden
+# pertenecer a una subida en curso que aún no ha hecho commit.
+GC_GRACE_SECONDS = int(os.getenv('PHOTO_GC_GRACE_SECONDS', 3600))
+
+TMP_FOLDER = os.path.join(UPLOAD_FOLDER, 'tmp')
+
+# ab/cd/<hash>.<ext> y sus variantes _thumb/_web/_full
+_BLOB_NAME = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(_thumb|_web|_full)?\.\w+$')
+
+THUMB_SIZE = (320, 320)
+WEB_SIZE = (1280, 1280)
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('PHOTO_WORKERS', 2)),
+    thread_name_prefix='photos'
+)
+
+os.makedirs(TMP_FOLDER, exist_ok=True)
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def blob_path(digest, ext):
+    return os.path.join(UPLOAD_FOLDER, digest[:2], digest[2:4], f'{digest}.{ext}')
+
+
+def save_upload(file, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Copia el fichero subido a un temporal por bloques calculando su SHA-256;
+    aborta si supera max_bytes. Devuelve (ruta temporal, hash, tamaño).
+    """
+    digest = hashlib.sha256()
+    written = 0
+    tmp_path = os.path.join(TMP_FOLDER, f'{os.getpid()}_{time.monotonic_ns()}.part')
+    try:
+        with open(tmp_path, 'wb') as out:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), written
+
+
+def store_upload(file, ext, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Guarda la subida en el almacén por contenido y suma una referencia al
+    PhotoBlob (creándolo si es nuevo). Si el contenido ya existía no se vuelve
+    a escribir. No hace commit. Devuelve el PhotoBlob.
+    """
+    tmp_path, digest, size = save_upload(file, max_bytes)
+    existing = db.session.get(PhotoBlob, digest)
+    if existing is not None:
+        ext = existing.ext
+
+    target = blob_path(digest, ext)
+    if os.path.exists(target):
+        # Refrescar mtime: el GC respeta los ficheros tocados recientemente
+        os.utime(target)
+        os.remove(tmp_path)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp_path, target)
+
+    insert_ignore(PhotoBlob, [{
+        'hash': digest, 'ext': ext, 'size': size, 'ref_count': 0,
+        'status': 'pending', 'created_at': datetime.utcnow()
+    }])
+    PhotoBlob.query.filter_by(hash=digest).update(
+        {PhotoBlob.ref_count: PhotoBlob.ref_count + 1}, synchronize_session=False
+    )
+    return db.session.get(PhotoBlob, digest, populate_existing=True)
+
+
+def blob_file(blob):
+    return blob_path(blob.hash, blob.ext)
+
+
+def apply_blob(photo, blob):
+    """Copia a la MatchPhoto el estado y las variantes de su blob."""
+    photo.file_path = stored_path(blob_file(blob))
+    photo.status = blob.status
+    photo.width, photo.height = blob.width, blob.height
+    if blob.status == 'ready':
+        photo.thumb_path = variant_path(photo.file_path, 'thumb')
+        photo.web_path = variant_path(photo.file_path, 'web')
+
+
+def _save_resized(image, size, path):
+    resized = image.copy()
+    resized.thumbnail(size, Image.LANCZOS)
+    if resized.mode not in ('RGB', 'L'):
+        resized = resized.convert('RGB')
+    resized.save(path, 'JPEG', quality=85, optimize=True)
+
+
+def generate_variants(filepath, clean_path=None):
+    """
+    Orienta la imagen según EXIF, guarda una copia sin metadatos en
+    clean_path (por defecto reescribe el original) y crea las variantes.
+    Devuelve (ancho, alto, miniatura, web).
+    """
+    clean_path = clean_path or filepath
+    with Image.open(filepath) as original:
+        fmt = original.format
+        is_animated = getattr(original, 'is_animated', False)
+        image = ImageOps.exif_transpose(original)
+        width, height = image.size
+
+        # Quitar EXIF (GPS, dispositivo...); los GIF animados se dejan tal cual
+        if not is_animated and original.getexif():
+            params = {'quality': 95} if fmt == 'JPEG' else {}
+            image.save(clean_path, fmt, **params)
+        elif clean_path != filepath:
+            shutil.copyfile(filepath, clean_path)
+
+        thumb = variant_path(filepath, 'thumb')
+        web = variant_path(filepath, 'web')
+        _save_resized(image, THUMB_SIZE, thumb)
+        _save_resized(image, WEB_SIZE, web)
+    return width, height, thumb, web
+
+
+def _generate(target, filepath, clean_path=None):
+    """Genera las variantes de filepath y anota el resultado en target."""
+    try:
+        target.width, target.height, _, _ = generate_variants(filepath, clean_path)
+        target.status = 'ready'
+    except Exception:
+        logger.exception('No se pudo procesar la foto %s', filepath)
+        target.status = 'failed'
+
+
+def _process(photo_id):
+    photo = db.session.get(MatchPhoto, photo_id)
+    if photo is None:
+        return
+
+    if photo.blob_hash is None:
+        # Foto anterior al almacén por contenido
+        _generate(photo, upload_path(photo.file_path))
+        if photo.status == 'ready':
+            photo.thumb_path = variant_path(photo.file_path, 'thumb')
+            photo.web_path = variant_path(photo.file_path, 'web')
+        photos = [photo]
+    else:
+        blob = db.session.get(PhotoBlob, photo.blob_hash)
+        if blob.status != 'ready':
+            # El original es la clave del blob: la copia limpia va aparte
+            path = blob_file(blob)
+            _generate(blob, path, full_path(path))
+        # Todas las fotos que comparten el blob quedan listas a la vez
+        photos = MatchPhoto.query.filter(
+            MatchPhoto.blob_hash == blob.hash,
+            MatchPhoto.status == 'pending'
+        ).all()
+        if photo not in photos:
+            photos.append(photo)
+        for p in photos:
+            apply_blob(p, blob)
+    _notify(photos)
+    db.session.commit()
+
+
+def _notify(photos):
+    # La respuesta de partido/liga cambia (URLs de variantes, estado): invalidar
+    # ETags y avisar a los streams abiertos
+    leagues = dict(db.session.query(Match.id, Match.league_id).filter(
+        Match.id.in_({p.match_id for p in photos})
+    ).all())
+    for league_id in set(leagues.values()):
+        bump_league_version(league_id)
+    for p in photos:
+        events.publish(p.match_id, leagues[p.match_id], 'photo_processed', photo_id=p.id, status=p.status)
+
+
+def _process_photo(app, photo_id):
+    """
+    Tarea del pool. Un error que no sea de Pillow (BBDD, disco) se quedaría
+    en el Future sin que nadie lo lea: se registra y la foto pasa a failed.
+    """
+    with app.app_context():
+        try:
+            _process(photo_id)
+        except Exception:
+            logger.exception('Error procesando la foto %s', photo_id)
+            db.session.rollback()
+            try:
+                photo = db.session.get(MatchPhoto, photo_id)
+                if photo is not None and photo.status == 'pending':
+                    photo.status = 'failed'
+                    _notify([photo])
+                    db.session.commit()
+            except Exception:
+                logger.exception('No se pudo marcar como fallida la foto %s', photo_id)
+                db.session.rollback()
+
+
+def schedule_processing(app, photo_id):
+    """Encola la generación de variantes; la petición no espera."""
+    return _executor.submit(_process_photo, app, photo_id)
+
+
+def photo_league_ids(stored):
+    """Ligas de los partidos que muestran el fichero (ruta relativa a UPLOAD_FOLDER)."""
+    query = db.session.query(Match.league_id).join(MatchPhoto, MatchPhoto.match_id == Match.id)
+    match = _BLOB_NAME.match(stored)
+    if match:
+        if match.group(2) is None:
+            return set()    # original con EXIF: se sirve la copia _full
+        query = query.filter(MatchPhoto.blob_hash == match.group(1))
+    else:
+        # Fotos anteriores al almacén por contenido: pocas, por ruta exacta
+        query = query.filter(db.or_(
+            MatchPhoto.file_path == stored, MatchPhoto.thumb_path == stored,
+            MatchPhoto.web_path == stored
+        ))
+    return {league_id for (league_id,) in query.distinct()}
+
+
+def process_pending(app):
+    """Procesa en primer plano las fotos pendientes (p. ej. tras reiniciar un worker)."""
+    ids = [pid for (pid,) in db.session.query(MatchPhoto.id)
+           .filter(MatchPhoto.status == 'pending').all()]
+    for photo_id in ids:
+        _process_photo(app, photo_id)
+    return len(ids)
+
+
+def collect_garbage(grace_seconds=GC_GRACE_SECONDS, dry_run=False):
+    """
+    Recuenta las referencias de cada PhotoBlob, elimina los que ya no usa
+    ninguna MatchPhoto (p. ej. tras delete_match/delete_league) y borra del
+    disco los ficheros que no pertenecen a ningún blob ni foto, incluidos
+    temporales abandonados. Respeta un margen de gracia por antigüedad.
+    """
+    result = {'refcounts_fixed': 0, 'blobs_removed': 0, 'files_removed': 0, 'bytes_freed': 0}
+    # mtime en segundos epoch reales; created_at es UTC naive
+    cutoff = time.time() - grace_seconds
+    created_cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    removed = set()
+
+    counts = dict(
+        db.session.query(MatchPhoto.blob_hash, func.count(MatchPhoto.id))
+        .filter(MatchPhoto.blob_hash.isnot(None))
+        .group_by(MatchPhoto.blob_hash).all()
+    )
+    for blob in PhotoBlob.query.all():
+        refs = counts.get(blob.hash, 0)
+        if blob.ref_count != refs:
+            result['refcounts_fixed'] += 1
+            blob.ref_count = refs
+        if refs == 0 and blob.created_at < created_cutoff:
+            path = blob_file(blob)
+            if os.path.exists(path) and os.path.getmtime(path) >= cutoff:
+                continue
+            result['blobs_removed'] += 1
+            removed.add(blob.hash)
+            db.session.delete(blob)
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+
+    referenced = set()
+    for blob in PhotoBlob.query.all():
+        if blob.hash in removed:
+            continue
+        path = blob_file(blob)
+        referenced.update((path, variant_path(path, 'thumb'), variant_path(path, 'web'), full_path(path)))
+    for paths in db.session.query(
+        MatchPhoto.file_path, MatchPhoto.thumb_path, MatchPhoto.web_path
+    ).filter(MatchPhoto.blob_hash.is_(None)):
+        referenced.update(upload_path(p) for p in paths if p)
+
+    for root, _, files in os.walk(UPLOAD_FOLDER):
+        for name in files:
+            path = os.path.join(root, name)
+            if path in referenced:
+                continue
+            stat = os.stat(path)
+            if stat.st_mtime >= cutoff:
+                continue
+            result['files_removed'] += 1
+            result['bytes_freed'] += stat.st_size
+            if not dry_run:
+                os.remove(path)
+    return result
@@ -0,0 +1,132 @@
+"""
+Emisión, validación y revocación de tokens JWT.
+
+- Token de acceso (type=access): corto (JWT_ACCESS_MINUTES, 15) y con la
+  identidad embebida: user_id, username y las ligas del usuario. Con él,
+  token_required no consulta la BBDD; una alta o baja en una liga se refleja
+  como mucho al renovarlo. La claim username es solo informativa.
+- Token de refresco (type=refresh): largo (JWT_EXP_DELTA_DAYS, 7) y solo con
+  user_id. POST /api/auth/refresh lo canjea una única vez por un par nuevo,
+  releyendo username y ligas de la BBDD.
+
+Ambos llevan `jti`. Los revocados (logout, refresco ya canjeado) se guardan
+en revoked_tokens hasta que caducan; cada worker mantiene una copia en
+memoria que recarga como mucho cada TOKEN_REVOCATION_REFRESH_SECONDS (10),
+así que una revocación llega a los demás workers en ese plazo. El canje de
+un refresco se comprueba siempre contra la BBDD.
+
+Los tokens antiguos (solo user_id, sin type) se siguen aceptando hasta que
+caducan; token_required los resuelve con la caché de identidades.
+"""
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import jwt
+from flask import current_app
+
+from src.models import db
+from src.models.bulk import insert_ignore
+from src.models.user import RevokedToken
+
+ACCESS_MINUTES = int(os.getenv('JWT_ACCESS_MINUTES', 15))
+REVOCATION_REFRESH_SECONDS = float(os.getenv('TOKEN_REVOCATION_REFRESH_SECONDS', 10))
+
+# Por encima de este número de ligas no se embeben en el token (cabecera
+# demasiado grande): las rutas recurren a la caché de membresías.
+MAX_LEAGUE_CLAIMS = 200
+
+
+def _encode(payload, lifetime):
+    now = datetime.utcnow()
+    payload.update({'jti': uuid.uuid4().hex, 'iat': now, 'exp': now + lifetime})
+    return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')
+
+
+def issue_tokens(user_id, username, league_ids):
+    """
+    Par acceso/refresco para la respuesta de register, login y refresh.
+
+    La claim username solo distingue los tokens actuales de los antiguos:
+    queda desfasada si el usuario cambia de nombre, así que nunca se usa
+    para mostrar ni para autorizar (el nombre se lee de la BBDD).
+    """
+    access = {'type': 'access', 'user_id': user_id, 'username': username}
+    league_ids = sorted(league_ids)
+    if len(league_ids) <= MAX_LEAGUE_CLAIMS:
+        access['leagues'] = league_ids
+    refresh_days = int(current_app.config.get('JWT_EXP_DELTA_DAYS', 7))
+    return {
+        'token': _encode(access, timedelta(minutes=ACCESS_MINUTES)),
+        'refresh_token': _encode({'type': 'refresh', 'user_id': user_id}, timedelta(days=refresh_days)),
+        'expires_in': ACCESS_MINUTES * 60,
+    }
+
+
+def decode_token(token, token_type='access'):
+    """
+    Valida firma, caducidad, tipo y revocación. Lanza jwt.InvalidTokenError
+    (o ExpiredSignatureError) si no es válido. Los tokens antiguos sin type
+    cuentan como de acceso.
+    """
+    payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+    if payload.get('type', 'access') != token_type:
+        raise jwt.InvalidTokenError('Tipo de token incorrecto')
+    jti = payload.get('jti')
+    if jti and revocation_list.is_revoked(jti):
+        raise jwt.InvalidTokenError('Token revocado')
+    return payload
+
+
+class RevocationList:
+    """Copia en memoria de los jti revocados y aún no caducados."""
+
+    def __init__(self, refresh_seconds):
+        self.refresh_seconds = refresh_seconds
+        self._revoked = {}          # jti -> expires_at
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _reload(self):
+        now = datetime.utcnow()
+        rows = db.session.query(RevokedToken.jti, RevokedToken.expires_at)\
+            .filter(RevokedToken.expires_at > now).all()
+        with self._lock:
+            self._revoked = dict(rows)
+            self._loaded_at = time.monotonic()
+
+    def is_revoked(self, jti):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds:
+            self._reload()
+        return jti in self._revoked
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+
+revocation_list = RevocationList(REVOCATION_REFRESH_SECONDS)
+
+
+def revoke(payload):
+    """
+    Revoca un token ya decodificado (en la transacción en curso). Devuelve
+    False si ya estaba revocado: sirve para canjear un refresco una sola vez.
+    """
+    expires_at = datetime.utcfromtimestamp(payload['exp'])
+    inserted = insert_ignore(RevokedToken, [{
+        'jti': payload['jti'], 'user_id': payload['user_id'],
+        'expires_at': expires_at, 'revoked_at': datetime.utcnow()
+    }])
+    revocation_list.add(payload['jti'], expires_at)
+    return inserted == 1
+
+
+def prune_revoked():
+    """Borra las revocaciones de tokens ya caducados. Devuelve cuántas."""
+    deleted = RevokedToken.query.filter(RevokedToken.expires_at <= datetime.utcnow())\
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
@@ -3,37 +3,65 @@
     baseUrl: '/api',
 
     get(path) {
-      return fetch(`${this.baseUrl}${path}`, {
-        method: 'GET',
-        headers: this.getAuthHeaders()
-      }).then(this.handleResponse);
+      return this.send(path, { method: 'GET' });
     },
     post(path, body) {
-      return fetch(`${this.baseUrl}${path}`, {
+      return this.send(path, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json', ...this.getAuthHeaders() },
+        headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(body)
-      }).then(this.handleResponse);
+      });
     },
     put(path, body) {
-      return fetch(`${this.baseUrl}${path}`, {
+      return this.send(path, {
         method: 'PUT',
-        headers: { 'Content-Type': 'application/json', ...this.getAuthHeaders() },
+        headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(body)
-      }).then(this.handleResponse);
+      });
     },
     delete(path) {
-      return fetch(`${this.baseUrl}${path}`, {
-        method: 'DELETE',
-        headers: this.getAuthHeaders()
-      }).then(this.handleResponse);
+      return this.send(path, { method: 'DELETE' });
     },
     upload(path, formData) {
-      return fetch(`${this.baseUrl}${path}`, {
-        method: 'POST',
-        headers: this.getAuthHeaders(),
-        body: formData
-      }).then(this.handleResponse);
+      return this.send(path, { method: 'POST', body: formData });
+    },
+
+    /** fetch con el token actual; si ha caducado, lo renueva una vez y reintenta */
+    send(path, options) {
+      const run = () => fetch(`${this.baseUrl}${path}`, {
+        ...options,
+        headers: { ...(options.headers || {}), ...this.getAuthHeaders() }
+      });
+      return run().then(res => {
+        if (res.status !== 401 || !this.getRefreshToken()) return this.handleResponse(res);
+        return res.clone().json().then(data => {
+          if (data.message !== 'Token expired') return this.handleResponse(res);
+          return this.refresh().then(ok => (ok ? run() : res)).then(this.handleResponse);
+        });
+      });
+    },
+
+    /** Canjea el token de refresco; las peticiones que caducan a la vez comparten el canje */
+    refresh() {
+      if (!this.refreshing) {
+        this.refreshing = fetch(`${this.baseUrl}/auth/refresh`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ refresh_token: this.getRefreshToken() })
+        })
+          .then(res => (res.ok ? res.json() : null))
+          .then(data => {
+            if (!data) {
+              this.removeToken();
+              return false;
+            }
+            this.setTokens(data.data);
+            return true;
+          })
+          .catch(() => false)
+          .finally(() => { this.refreshing = null; });
+      }
+      return this.refreshing;
     },
 
     handleResponse(res) {
@@ -49,8 +77,26 @@
     setToken(token) {
       localStorage.setItem('token', token);
     },
+    getRefreshToken() {
+      return localStorage.getItem('refresh_token');
+    },
+    /** Guarda el par devuelto por login, register y refresh */
+    setTokens({ token, refresh_token }) {
+      this.setToken(token);
+      if (refresh_token) localStorage.setItem('refresh_token', refresh_token);
+    },
     removeToken() {
       localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
+    },
+    /** URL de un stream SSE: EventSource no envía cabeceras, el token va en la query */
+    streamUrl(path, params = {}) {
+      const query = new URLSearchParams({ token: this.getToken() || '', ...params });
+      return `${this.baseUrl}${path}?${query}`;
+    },
+    /** URL de una foto (url, thumbnail_url o web_url): <img> no envía cabeceras, el token va en la query */
+    mediaUrl(url) {
+      return url ? `${url}?${new URLSearchParams({ token: this.getToken() || '' })}` : '';
     },
     getAuthHeaders() {
       const token = this.getToken();
@@ -60,6 +106,7 @@
     auth: {
       register: body => API.post('/auth/register', body),
       login:    body => API.post('/auth/login',    body),
+      logout:   () => API.post('/auth/logout', { refresh_token: API.getRefreshToken() }),
       validateToken: () => API.get('/auth/validate-token'),
       getProfile: () => API.get('/auth/profile'),
       updateProfile: body => API.put('/auth/profile', body)
@@ -82,7 +129,10 @@
       join: (matchId, team) => API.post(`/matches/${matchId}/join`, team ? { team } : {}),
       leave: matchId => API.post(`/matches/${matchId}/leave`),
       assignCards: matchId => API.post(`/matches/${matchId}/assign-cards`),
-      getCard: matchId => API.get(`/matches/${matchId}/card`)
+      getCard: matchId => API.get(`/matches/${matchId}/card`),
+      eventsUrl: (matchId, lastEventId) => API.streamUrl(
+        `/matches/matches/${matchId}/events`, lastEventId ? { last_event_id: lastEventId } : {}
+      )
     },
     results: {
       submitResult: (matchId, body) => API.post(`/results/matches/${matchId}/result`, body),
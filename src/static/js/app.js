@@ -74,8 +74,9 @@ const App = {
         
         appContainer.innerHTML = matchDetailTemplate.innerHTML;
         
-        // Cargar detalles del partido
+        // Cargar detalles del partido y seguir sus cambios en directo
         Matches.loadMatchDetails(matchId);
+        Matches.watchMatch(matchId);
         
         // Actualizar navegación
         this.updateNavigation('matches');
@@ -102,6 +103,9 @@ const App = {
     
     // Actualizar navegación activa
     updateNavigation(page) {
+        // El stream del partido solo vive en su página
+        if (page !== 'matches') Matches.stopWatching();
+
         // Eliminar clase active de todos los enlaces
         document.querySelectorAll('.nav-link').forEach(link => {
             link.classList.remove('active');
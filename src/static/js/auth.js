@@ -61,7 +61,7 @@
 
       try {
         const res = await API.auth.login({ email, password });
-        API.setToken(res.data.token);
+        API.setTokens(res.data);
         currentUser = res.data.user;
         Auth.setCurrentUser(res.data.user);
         this.showAuthMessage('Sesión iniciada', 'success');
@@ -88,8 +88,9 @@
       }
     },
 
-    /** Elimina el token y vuelve al login */
+    /** Revoca los tokens en el servidor, los elimina y vuelve al login */
     logout() {
+      if (API.getToken()) API.auth.logout().catch(() => {});
       API.removeToken();
       currentUser = null;
       Auth.setCurrentUser(null);
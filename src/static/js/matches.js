@@ -160,6 +160,53 @@
       }
     },
 
+    /**
+     * Abre el stream SSE del partido y recarga el detalle cuando cambia. Si el
+     * servidor no ofrece eventos (503) se queda como estaba, sin directo.
+     */
+    watchMatch(matchId, lastEventId) {
+      this.stopWatching();
+      if (!window.EventSource || !API.getToken()) return;
+
+      const source = new EventSource(API.matches.eventsUrl(matchId, lastEventId));
+      const watch = { source, matchId, lastEventId, opened: false, reload: null };
+      this.watching = watch;
+
+      source.onopen = () => { watch.opened = true; };
+      source.onerror = () => {
+        if (source.readyState !== EventSource.CLOSED || this.watching !== watch) return;
+        // Cerrado por el servidor (401/403/503). Si llegó a abrirse, lo normal es
+        // que el token haya caducado: renovarlo y reabrir desde el último evento.
+        this.stopWatching();
+        if (watch.opened) {
+          API.refresh().then(ok => { if (ok) this.watchMatch(matchId, watch.lastEventId); });
+        }
+      };
+
+      const onChange = e => {
+        watch.lastEventId = e.lastEventId || watch.lastEventId;
+        if (e.type === 'match_deleted') {
+          this.stopWatching();
+          App.showToast('El partido se ha eliminado', 'info');
+          App.showHomePage();
+          return;
+        }
+        // Varios eventos seguidos (p. ej. cuatro cartas) se agrupan en una recarga
+        clearTimeout(watch.reload);
+        watch.reload = setTimeout(() => this.loadMatchDetails(matchId), 300);
+      };
+      ['participant_joined', 'participant_left', 'cards_assigned', 'result',
+       'photo_added', 'photo_processed', 'match_updated', 'match_deleted']
+        .forEach(type => source.addEventListener(type, onChange));
+    },
+
+    stopWatching() {
+      if (!this.watching) return;
+      clearTimeout(this.watching.reload);
+      this.watching.source.close();
+      this.watching = null;
+    },
+
     async loadMatchDetails(matchId) {
       try {
         const res = await API.matches.getOne(matchId);
@@ -358,7 +405,7 @@
           return;
         }
         cont.innerHTML = photos.map(p => {
-          const url = '/' + p.file_path;
+          const url = API.mediaUrl(p.thumbnail_url || p.url);
           const d   = new Date(p.uploaded_at).toLocaleDateString('es-ES');
           const u   = p.user?.username || 'Usuario';
           return `
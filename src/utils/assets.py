@@ -0,0 +1,157 @@
+"""
+Servido de la SPA desde memoria.
+
+Al arrancar se recorre la carpeta static una sola vez y se construye un
+manifiesto: cada asset recibe un nombre con huella de contenido
+(`js/app.3f2a91c0d4.js`) y se guarda en memoria junto a sus variantes
+gzip y Brotli precomprimidas. index.html se renderiza también al arrancar,
+con las referencias reescritas a los nombres con huella.
+
+- Assets con huella: `Cache-Control: immutable` durante un año.
+- Nombres originales (HTML antiguo en caché): se sirven con ETag y no-cache.
+- index.html: desde memoria con ETag; el navegador revalida en cada visita.
+
+Ninguna petición toca el disco. En desarrollo (STATIC_AUTO_RELOAD=true o
+FLASK_ENV=development) el manifiesto se reconstruye si cambia algún fichero.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+import brotli
+from flask import request, make_response
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, no-cache'
+
+COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+MIN_COMPRESS_BYTES = 512
+
+_REF_RE = re.compile(r'(?P<attr>src|href)="/(?P<path>[^"?#]+)(?:\?[^"]*)?"')
+
+
+class Asset:
+    __slots__ = ('content_type', 'etag', 'variants')
+
+    def __init__(self, data, content_type):
+        self.content_type = content_type
+        self.etag = hashlib.sha256(data).hexdigest()[:20]
+        self.variants = {'identity': data}
+        if content_type.startswith(COMPRESSIBLE) and len(data) >= MIN_COMPRESS_BYTES:
+            for encoding, compressed in (
+                ('br', brotli.compress(data, quality=11)),
+                ('gzip', gzip.compress(data, compresslevel=9, mtime=0)),
+            ):
+                if len(compressed) < len(data):
+                    self.variants[encoding] = compressed
+
+    def pick_encoding(self):
+        """Mejor variante aceptada por el cliente (Accept-Encoding)."""
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accepted[encoding]:
+                return encoding
+        return 'identity'
+
+
+def _content_type(path):
+    content_type, _ = mimetypes.guess_type(path)
+    content_type = content_type or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type == 'application/javascript':
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+def fingerprint(path, data):
+    base, ext = os.path.splitext(path)
+    return f'{base}.{hashlib.sha256(data).hexdigest()[:10]}{ext}'
+
+
+class AssetManifest:
+    def __init__(self, static_folder, render_index, auto_reload=False):
+        self.static_folder = static_folder
+        self.render_index = render_index
+        self.auto_reload = auto_reload
+        self._lock = threading.Lock()
+        self._signature = None
+        self.build()
+
+    def _scan(self):
+        files = []
+        for root, dirs, names in os.walk(self.static_folder):
+            # Las subidas de usuarios no forman parte del bundle
+            dirs[:] = [d for d in dirs if d != 'uploads']
+            for name in names:
+                full = os.path.join(root, name)
+                files.append((os.path.relpath(full, self.static_folder).replace(os.sep, '/'), full))
+        return sorted(files)
+
+    def _signature_of(self, files):
+        return tuple((rel, os.path.getmtime(full)) for rel, full in files)
+
+    def build(self):
+        files = self._scan()
+        manifest = {}   # nombre original -> nombre con huella
+        assets = {}     # nombre (original o con huella) -> Asset
+        for rel, full in files:
+            with open(full, 'rb') as f:
+                data = f.read()
+            asset = Asset(data, _content_type(rel))
+            hashed = fingerprint(rel, data)
+            manifest[rel] = hashed
+            assets[rel] = asset
+            assets[hashed] = asset
+
+        def rewrite(match):
+            hashed = manifest.get(match.group('path'))
+            if hashed is None:
+                return match.group(0)
+            return f'{match.group("attr")}="/{hashed}"'
+
+        html = _REF_RE.sub(rewrite, self.render_index())
+        index = Asset(html.encode('utf-8'), 'text/html; charset=utf-8')
+
+        with self._lock:
+            self.manifest = manifest
+            self.assets = assets
+            self.index = index
+            self._signature = self._signature_of(files)
+
+    def _reload_if_changed(self):
+        files = self._scan()
+        if self._signature_of(files) != self._signature:
+            self.build()
+
+    def url_for(self, path):
+        """URL con huella de un asset (p. ej. 'js/app.js')."""
+        return '/' + self.manifest.get(path, path)
+
+    def response(self, path):
+        """Respuesta para `path`: el asset si existe o index.html (rutas de la SPA)."""
+        if self.auto_reload:
+            self._reload_if_changed()
+
+        asset = self.assets.get(path) if path else None
+        if asset is None:
+            return self._respond(self.index, REVALIDATE)
+        cache = IMMUTABLE if path not in self.manifest else REVALIDATE
+        return self._respond(asset, cache)
+
+    def _respond(self, asset, cache_control):
+        encoding = asset.pick_encoding()
+        etag = asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}'
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(asset.variants[encoding])
+            response.content_type = asset.content_type
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        if len(asset.variants) > 1:
+            response.headers['Vary'] = 'Accept-Encoding'
+        return response
@@ -0,0 +1,125 @@
+"""
+Configuración del engine de SQLAlchemy a partir del entorno.
+
+La BBDD está detrás de un proxy remoto (Railway): el pool se dimensiona por
+worker de gunicorn, se verifica cada conexión antes de usarla (pre-ping) y se
+reciclan antes de que el proxy las corte por inactividad.
+
+Variables:
+    DATABASE_URL          URI completa (tiene prioridad sobre DB_*)
+    DB_POOL_SIZE          conexiones persistentes por worker (5)
+    DB_MAX_OVERFLOW       conexiones extra bajo carga (10)
+    DB_POOL_TIMEOUT       segundos esperando una conexión libre (30)
+    DB_POOL_RECYCLE       segundos de vida máxima de una conexión (280)
+    DB_POOL_PRE_PING      verificar la conexión al sacarla del pool (true)
+    DB_CONNECT_TIMEOUT    timeout de conexión de PyMySQL (10)
+    DB_READ_TIMEOUT       timeout de lectura de PyMySQL (30)
+    DB_WRITE_TIMEOUT      timeout de escritura de PyMySQL (30)
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+def database_uri():
+    url = os.getenv('DATABASE_URL')
+    if url:
+        return url
+
+    DB_USER     = os.getenv('DB_USER', 'root')
+    DB_PASSWORD = os.getenv('DB_PASSWORD', 'password')
+    DB_HOST     = os.getenv('DB_HOST', 'localhost')
+    DB_PORT     = os.getenv('DB_PORT', '3306')
+    DB_NAME     = os.getenv('DB_NAME', 'mydb')
+    return (
+        f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@"
+        f"{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    )
+
+
+def engine_options(uri):
+    """Opciones para SQLALCHEMY_ENGINE_OPTIONS."""
+    if uri.startswith('sqlite'):
+        return {}
+
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 280),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    }
+    if uri.startswith('mysql+pymysql'):
+        options['connect_args'] = {
+            'connect_timeout': _env_int('DB_CONNECT_TIMEOUT', 10),
+            'read_timeout': _env_int('DB_READ_TIMEOUT', 30),
+            'write_timeout': _env_int('DB_WRITE_TIMEOUT', 30),
+        }
+    return options
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide cuánto tarda cada checkout en obtener conexión."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return conn
+
+    def _create_connection(self):
+        with self._stats_lock:
+            self.connects += 1
+        return super()._create_connection()
+
+
+def pool_stats(engine):
+    """Estado en vivo del pool del engine (checkouts, overflow, esperas)."""
+    pool = engine.pool
+    stats = {'pid': os.getpid(), 'class': type(pool).__name__, 'status': pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update({
+            'checkouts': pool.checkouts,
+            'connects': pool.connects,
+            'timeouts': pool.timeouts,
+            'wait_avg_ms': round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else None,
+            'wait_max_ms': round(pool.wait_max * 1000, 3),
+        })
+    return stats
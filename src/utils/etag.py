@@ -0,0 +1,51 @@
+"""
+GET condicionales con ETag.
+
+Los handlers calculan un sello de versión barato (sin construir el grafo
+to_dict) y, si coincide con If-None-Match, responden 304 directamente.
+"""
+import threading
+
+from flask import request, jsonify, make_response
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def _record(endpoint, conditional, hit):
+    with _lock:
+        s = _stats.setdefault(endpoint, {'requests': 0, 'conditional': 0, 'not_modified': 0})
+        s['requests'] += 1
+        s['conditional'] += int(conditional)
+        s['not_modified'] += int(hit)
+
+
+def not_modified(etag):
+    """Respuesta 304 si el cliente ya tiene esta versión; None en caso contrario."""
+    hit = request.if_none_match.contains(etag)
+    _record(request.endpoint, bool(request.if_none_match), hit)
+    if not hit:
+        return None
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def json_with_etag(payload, etag, status=200):
+    response = make_response(jsonify(payload), status)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def etag_stats():
+    """Peticiones, peticiones condicionales y 304 por endpoint."""
+    with _lock:
+        result = {}
+        for endpoint, s in _stats.items():
+            result[endpoint] = dict(s)
+            result[endpoint]['not_modified_ratio'] = (
+                round(s['not_modified'] / s['requests'], 4) if s['requests'] else None
+            )
+        return result
@@ -0,0 +1,108 @@
+"""
+Instrumentación SQL por petición.
+
+Los eventos del engine cuentan las sentencias y acumulan su duración en `g`
+durante cada petición. Al responder se añade la cabecera Server-Timing
+(db, app y total) y se escribe una línea JSON en el logger
+`src.requests` con el endpoint, el estado, las consultas y los tiempos.
+Las peticiones que superan SQL_QUERY_THRESHOLD consultas se registran como
+WARNING con `"flag": "too_many_queries"` y la sentencia más lenta, para que
+un N+1 salte a la vista en los logs de producción.
+
+Config (app.config, con valor por defecto desde el entorno):
+    SQL_QUERY_THRESHOLD   consultas por petición a partir de las que avisar (20)
+    SERVER_TIMING         añadir la cabecera Server-Timing (true)
+    REQUEST_LOG_LEVEL     nivel del logger src.requests (INFO)
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+logger = logging.getLogger('src.requests')
+
+SLOWEST_SQL_CHARS = 300
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or 'sql_queries' not in g:
+        return
+    elapsed = time.perf_counter() - context._query_start
+    g.sql_queries += 1
+    g.sql_seconds += elapsed
+    if elapsed > g.sql_slowest[0]:
+        g.sql_slowest = (elapsed, statement)
+
+
+def _start_request():
+    g.request_start = time.perf_counter()
+    g.sql_queries = 0
+    g.sql_seconds = 0.0
+    g.sql_slowest = (0.0, None)
+
+
+def _finish_request(response, app):
+    if 'request_start' not in g:
+        return response
+    total_ms = (time.perf_counter() - g.request_start) * 1000
+    db_ms = g.sql_seconds * 1000
+    queries = g.sql_queries
+
+    if app.config['SERVER_TIMING']:
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.1f};desc="{queries} queries"')
+        response.headers.add('Server-Timing', f'app;dur={max(total_ms - db_ms, 0):.1f}')
+        response.headers.add('Server-Timing', f'total;dur={total_ms:.1f}')
+
+    line = {
+        'event': 'request',
+        'method': request.method,
+        'endpoint': request.endpoint,
+        'path': request.path,
+        'status': response.status_code,
+        'queries': queries,
+        'db_ms': round(db_ms, 2),
+        'total_ms': round(total_ms, 2),
+        'pid': os.getpid(),
+    }
+    threshold = app.config['SQL_QUERY_THRESHOLD']
+    if threshold and queries > threshold:
+        slowest_seconds, slowest_sql = g.sql_slowest
+        line.update({
+            'flag': 'too_many_queries',
+            'threshold': threshold,
+            'slowest_ms': round(slowest_seconds * 1000, 2),
+            'slowest_sql': (slowest_sql or '')[:SLOWEST_SQL_CHARS],
+        })
+        logger.warning(json.dumps(line))
+    else:
+        logger.info(json.dumps(line))
+    return response
+
+
+def init_instrumentation(app, db):
+    """Registra los eventos SQL y los hooks de petición. Llamar tras db.init_app."""
+    app.config.setdefault('SQL_QUERY_THRESHOLD', int(os.getenv('SQL_QUERY_THRESHOLD', 20)))
+    app.config.setdefault('SERVER_TIMING', os.getenv('SERVER_TIMING', 'true').lower() == 'true')
+
+    logger.setLevel(os.getenv('REQUEST_LOG_LEVEL', 'INFO').upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(_start_request)
+    app.after_request(lambda response: _finish_request(response, app))
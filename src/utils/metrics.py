@@ -0,0 +1,270 @@
+"""
+Métricas en formato de texto de Prometheus, agregadas entre workers.
+
+Cada proceso acumula sus contadores e histogramas en memoria y los vuelca
+(como valores absolutos) a `METRICS_DIR/metrics_<pid>.json` como mucho una
+vez por METRICS_FLUSH_SECONDS y al salir. GET /metrics suma los ficheros de
+todos los procesos, así que da igual qué worker atienda el scrape:
+
+- Contadores e histogramas: se suman los de todos los pids, también los de
+  workers ya terminados, para que los totales nunca retrocedan.
+- Gauges (pool de conexiones): solo los de procesos vivos, con label pid.
+
+gunicorn.conf.py vacía METRICS_DIR al arrancar el master. No necesita
+ningún servicio externo: basta con que Prometheus (u otro) lea /metrics.
+
+Variables:
+    METRICS_DIR            directorio compartido por los workers ($TMPDIR/lio-padel-metrics)
+    METRICS_FLUSH_SECONDS  intervalo mínimo entre volcados de un worker (1)
+    METRICS_TOKEN          /metrics exige `Authorization: Bearer <token>`; sin él,
+                           /metrics solo responde con FLASK_DEBUG (si no, 404)
+"""
+import atexit
+import glob
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from flask import g, request
+
+from src.utils.cache import CACHES
+from src.utils.db_config import pool_stats
+from src.utils.etag import etag_stats
+
+METRICS_DIR = os.getenv('METRICS_DIR') or os.path.join(tempfile.gettempdir(), 'lio-padel-metrics')
+FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', 1))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'http_requests_total': ('counter', 'Peticiones HTTP atendidas.'),
+    'http_request_duration_seconds': ('histogram', 'Latencia de las peticiones HTTP.'),
+    'http_request_db_queries_total': ('counter', 'Consultas SQL ejecutadas durante peticiones HTTP.'),
+    'http_request_db_seconds_total': ('counter', 'Tiempo en BBDD durante peticiones HTTP.'),
+    'http_conditional_requests_total': ('counter', 'Peticiones con If-None-Match por endpoint.'),
+    'http_not_modified_total': ('counter', 'Respuestas 304 por endpoint.'),
+    'cache_hits_total': ('counter', 'Aciertos de las cachés de proceso.'),
+    'cache_misses_total': ('counter', 'Fallos de las cachés de proceso.'),
+    'cache_hit_ratio': ('gauge', 'Aciertos / (aciertos + fallos), agregado entre workers.'),
+    'db_pool_checkouts_total': ('counter', 'Conexiones sacadas del pool.'),
+    'db_pool_connects_total': ('counter', 'Conexiones nuevas abiertas por el pool.'),
+    'db_pool_timeouts_total': ('counter', 'Esperas de conexión que agotaron DB_POOL_TIMEOUT.'),
+    'db_pool_wait_seconds_total': ('counter', 'Tiempo total esperando una conexión libre.'),
+    'db_pool_size': ('gauge', 'Tamaño del pool por worker.'),
+    'db_pool_checked_out': ('gauge', 'Conexiones en uso por worker.'),
+    'db_pool_overflow': ('gauge', 'Conexiones de overflow por worker.'),
+    'workers': ('gauge', 'Procesos worker vivos que han publicado métricas.'),
+}
+
+
+class _Registry:
+    """Contadores e histogramas de este proceso (valores absolutos)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}      # (name, labels) -> valor
+        self.histograms = {}    # (name, labels) -> [cuenta por bucket..., +Inf, suma]
+        self._last_flush = 0.0
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    hist[i] += 1
+                    break
+            else:
+                hist[len(LATENCY_BUCKETS)] += 1
+            hist[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[n, list(l), v] for (n, l), v in self.counters.items()],
+                'histograms': [[n, list(l), list(h)] for (n, l), h in self.histograms.items()],
+            }
+
+
+registry = _Registry()
+
+
+def _labels(**labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _process_snapshot(engine):
+    """Estado de este proceso: registro propio, cachés, ETags y pool."""
+    data = registry.snapshot()
+    counters, gauges = data['counters'], []
+
+    for name, cache in CACHES.items():
+        counters.append(['cache_hits_total', [['cache', name]], cache.hits])
+        counters.append(['cache_misses_total', [['cache', name]], cache.misses])
+    for endpoint, s in etag_stats().items():
+        counters.append(['http_conditional_requests_total', [['endpoint', str(endpoint)]], s['conditional']])
+        counters.append(['http_not_modified_total', [['endpoint', str(endpoint)]], s['not_modified']])
+
+    if engine is not None:
+        pool = pool_stats(engine)
+        pid = [['pid', str(os.getpid())]]
+        for key, metric in (('size', 'db_pool_size'), ('checked_out', 'db_pool_checked_out'),
+                            ('overflow', 'db_pool_overflow')):
+            if key in pool:
+                gauges.append([metric, pid, pool[key]])
+        if 'checkouts' in pool:
+            counters.append(['db_pool_checkouts_total', [], pool['checkouts']])
+            counters.append(['db_pool_connects_total', [], pool['connects']])
+            counters.append(['db_pool_timeouts_total', [], pool['timeouts']])
+            counters.append(['db_pool_wait_seconds_total', [], engine.pool.wait_total])
+
+    data['gauges'] = gauges
+    data['pid'] = os.getpid()
+    return data
+
+
+def flush(engine=None, force=False):
+    """Vuelca el estado de este proceso a su fichero (atómico)."""
+    now = time.monotonic()
+    if not force and now - registry._last_flush < FLUSH_SECONDS:
+        return
+    registry._last_flush = now
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f'metrics_{os.getpid()}.json')
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(_process_snapshot(engine), f)
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect():
+    """Suma los ficheros de todos los procesos. Devuelve (counters, histograms, gauges)."""
+    counters, histograms, gauges = {}, {}, {}
+    workers = 0
+    for path in glob.glob(os.path.join(METRICS_DIR, 'metrics_*.json')):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue    # fichero a medio escribir por otro proceso o ya borrado
+        for name, labels, value in data['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, hist in data['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.get(key)
+            histograms[key] = hist if total is None else [a + b for a, b in zip(total, hist)]
+        if _pid_alive(data['pid']):
+            workers += 1
+            for name, labels, value in data['gauges']:
+                gauges[(name, tuple(map(tuple, labels)))] = value
+    gauges[('workers', ())] = workers
+
+    hits = {dict(l)['cache']: v for (n, l), v in counters.items() if n == 'cache_hits_total'}
+    misses = {dict(l)['cache']: v for (n, l), v in counters.items() if n == 'cache_misses_total'}
+    for cache in hits:
+        total = hits[cache] + misses.get(cache, 0)
+        if total:
+            gauges[('cache_hit_ratio', (('cache', cache),))] = hits[cache] / total
+    return counters, histograms, gauges
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Texto de exposición de Prometheus (versión 0.0.4)."""
+    counters, histograms, gauges = collect()
+    series = {}
+    for (name, labels), value in counters.items():
+        series.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    for (name, labels), value in gauges.items():
+        series.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    for (name, labels), hist in histograms.items():
+        lines = series.setdefault(name, [])
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, hist):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", repr(bound))])} {cumulative}')
+        cumulative += hist[len(LATENCY_BUCKETS)]
+        lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {cumulative}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(hist[-1])}')
+        lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+
+    out = []
+    for name in sorted(series):
+        kind, text = HELP.get(name, ('untyped', name))
+        out.append(f'# HELP {name} {text}')
+        out.append(f'# TYPE {name} {kind}')
+        out.extend(sorted(series[name]))
+    return '\n'.join(out) + '\n'
+
+
+def _record_request(response, db):
+    if 'request_start' not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_start
+    labels = _labels(
+        blueprint=request.blueprint or '',
+        endpoint=request.endpoint or 'none',
+        status=response.status_code,
+    )
+    registry.inc('http_requests_total', labels)
+    registry.observe('http_request_duration_seconds', labels, elapsed)
+    if g.get('sql_queries'):
+        endpoint_labels = _labels(endpoint=request.endpoint or 'none')
+        registry.inc('http_request_db_queries_total', endpoint_labels, g.sql_queries)
+        registry.inc('http_request_db_seconds_total', endpoint_labels, g.sql_seconds)
+    flush(db.engine)
+    return response
+
+
+def clear_metrics_dir():
+    """Borra los ficheros de una ejecución anterior (arranque del master de gunicorn)."""
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+    os.makedirs(METRICS_DIR, exist_ok=True)
+
+
+def init_metrics(app, db):
+    """
+    Registra la medición de peticiones. Llamar después de init_instrumentation,
+    que marca el inicio de la petición y cuenta las consultas en `g`.
+    """
+    app.after_request(lambda response: _record_request(response, db))
+
+    def flush_on_exit():
+        with app.app_context():
+            flush(db.engine, force=True)
+    atexit.register(flush_on_exit)
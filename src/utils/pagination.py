@@ -0,0 +1,103 @@
+"""
+Paginación por cursor (keyset) sobre (date, id) en orden descendente.
+
+El cursor es opaco para el cliente: codifica la fecha e id del último
+elemento devuelto. Cada página cuesta O(limit) a cualquier profundidad,
+a diferencia de OFFSET.
+
+Sin limit ni cursor se devuelve la lista completa, como antes de paginar,
+para no recortar en silencio a los clientes que no siguen next_cursor. Con
+cursor y sin limit las páginas son de DEFAULT_LIMIT.
+"""
+import base64
+from datetime import datetime
+
+from sqlalchemy import or_, and_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+STATUSES = ('open', 'in_progress', 'completed', 'cancelled')
+
+
+class Page:
+    """limit None = sin paginar."""
+
+    def __init__(self, limit, cursor=None, status=None, date_from=None, date_to=None):
+        self.limit = limit
+        self.cursor = cursor
+        self.status = status
+        self.date_from = date_from
+        self.date_to = date_to
+
+
+def encode_cursor(date, item_id):
+    raw = f'{date.isoformat()}|{item_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    date_str, item_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+    return datetime.fromisoformat(date_str), int(item_id)
+
+
+def parse_page_args(args):
+    """
+    Lee limit, cursor, status, from y to de la query string.
+    Lanza ValueError con un mensaje para el cliente si algo no es válido.
+    """
+    if args.get('limit') is None and not args.get('cursor'):
+        limit = None
+    else:
+        try:
+            limit = int(args.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            raise ValueError('limit inválido')
+        limit = max(1, min(limit, MAX_LIMIT))
+
+    cursor = None
+    if args.get('cursor'):
+        try:
+            cursor = decode_cursor(args['cursor'])
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError('cursor inválido')
+
+    status = args.get('status')
+    if status is not None and status not in STATUSES:
+        raise ValueError('status inválido')
+
+    try:
+        date_from = datetime.fromisoformat(args['from']) if args.get('from') else None
+        date_to = datetime.fromisoformat(args['to']) if args.get('to') else None
+    except ValueError:
+        raise ValueError('Formato de fecha inválido')
+
+    return Page(limit, cursor, status, date_from, date_to)
+
+
+def apply_keyset(query, page, date_col, id_col, status_col=None):
+    """Aplica filtros, posición del cursor, orden y límite (limit + 1 para saber si hay más)."""
+    if page.status is not None and status_col is not None:
+        query = query.filter(status_col == page.status)
+    if page.date_from is not None:
+        query = query.filter(date_col >= page.date_from)
+    if page.date_to is not None:
+        query = query.filter(date_col <= page.date_to)
+    if page.cursor is not None:
+        cursor_date, cursor_id = page.cursor
+        query = query.filter(or_(
+            date_col < cursor_date,
+            and_(date_col == cursor_date, id_col < cursor_id)
+        ))
+    query = query.order_by(date_col.desc(), id_col.desc())
+    if page.limit is None:
+        return query
+    return query.limit(page.limit + 1)
+
+
+def split_page(rows, page, key):
+    """Recorta la fila extra y devuelve (filas, next_cursor)."""
+    if page.limit is None or len(rows) <= page.limit:
+        return rows, None
+    rows = rows[:page.limit]
+    return rows, encode_cursor(*key(rows[-1]))
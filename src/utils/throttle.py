@@ -0,0 +1,50 @@
+"""
+Limitación de intentos por clave (IP, email) en ventanas fijas.
+
+Los contadores viven en memoria de cada proceso: con N workers un cliente
+puede llegar a N veces el límite en total, pero cada worker hace como mucho
+`limit` hashes de contraseña por clave y ventana, que es lo que protege su
+capacidad.
+"""
+import threading
+import time
+
+
+class RateLimiter:
+    def __init__(self, limit, window, maxsize=100000):
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize
+        self._counts = {}           # clave -> (inicio de ventana, intentos)
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """
+        Cuenta un intento. Devuelve 0 si está permitido o los segundos que
+        faltan para que se reinicie la ventana si se ha superado el límite.
+        """
+        if not self.limit:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            start, count = self._counts.get(key, (now, 0))
+            if now - start >= self.window:
+                start, count = now, 0
+            count += 1
+            self._counts[key] = (start, count)
+            if len(self._counts) > self.maxsize:
+                self._prune(now)
+        if count > self.limit:
+            return max(1, int(self.window - (now - start) + 0.999))
+        return 0
+
+    def _prune(self, now):
+        expired = [k for k, (start, _) in self._counts.items() if now - start >= self.window]
+        for key in expired:
+            del self._counts[key]
+        if len(self._counts) > self.maxsize:
+            self._counts.clear()
+
+    def reset(self, key):
+        with self._lock:
+            self._counts.pop(key, None)
@@ -0,0 +1,53 @@
+"""
+Ubicación de los ficheros subidos y sus URLs.
+
+MatchPhoto guarda las rutas relativas a UPLOAD_FOLDER (`ab/cd/<hash>.jpg`):
+no expone la ruta del servidor y sobrevive a un cambio de carpeta.
+
+El original del almacén por contenido no se modifica nunca (su nombre es el
+SHA-256 de los bytes) y conserva el EXIF, así que no se sirve: la URL de la
+foto a tamaño completo apunta a la copia limpia `<hash>_full.<ext>`.
+"""
+import os
+
+UPLOAD_FOLDER = os.path.abspath(os.getenv('UPLOAD_FOLDER', 'static/uploads'))
+UPLOAD_URL_PREFIX = '/api/results/uploads/'
+
+
+def stored_path(path):
+    """Ruta a guardar en la BBDD para un fichero bajo UPLOAD_FOLDER."""
+    return os.path.relpath(os.path.abspath(path), UPLOAD_FOLDER).replace(os.sep, '/')
+
+
+def upload_path(stored):
+    """Ruta en disco de una ruta guardada por stored_path."""
+    return os.path.join(UPLOAD_FOLDER, *stored.split('/'))
+
+
+def public_url(stored):
+    """URL de un fichero subido; se sirve solo con token de un miembro de la liga."""
+    if not stored:
+        return None
+    return UPLOAD_URL_PREFIX + stored
+
+
+def variant_path(filepath, variant):
+    """Miniatura o versión web (JPEG) junto al original."""
+    base, _ = os.path.splitext(filepath)
+    return f'{base}_{variant}.jpg'
+
+
+def full_path(filepath):
+    """Copia a tamaño completo sin metadatos, en el formato del original."""
+    base, ext = os.path.splitext(filepath)
+    return f'{base}_full{ext}'
+
+
+def photo_url(file_path, blob_hash, status):
+    """
+    URL de la foto a tamaño completo. Las del almacén por contenido, solo
+    cuando la copia limpia existe; las antiguas se limpiaban en el sitio.
+    """
+    if blob_hash is None:
+        return public_url(file_path)
+    return public_url(full_path(file_path)) if status == 'ready' else None
@@ -0,0 +1,119 @@
+"""
+Fixtures comunes de los tests: la app de src/main.py sobre una BBDD SQLite
+temporal con las migraciones aplicadas (bench/seed.py:prepare_app), un
+cliente, un sembrador de ligas y un contador de consultas SQL.
+
+    python -m pytest -q
+"""
+import itertools
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Antes de importar la app: nunca la BBDD ni las subidas reales, hashes en línea
+# (el pool spawn reimportaría pytest) y sin límite de intentos
+_TMP = tempfile.mkdtemp(prefix='tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_TMP, 'tests.db')
+os.environ['UPLOAD_FOLDER'] = os.path.join(_TMP, 'uploads')
+os.environ['PASSWORD_HASH_PROCESSES'] = '0'
+os.environ['AUTH_IP_LIMIT'] = '0'
+os.environ['AUTH_EMAIL_LIMIT'] = '0'
+os.environ.setdefault('SECRET_KEY', 'tests')
+
+
+@pytest.fixture(scope='session')
+def app():
+    from bench.seed import prepare_app
+    return prepare_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_queries(app):
+    """`with count_queries() as n:` y n[0] tiene las sentencias SQL lanzadas dentro."""
+    from sqlalchemy import event
+    from src.models import db
+
+    with app.app_context():
+        engine = db.engine
+
+    @contextmanager
+    def counting():
+        count = [0]
+
+        def _count(*args):
+            count[0] += 1
+        event.listen(engine, 'before_cursor_execute', _count)
+        try:
+            yield count
+        finally:
+            event.remove(engine, 'before_cursor_execute', _count)
+    return counting
+
+
+class LeagueFactory:
+    """Ligas de 4 jugadores con partidos completados, valoraciones y alguna foto."""
+
+    _seq = itertools.count(1)      # compartido: la BBDD es la misma en toda la sesión
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, matches=1):
+        from src.models import db
+        from src.models.league import League, LeagueMembership
+        from src.models.match import Match, MatchParticipation
+        from src.models.rating import PlayerRating, MatchPhoto
+        from src.models.user import User
+        from src.services.tokens import issue_tokens
+
+        tag = f'{os.getpid()}_{next(self._seq)}'
+        now = datetime.utcnow().replace(microsecond=0)
+        with self.app.app_context():
+            users = [User(username=f'test_{tag}_{i}', email=f'test_{tag}_{i}@example.com',
+                          password_hash='-') for i in range(4)]
+            db.session.add_all(users)
+            db.session.flush()
+            league = League(name=f'Liga {tag}', invite_code=f'T{tag}', created_by_id=users[0].id)
+            db.session.add(league)
+            db.session.flush()
+            db.session.add_all(LeagueMembership(user_id=u.id, league_id=league.id) for u in users)
+            for n in range(matches):
+                match = Match(league_id=league.id, date=now - timedelta(hours=n + 1),
+                              status='completed', winner_team=1 + n % 2, created_by_id=users[0].id)
+                db.session.add(match)
+                db.session.flush()
+                db.session.add_all(MatchParticipation(match_id=match.id, user_id=u.id, team=1 + j // 2)
+                                   for j, u in enumerate(users))
+                db.session.add_all(PlayerRating(match_id=match.id, rater_id=users[0].id,
+                                                rated_id=u.id, rating=7) for u in users[1:])
+                if n % 2 == 0:
+                    db.session.add(MatchPhoto(match_id=match.id, user_id=users[0].id, status='ready',
+                                              file_path=f'ab/cd/{match.id:064x}.jpg'))
+            db.session.commit()
+            auth = [
+                {'Authorization': f"Bearer {issue_tokens(u.id, u.username, [league.id])['token']}"}
+                for u in users
+            ]
+            return {
+                'id': league.id,
+                'users': [u.id for u in users],
+                'auth': auth,           # cabeceras de cada jugador
+                'headers': auth[0],     # las del creador
+            }
+
+
+@pytest.fixture
+def make_league(app):
+    return LeagueFactory(app)
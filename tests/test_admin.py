@@ -0,0 +1,18 @@
+"""Endpoints internos protegidos por token."""
+import pytest
+
+
+@pytest.mark.parametrize('headers, status', [
+    ({}, 403),
+    ({'X-Admin-Token': 'otro'}, 403),
+    ({'X-Admin-Token': 'tóken'}, 403),
+    ({'X-Admin-Token': 'secreto'}, 200),
+])
+def test_admin_token(client, monkeypatch, headers, status):
+    monkeypatch.setenv('ADMIN_TOKEN', 'secreto')
+    assert client.get('/api/admin/pool', headers=headers).status_code == status
+
+
+def test_admin_without_token_configured_is_404(client, monkeypatch):
+    monkeypatch.delenv('ADMIN_TOKEN', raising=False)
+    assert client.get('/api/admin/pool', headers={'X-Admin-Token': ''}).status_code == 404
@@ -0,0 +1,44 @@
+"""Autenticación con tokens de acceso."""
+import pytest
+
+
+@pytest.fixture
+def deleted_user(app):
+    """Token de acceso válido de un usuario que ya no existe."""
+    from src.models import db
+    from src.models.user import User
+    from src.services.tokens import issue_tokens
+    with app.app_context():
+        user = User(username='borrado', email='borrado@example.com', password_hash='-')
+        db.session.add(user)
+        db.session.commit()
+        token = issue_tokens(user.id, user.username, [])['token']
+        db.session.delete(user)
+        db.session.commit()
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.mark.parametrize('method', ['get', 'put'])
+def test_profile_of_deleted_user_is_404(client, deleted_user, method):
+    response = getattr(client, method)('/api/auth/profile', headers=deleted_user, json={})
+    assert response.status_code == 404
+    assert response.get_json()['message'] == 'User not found'
+
+
+def test_rename_changes_the_standings_etag(app, client, make_league):
+    from src.models import db
+    from src.models.skill import replay_ratings
+    league = make_league()
+    with app.app_context():
+        replay_ratings(league['id'])
+        db.session.commit()
+    url = f"/api/leagues/{league['id']}/standings"
+    etag = client.get(url, headers=league['headers']).headers['ETag']
+
+    response = client.put('/api/auth/profile', headers=league['auth'][1],
+                          json={'username': f"renombrado_{league['id']}"})
+    assert response.status_code == 200
+
+    response = client.get(url, headers={**league['headers'], 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert f"renombrado_{league['id']}" in {row['username'] for row in response.get_json()['data']}
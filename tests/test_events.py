@@ -0,0 +1,99 @@
+"""Reparto de eventos de partido a los streams de un worker."""
+import json
+
+import pytest
+
+from src.models import db
+from src.models.match import MatchEvent
+from src.services import events
+
+
+@pytest.fixture
+def broker(app):
+    """Broker sin hilo, con una suscripción al partido 1 y el cursor al final de la tabla."""
+    broker = events._Broker()
+    sub = events.Subscription(1)
+    broker._subscribers[1] = {sub}
+    broker._count = 1
+    with app.app_context():
+        broker.last_id = db.session.query(db.func.max(MatchEvent.id)).scalar() or 0
+    return broker, sub
+
+
+def _commit_event(app, event_id):
+    with app.app_context():
+        db.session.add(MatchEvent(id=event_id, match_id=1, league_id=1, type='test',
+                                  payload=json.dumps({'match_id': 1})))
+        db.session.commit()
+
+
+def _delivered(sub):
+    ids = []
+    while not sub.queue.empty():
+        ids.append(sub.queue.get_nowait().id)
+    return ids
+
+
+def test_event_committed_late_is_delivered_once(app, broker):
+    broker, sub = broker
+    base = broker.last_id
+
+    # El id base+1 se asignó antes, pero su transacción hace commit después
+    _commit_event(app, base + 2)
+    broker._poll(app)
+    assert _delivered(sub) == [base + 2]
+
+    _commit_event(app, base + 1)
+    broker._poll(app)
+    broker._poll(app)
+    assert _delivered(sub) == [base + 1]
+    assert not broker._gaps
+
+
+def test_missing_ids_are_forgotten_after_gap_seconds(app, broker, monkeypatch):
+    broker, sub = broker
+    base = broker.last_id
+    _commit_event(app, base + 3)
+    broker._poll(app)
+    assert set(broker._gaps) == {base + 1, base + 2}
+
+    monkeypatch.setattr(events, 'GAP_SECONDS', -1)
+    broker._poll(app)
+    assert not broker._gaps
+    assert _delivered(sub) == [base + 3]
+
+
+def test_failed_replay_releases_the_stream_slot(app, client, make_league, monkeypatch):
+    league = make_league(matches=1)
+    match_id = client.get(f"/api/leagues/{league['id']}", headers=league['headers'])\
+        .get_json()['data']['matches'][0]['id']
+    token = league['headers']['Authorization'].split(' ', 1)[1]
+    monkeypatch.setattr(events, 'MAX_STREAMS', 4)
+    before = events.broker.stream_count()
+
+    def broken_replay(*args):
+        raise RuntimeError('pool agotado')
+    monkeypatch.setattr(events, 'replay', broken_replay)
+
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    try:
+        response = client.get(f'/api/matches/matches/{match_id}/events?token={token}&last_event_id=5')
+    finally:
+        app.config['PROPAGATE_EXCEPTIONS'] = None
+    assert response.status_code == 500
+    assert events.broker.stream_count() == before
+
+
+def test_unread_stream_releases_the_stream_slot(app, client, make_league, monkeypatch):
+    league = make_league(matches=1)
+    match_id = client.get(f"/api/leagues/{league['id']}", headers=league['headers'])\
+        .get_json()['data']['matches'][0]['id']
+    token = league['headers']['Authorization'].split(' ', 1)[1]
+    monkeypatch.setattr(events, 'MAX_STREAMS', 4)
+    before = events.broker.stream_count()
+
+    response = client.get(f'/api/matches/matches/{match_id}/events?token={token}', buffered=False)
+    assert response.status_code == 200
+    assert events.broker.stream_count() == before + 1
+    response.close()
+    assert events.broker.stream_count() == before
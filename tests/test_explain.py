@@ -0,0 +1,20 @@
+"""Ninguna sentencia de la API recorre una tabla entera (bench/explain.py)."""
+import random
+
+from bench.explain import analyze
+from bench.seed import seed
+
+
+def test_no_full_table_scans(app):
+    with app.app_context():
+        data = seed(users=40, leagues=3, members=8, matches=20, seed=7)
+
+    analyzed, failures, errors = analyze(app, data, random.Random(7), iterations=3, write_flows=2)
+
+    assert analyzed > 0
+    assert not errors, errors
+    assert not failures, '\n'.join(
+        f"{', '.join(sorted(set(tables)))} en {', '.join(sorted(str(e) for e in endpoints))}: "
+        f"{' '.join(statement.split())}"
+        for statement, tables, endpoints in failures
+    )
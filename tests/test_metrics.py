@@ -0,0 +1,20 @@
+"""Acceso a /metrics."""
+import pytest
+
+
+@pytest.mark.parametrize('headers, status', [
+    ({}, 403),
+    ({'Authorization': 'Bearer otro'}, 403),
+    ({'Authorization': 'Bearer tóken'}, 403),
+    ({'Authorization': 'Bearer secreto'}, 200),
+])
+def test_metrics_token(client, monkeypatch, headers, status):
+    monkeypatch.setenv('METRICS_TOKEN', 'secreto')
+    assert client.get('/metrics', headers=headers).status_code == status
+
+
+@pytest.mark.parametrize('debug, status', [(False, 404), (True, 200)])
+def test_metrics_without_token_only_in_debug(app, client, monkeypatch, debug, status):
+    monkeypatch.delenv('METRICS_TOKEN', raising=False)
+    monkeypatch.setattr(app, 'debug', debug)
+    assert client.get('/metrics').status_code == status
@@ -0,0 +1,28 @@
+"""Listados paginados por cursor: sin limit ni cursor, la lista completa."""
+from src.utils.pagination import DEFAULT_LIMIT
+
+
+def _get(client, league, path):
+    response = client.get(path, headers=league['headers'])
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_full_list_without_limit_or_cursor(client, make_league):
+    league = make_league(matches=DEFAULT_LIMIT + 5)
+    for path in (f"/api/matches/leagues/{league['id']}/matches", '/api/profile/history'):
+        body = _get(client, league, path)
+        assert len(body['data']) == DEFAULT_LIMIT + 5
+        assert body['next_cursor'] is None
+
+
+def test_cursor_walks_every_match_once(client, make_league):
+    league = make_league(matches=12)
+    path = f"/api/matches/leagues/{league['id']}/matches?limit=5"
+    body = _get(client, league, path)
+    seen = [m['id'] for m in body['data']]
+    while body['next_cursor']:
+        body = _get(client, league, f"{path}&cursor={body['next_cursor']}")
+        seen += [m['id'] for m in body['data']]
+    full = [m['id'] for m in _get(client, league, f"/api/matches/leagues/{league['id']}/matches")['data']]
+    assert seen == full and len(seen) == 12
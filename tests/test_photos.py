@@ -0,0 +1,143 @@
+"""Subida y descarga de fotos de partido."""
+import hashlib
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from src.services import photos
+from src.utils.uploads import UPLOAD_FOLDER
+
+
+def _jpeg(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), color).save(buffer, 'JPEG')
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def uploaded(client, make_league, monkeypatch):
+    """Liga con un partido y una foto subida, sin procesar (sin el pool de hilos)."""
+    monkeypatch.setattr('src.routes.result.schedule_processing', lambda *args: None)
+    league = make_league(matches=1)
+    match_id = client.get(f"/api/leagues/{league['id']}", headers=league['headers'])\
+        .get_json()['data']['matches'][0]['id']
+    response = client.post(
+        f'/api/results/matches/{match_id}/photos', headers=league['headers'],
+        data={'photo': (_jpeg((league['id'] * 7 % 256, 10, 20)), 'foto.jpg')},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 201
+    return league, response.get_json()['data']
+
+
+def _token(league):
+    return league['headers']['Authorization'].split(' ', 1)[1]
+
+
+def test_photo_paths_are_relative(uploaded):
+    _, photo = uploaded
+    assert not os.path.isabs(photo['file_path'])
+    assert UPLOAD_FOLDER not in photo['file_path']
+    assert os.path.exists(os.path.join(UPLOAD_FOLDER, photo['file_path']))
+
+
+def test_photo_requires_member_token(app, client, make_league, uploaded):
+    from src.models import db
+    from src.models.rating import MatchPhoto
+
+    league, photo = uploaded
+    outsider = make_league(matches=0)
+    photos._process_photo(app, photo['id'])
+    with app.app_context():
+        photo = db.session.get(MatchPhoto, photo['id']).to_dict()
+    assert photo['url'].startswith('/api/results/uploads/')
+
+    assert client.get(photo['url']).status_code == 401
+    assert client.get(f"{photo['url']}?token={_token(outsider)}").status_code == 404
+
+    response = client.get(f"{photo['url']}?token={_token(league)}")
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'].startswith('private')
+
+
+def _exif_jpeg():
+    buffer = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x010f] = 'Cámara'
+    Image.new('RGB', (64, 48), 'red').save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+def test_processing_keeps_the_original_and_serves_a_clean_copy(app, client, make_league, monkeypatch):
+    monkeypatch.setattr('src.routes.result.schedule_processing', lambda *args: None)
+    league = make_league(matches=1)
+    match_id = client.get(f"/api/leagues/{league['id']}", headers=league['headers'])\
+        .get_json()['data']['matches'][0]['id']
+    content = _exif_jpeg()
+    photo = client.post(
+        f'/api/results/matches/{match_id}/photos', headers=league['headers'],
+        data={'photo': (io.BytesIO(content), 'foto.jpg')}, content_type='multipart/form-data'
+    ).get_json()['data']
+    assert photo['url'] is None     # sin copia limpia todavía
+
+    photos._process_photo(app, photo['id'])
+    match = client.get(f'/api/matches/matches/{match_id}', headers=league['headers']).get_json()['data']
+    photo = next(p for p in match['photos'] if p['id'] == photo['id'])
+    assert photo['status'] == 'ready'
+
+    # El original sigue siendo el contenido de su hash y no se sirve
+    original = os.path.join(UPLOAD_FOLDER, photo['file_path'])
+    with open(original, 'rb') as f:
+        assert hashlib.sha256(f.read()).hexdigest() in photo['file_path']
+    token = _token(league)
+    assert client.get(f"/api/results/uploads/{photo['file_path']}?token={token}").status_code == 404
+
+    response = client.get(f"{photo['url']}?token={token}")
+    assert response.status_code == 200
+    assert not Image.open(io.BytesIO(response.data)).getexif()
+
+
+def test_processing_error_marks_photo_failed(app, uploaded, monkeypatch):
+    from src.models import db
+    from src.models.rating import MatchPhoto
+
+    _, photo = uploaded
+
+    def broken(*args):
+        raise OSError('disco lleno')
+    monkeypatch.setattr(photos, 'apply_blob', broken)
+    photos._process_photo(app, photo['id'])
+
+    with app.app_context():
+        assert db.session.get(MatchPhoto, photo['id']).status == 'failed'
+
+
+@pytest.fixture
+def utc_minus_8(monkeypatch):
+    import time
+    monkeypatch.setenv('TZ', 'XST+8')   # POSIX: 8 horas al oeste de UTC
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_gc_grace_window_ignores_local_timezone(app, utc_minus_8):
+    import time
+    tmp = os.path.join(UPLOAD_FOLDER, 'tmp')
+    os.makedirs(tmp, exist_ok=True)
+    fresh, stale = os.path.join(tmp, 'en_curso.part'), os.path.join(tmp, 'abandonado.part')
+    for path in (fresh, stale):
+        with open(path, 'wb') as f:
+            f.write(b'x')
+    two_hours_ago = time.time() - 7200
+    os.utime(stale, (two_hours_ago, two_hours_ago))
+
+    with app.app_context():
+        photos.collect_garbage(grace_seconds=3600)
+
+    assert os.path.exists(fresh)
+    assert not os.path.exists(stale)
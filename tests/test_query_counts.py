@@ -0,0 +1,17 @@
+"""El número de consultas de las lecturas no crece con el número de partidos."""
+
+
+def test_league_detail_queries_do_not_grow_with_matches(client, make_league, count_queries):
+    small, large = make_league(matches=1), make_league(matches=25)
+    # Calentar las cachés de proceso (lista de revocación, cartas)
+    client.get(f"/api/leagues/{small['id']}", headers=small['headers'])
+
+    counts = []
+    for league in (small, large):
+        with count_queries() as queries:
+            response = client.get(f"/api/leagues/{league['id']}", headers=league['headers'])
+        assert response.status_code == 200
+        counts.append(queries[0])
+
+    assert len(response.get_json()['data']['matches']) == 25
+    assert counts[0] == counts[1], f'1 partido: {counts[0]} consultas, 25 partidos: {counts[1]}'
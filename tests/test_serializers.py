@@ -0,0 +1,35 @@
+"""La proyección de columnas produce el mismo JSON que los to_dict() de los modelos."""
+import json
+
+import pytest
+
+from bench import serializers as bench
+
+
+@pytest.fixture(scope='module')
+def seeded(app):
+    with app.app_context():
+        return bench.seed(30)
+
+
+@pytest.mark.parametrize('orm_fn, projection_fn, key', [
+    (bench.orm_matches, bench.projection_matches, 0),
+    (bench.orm_history, bench.projection_history, 1),
+], ids=['league_matches', 'user_history'])
+def test_projection_matches_to_dict(app, seeded, orm_fn, projection_fn, key):
+    with app.app_context():
+        expected = orm_fn(seeded[key])
+        actual = projection_fn(seeded[key])
+    assert len(expected) == 30
+    # Mismas claves en el mismo orden: se compara el JSON serializado
+    assert json.dumps(actual) == json.dumps(expected)
+
+
+def test_league_matches_only_includes_the_league(app, seeded, make_league):
+    from src.models.serializers import league_matches
+    other = make_league(matches=3)
+    with app.app_context():
+        matches = league_matches(other['id'])
+    assert [len(m['participants']) for m in matches] == [4, 4, 4]
+    assert {p['user_id'] for m in matches for p in m['participants']} == set(other['users'])
+    assert {r['match_id'] for m in matches for r in m['ratings']} == {m['id'] for m in matches}
@@ -0,0 +1,28 @@
+"""Recálculo del ranking Elo."""
+from src.models import db
+from src.models.skill import PlayerSkill, replay_ratings
+
+
+def _skills(league_id):
+    return PlayerSkill.query.filter_by(league_id=league_id).count()
+
+
+def test_replay_is_part_of_the_callers_transaction(app, make_league):
+    league = make_league(matches=2)
+    with app.app_context():
+        assert replay_ratings(league['id']) == 2
+        assert _skills(league['id']) == 4
+        db.session.rollback()
+        assert _skills(league['id']) == 0
+
+
+def test_delete_league_clears_its_standings(app, client, make_league):
+    league = make_league()
+    with app.app_context():
+        replay_ratings(league['id'])
+        db.session.commit()
+
+    response = client.delete(f"/api/leagues/{league['id']}", headers=league['headers'])
+    assert response.status_code == 200
+    with app.app_context():
+        assert _skills(league['id']) == 0
@@ -0,0 +1,99 @@
+"""Las estadísticas incrementales cuadran con las tablas vivas."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from src.models import db
+from src.models.stats import check_user_stats, get_user_stats
+
+
+@pytest.fixture
+def league(app, make_league):
+    league = make_league(matches=1)
+    with app.app_context():
+        for user_id in league['users']:
+            get_user_stats(user_id)     # filas creadas: a partir de aquí, incrementales
+    return league
+
+
+def _assert_consistent(app, user_ids):
+    with app.app_context():
+        for user_id in user_ids:
+            get_user_stats(user_id)     # reconstruye las invalidadas
+            assert check_user_stats(user_id) is None, user_id
+
+
+def test_ratings_update_each_user_once(app, client, league):
+    match_id = client.get(f"/api/leagues/{league['id']}", headers=league['headers'])\
+        .get_json()['data']['matches'][0]['id']
+    others = [u for u in league['users'] if u != league['users'][1]]
+
+    updates = []
+    with app.app_context():
+        engine = db.engine
+
+    def capture(conn, cursor, statement, *args):
+        if statement.startswith('UPDATE user_stats'):
+            updates.append(statement)
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        response = client.post(
+            f'/api/results/matches/{match_id}/ratings', headers=league['auth'][1],
+            json={'ratings': [{'rated_id': u, 'rating': 5 + i} for i, u in enumerate(others)]}
+        )
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+    assert response.status_code == 200
+    assert len(updates) == 1
+    _assert_consistent(app, league['users'])
+
+
+def test_concurrent_card_assignment_rebuilds_stats(app, client, league, monkeypatch):
+    from src.models.match import MatchParticipation
+    from src.models.stats import record_cards
+    from src.routes import match as match_routes
+
+    date = (datetime.utcnow() + timedelta(days=1)).isoformat()
+    match_id = client.post(f"/api/matches/leagues/{league['id']}/matches",
+                           json={'date': date}, headers=league['headers']).get_json()['data']['id']
+    for headers in league['auth']:
+        assert client.post(f'/api/matches/matches/{match_id}/join', json={}, headers=headers).status_code == 200
+
+    # Otra petición asigna la primera carta entre la lectura y el INSERT
+    real_insert_ignore = match_routes.insert_ignore
+
+    def racing_insert_ignore(model, rows):
+        first = rows[0]
+        user_id = db.session.query(MatchParticipation.user_id)\
+            .filter(MatchParticipation.id == first['participation_id']).scalar()
+        record_cards([(user_id, first['card_id'])])
+        real_insert_ignore(model, rows[:1])
+        return real_insert_ignore(model, rows)
+    monkeypatch.setattr(match_routes, 'insert_ignore', racing_insert_ignore)
+
+    response = client.post(f'/api/matches/matches/{match_id}/assign-cards', headers=league['headers'])
+    assert response.status_code == 200
+    _assert_consistent(app, league['users'])
+
+
+def test_concurrent_rebuild_keeps_the_first_row(app, make_league, monkeypatch):
+    from src.models import stats
+
+    league = make_league(matches=2)
+    user_id = league['users'][1]
+
+    # Otra petición reconstruye el mismo usuario entre la lectura y el INSERT
+    real_insert_ignore = stats.insert_ignore
+
+    def racing_insert_ignore(model, rows):
+        if model is stats.UserStats:
+            monkeypatch.setattr(stats, 'insert_ignore', real_insert_ignore)
+            stats.rebuild_user_stats(user_id)
+        return real_insert_ignore(model, rows)
+    monkeypatch.setattr(stats, 'insert_ignore', racing_insert_ignore)
+
+    with app.app_context():
+        assert get_user_stats(user_id)['total_matches'] == 2
+    _assert_consistent(app, [user_id])